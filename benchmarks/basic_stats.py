@@ -0,0 +1,76 @@
+# benchmarks/basic_stats.py
+"""
+Compares the vectorized BasicSummaryStats kernel against a naive implementation
+built on Python's `statistics` module, for 40 years × 12 months × N groupings.
+
+Run from the repository root:
+    python -m benchmarks.basic_stats [groupings] [years]
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from statistics_math.basic_data import basic_stats_matrix
+
+
+def naive_basic_stats(values: list[float]) -> dict:
+    n = len(values)
+    total = sum(values)
+    mean = statistics.fmean(values)
+    first_quartile, median, third_quartile = statistics.quantiles(values, n=4, method="inclusive")
+    minimum, maximum = min(values), max(values)
+    variance = statistics.variance(values)
+    standard_deviation = statistics.stdev(values)
+    running_total = running_totals = 0.0
+    for value in values:
+        running_total += value
+        running_totals += running_total
+    zeros = sum(1 for value in values if value == 0)
+    return {
+        "sample_size": n,
+        "total_area_burned": total,
+        "average_area_burned": mean,
+        "median_area_burned": median,
+        "minimum_area_burned": minimum,
+        "maximum_area_burned": maximum,
+        "range_area_burned": maximum - minimum,
+        "variance_area_burned": variance,
+        "standard_deviation_area_burned": standard_deviation,
+        "coefficient_of_variation": standard_deviation / mean if mean else float("nan"),
+        "first_quartile_area_burned": first_quartile,
+        "third_quartile_area_burned": third_quartile,
+        "sum_cumulative_area_burned": running_totals / n,
+        "number_of_zero_burned_periods": zeros,
+        "proportion_of_nonzero_burned_periods": (n - zeros) / n,
+    }
+
+
+def main(groupings: int = 1000, years: int = 40):
+    rng = np.random.default_rng(7)
+    matrix = rng.gamma(0.6, 400.0, size=(groupings, years * 12))
+    matrix[rng.random(matrix.shape) < 0.2] = 0.0
+    rows = matrix.tolist()
+
+    started = time.perf_counter()
+    naive = [naive_basic_stats(row) for row in rows]
+    naive_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized = basic_stats_matrix(matrix)
+    vectorized_time = time.perf_counter() - started
+
+    # Both implementations must agree
+    for name, column in vectorized.items():
+        expected = np.array([stats[name] for stats in naive], dtype=np.float64)
+        np.testing.assert_allclose(column, expected, rtol=1e-9, err_msg=name)
+
+    print(f"series: {groupings} × {years * 12} monthly points")
+    print(f"naive (statistics module): {naive_time * 1000:10.1f} ms")
+    print(f"vectorized (numpy):        {vectorized_time * 1000:10.1f} ms")
+    print(f"speed-up: {naive_time / vectorized_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
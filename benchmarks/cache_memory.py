@@ -0,0 +1,82 @@
+# benchmarks/cache_memory.py
+"""
+Compares the memory footprint of the two cache layouts for N territories:
+
+- list layout: one CachedData holding a List[AnnualData] and List[MonthlyData]
+  (one Pydantic object per period);
+- columnar layout: one FireSeries holding contiguous NumPy arrays.
+
+Run from the repository root:
+    python -m benchmarks.cache_memory [territories] [years]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+
+from data.pydantic_models import CachedData
+from data.fire_series import series_from_payload
+
+
+def _synthetic_payload(rng: np.random.Generator, years: int) -> dict:
+    first_year = 2024 - years + 1
+    monthly_area = rng.gamma(0.6, 400.0, size=years * 12).round(2)
+    monthly = [
+        {"year": first_year + i // 12, "month": i % 12 + 1, "areaHa": float(area)}
+        for i, area in enumerate(monthly_area)
+    ]
+    annual = [
+        {"year": first_year + y, "areaHa": float(monthly_area[y * 12:(y + 1) * 12].sum())}
+        for y in range(years)
+    ]
+    return {"local_name": "Synthetic", "annual": annual, "monthly": monthly}
+
+
+def _measure(build) -> tuple[int, float]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = build()
+    elapsed = time.perf_counter() - started
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return current, elapsed
+
+
+def main(territories: int = 5000, years: int = 40):
+    rng = np.random.default_rng(42)
+    payloads = [_synthetic_payload(rng, years) for _ in range(territories)]
+
+    def build_models():
+        return {
+            f"municipality-{i}-biome": CachedData(
+                local_name=p["local_name"], local_id=str(i), local_type="municipality",
+                grouping="biome", annual=p["annual"], monthly=p["monthly"],
+                last_updated=date.today(),
+            )
+            for i, p in enumerate(payloads)
+        }
+
+    def build_columnar():
+        return {
+            f"municipality-{i}-biome": series_from_payload("municipality", str(i), "biome", p)
+            for i, p in enumerate(payloads)
+        }
+
+    model_bytes, model_time = _measure(build_models)
+    columnar_bytes, columnar_time = _measure(build_columnar)
+
+    print(f"territories: {territories}, years: {years} ({years * 12} monthly points each)")
+    print(f"{'layout':<10} {'memory (MiB)':>14} {'bytes/territory':>16} {'build (s)':>10}")
+    for name, used, elapsed in (("pydantic", model_bytes, model_time),
+                                ("columnar", columnar_bytes, columnar_time)):
+        print(f"{name:<10} {used / 2**20:>14.1f} {used / territories:>16.0f} {elapsed:>10.2f}")
+    print(f"reduction: {model_bytes / columnar_bytes:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,97 @@
+# benchmarks/descriptive_stats.py
+"""
+Checks the shared-sort DescriptiveStats kernel against plain Python references, then
+times the reference, the kernel called once per series and the kernel on a 2-D batch
+of 40 years × 12 months × N groupings.
+
+Run from the repository root:
+    python -m benchmarks.descriptive_stats [groupings] [years]
+"""
+import bisect
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from statistics_math.descriptive_stats import (
+    ANOMALY_IQR_FACTOR,
+    EVENT_BIN_EDGES,
+    bin_labels,
+    descriptive_stats,
+)
+
+
+def reference_descriptive_stats(values: list[float]) -> dict:
+    n = len(values)
+    mean = statistics.fmean(values)
+    first_quartile, _, third_quartile = statistics.quantiles(values, n=4, method="inclusive")
+    iqr = third_quartile - first_quartile
+    low, high = first_quartile - ANOMALY_IQR_FACTOR * iqr, third_quartile + ANOMALY_IQR_FACTOR * iqr
+
+    ordered = sorted(values)
+    total = sum(ordered)
+    gini = None
+    if total > 0:
+        gini = 2 * sum(rank * value for rank, value in enumerate(ordered, start=1)) / (n * total) - (n + 1) / n
+
+    labels = bin_labels()
+    bins = dict.fromkeys(labels, 0)
+    for value in values:
+        index = bisect.bisect_right(EVENT_BIN_EDGES, value) - 1
+        if index >= 0:
+            bins[labels[index]] += 1
+
+    return {
+        "coefficient_of_variation": statistics.stdev(values) / mean if mean else None,
+        "anomalies_count": sum(1 for value in values if value < low or value > high),
+        "concentration_index": gini,
+        "large_event_proportion": sum(1 for value in values if value >= third_quartile) / n,
+        "large_event_area_share": sum(value for value in values if value >= third_quartile) / total if total else None,
+        "event_counts_by_bin": bins,
+    }
+
+
+def _assert_same(actual: dict, expected: dict, label: str):
+    for name, value in expected.items():
+        if isinstance(value, dict) or value is None or isinstance(value, int):
+            assert actual[name] == value, f"{label} {name}: {actual[name]} != {value}"
+        else:
+            np.testing.assert_allclose(actual[name], value, rtol=1e-9, err_msg=f"{label} {name}")
+
+
+def main(groupings: int = 1000, years: int = 40):
+    rng = np.random.default_rng(5)
+    matrix = rng.gamma(0.6, 400.0, size=(groupings, years * 12))
+    matrix[rng.random(matrix.shape) < 0.2] = 0.0
+    matrix[0] = 0.0  # an all-zero series: undefined CV, concentration and area share
+
+    batched = descriptive_stats(matrix, None, "monthly")
+    for row in range(min(groupings, 50)):
+        expected = reference_descriptive_stats(matrix[row].tolist())
+        _assert_same(descriptive_stats(matrix[row], None, "monthly"), expected, f"row {row}")
+        _assert_same(batched[row], expected, f"row {row} (2-D)")
+
+    rows = matrix.tolist()
+    started = time.perf_counter()
+    for row in rows:
+        reference_descriptive_stats(row)
+    reference_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for row in matrix:
+        descriptive_stats(row, None, "monthly")
+    single_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    descriptive_stats(matrix, None, "monthly")
+    shared_time = time.perf_counter() - started
+
+    print(f"series: {groupings} × {years * 12} monthly points, bins: {bin_labels()}")
+    print(f"reference (python):               {reference_time * 1000:10.1f} ms")
+    print(f"shared sort, one series per call: {single_time * 1000:10.1f} ms  ({reference_time / single_time:.0f}x)")
+    print(f"shared sort, 2-D batch:           {shared_time * 1000:10.1f} ms  ({reference_time / shared_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,65 @@
+# benchmarks/http_client.py
+"""
+Measures upstream requests per second against the local MapBiomas stub:
+
+- baseline: the previous implementation, a blocking `requests.get` per call
+  (new TCP connection each time), called from a thread pool like sync endpoints;
+- pooled: the async keep-alive client of services.api_HTTPException.
+
+The stub is plain HTTP on localhost, so the TLS handshakes saved by keep-alive
+against the real upstream are not part of this measurement.
+
+Run from the repository root:
+    python -m benchmarks.http_client [requests] [concurrency]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.mapbiomas_stub import MapBiomasStub, StubConfig
+from services import api_HTTPException
+from services.api_HTTPException import fetch_external_api_data, close_http_client
+
+
+def _baseline_fetch(url: str):
+    response = requests.get(url, headers=api_HTTPException._HEADERS, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def run_baseline(urls: list[str], concurrency: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_baseline_fetch, urls))
+    return len(urls) / (time.perf_counter() - started)
+
+
+async def run_pooled(urls: list[str], concurrency: int) -> float:
+    api_HTTPException.HTTP_PER_HOST_CONCURRENCY = concurrency
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch_external_api_data(url) for url in urls))
+    elapsed = time.perf_counter() - started
+    await close_http_client()
+    return len(urls) / elapsed
+
+
+def main(total: int = 2000, concurrency: int = 10):
+    with MapBiomasStub(StubConfig(years=5)) as stub:
+        urls = [f"{stub.base_url}/territories/search/{i % 500}" for i in range(total)]
+        # Warm-up
+        run_baseline(urls[:50], concurrency)
+
+        baseline = run_baseline(urls, concurrency)
+        pooled = asyncio.run(run_pooled(urls, concurrency))
+
+    print(f"requests: {total}, concurrency: {concurrency}")
+    print(f"baseline (requests.get, no session): {baseline:8.0f} req/s")
+    print(f"pooled async client (keep-alive):    {pooled:8.0f} req/s")
+    print(f"speed-up: {pooled / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,312 @@
+# benchmarks/load.py
+"""
+Drives the FastAPI application under load against the local MapBiomas stub and
+records throughput, latency percentiles and memory, so runs can be compared.
+
+Scenarios:
+- cold_miss: GET /data/raw for N territories never seen before (upstream fetch,
+  name lookup, parsing, caching and serialization);
+- warm_hit: the same requests again, answered from the cache;
+- same_key: bursts of concurrent requests for one new key each (single-flight:
+  one upstream call per burst);
+- batch_stats: POST /data/all/statistics/calculation/batch over the cached
+  territories, with the statistics memo cleared before each call.
+
+The stub runs in its own process; the application runs in this process, behind an
+in-memory ASGI transport (no sockets, so latencies exclude the HTTP server).
+Memory is the resident set (current and peak) of this process, of the statistics
+worker processes and of the stub.
+
+Results are written as JSON (benchmarks/results/load-<timestamp>.json by default).
+
+Run from the repository root:
+    python -m benchmarks.load [--territories N] [--years N] [--latency S] [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+# --- Stub process --- #
+
+def start_stub(years: int, territories: int, latency: float) -> tuple:
+    """
+    Starts benchmarks.mapbiomas_stub on a free port and returns (process, base URL).
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mapbiomas_stub", "0", str(years), str(territories), str(latency)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    if not line:
+        process.kill()
+        raise RuntimeError("the MapBiomas stub exited before listening")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+
+def stub_requests(base_url: str) -> int:
+    """
+    Number of upstream requests the stub has served so far.
+    """
+    import httpx
+
+    return httpx.get(base_url.removesuffix("/api") + "/_stats").json()["requests"]
+
+
+# --- Memory --- #
+
+def _process_memory(pid: int) -> Optional[dict]:
+    # Resident set size and its peak, in MiB, from /proc (Linux)
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+    except OSError:
+        return None
+    return {
+        "rss_mib": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+        "peak_rss_mib": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+    }
+
+
+def memory_report(stub_pid: int) -> dict:
+    """
+    Memory of the application process, of each statistics worker and of the stub.
+    """
+    from services import worker_pool
+
+    app = _process_memory(os.getpid())
+    if app is None:
+        # No /proc: peak only (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        app = {"peak_rss_mib": round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)}
+
+    executor = worker_pool._executor
+    workers = list(getattr(executor, "_processes", None) or {}) if executor is not None else []
+    return {
+        "app": app,
+        "workers": [memory for memory in map(_process_memory, workers) if memory is not None],
+        "stub": _process_memory(stub_pid),
+    }
+
+
+# --- Load generation --- #
+
+def _summary(latencies: List[float], errors: int, elapsed: float, upstream_calls: int) -> dict:
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if values.size else (0.0, 0.0, 0.0)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3) if values.size else 0.0,
+        "upstream_calls": upstream_calls,
+    }
+
+
+async def run_scenario(calls: List[Callable[[], Awaitable]], concurrency: int,
+                       upstream: Callable[[], int]) -> dict:
+    """
+    Runs the calls with at most `concurrency` in flight and summarizes their latencies.
+    Each call returns an httpx response; a status code of 400 or more counts as an error.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def timed(call):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await call()
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    upstream_before = await asyncio.to_thread(upstream)
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    upstream_after = await asyncio.to_thread(upstream)
+    return _summary(latencies, errors, elapsed, upstream_after - upstream_before)
+
+
+async def run_benchmark(app, base_url: str, stub_pid: int, config: dict) -> tuple:
+    """
+    Runs every scenario against the application, in order (each builds on the cache
+    filled by the previous ones), then reads the memory while the worker pool is alive.
+
+    Returns:
+        (results by scenario name, memory report)
+    """
+    import httpx
+
+    from services.statistics import clear_statistics_memo
+
+    territories, concurrency = config["territories"], config["concurrency"]
+    codes = [str(code) for code in range(territories)]
+    upstream = lambda: stub_requests(base_url)
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://firemetrics", timeout=120) as client:
+        def raw(code: str):
+            return lambda: client.get(f"/data/raw/municipality/{code}/biome")
+
+        results["cold_miss"] = await run_scenario([raw(code) for code in codes], concurrency, upstream)
+        results["warm_hit"] = await run_scenario(
+            [raw(code) for _ in range(config["warm_rounds"]) for code in codes], concurrency, upstream
+        )
+
+        # A fresh key per burst, every request of the burst in flight at once
+        results["same_key"] = _merge([
+            await run_scenario([raw(f"burst-{burst}")] * config["burst_size"], config["burst_size"], upstream)
+            for burst in range(config["bursts"])
+        ])
+
+        batch = [{"local_type": "municipality", "local_code": code, "grouping": "biome"}
+                 for code in codes[:config["batch_size"]]]
+
+        async def batch_call():
+            clear_statistics_memo()
+            return await client.post("/data/all/statistics/calculation/batch",
+                                     json={"interval": "monthly", "territories": batch})
+
+        results["batch_stats"] = await run_scenario([batch_call] * config["batch_rounds"], 1, upstream)
+        results["batch_stats"]["territories_per_call"] = len(batch)
+
+        memory = memory_report(stub_pid)
+
+    return results, memory
+
+
+def _merge(summaries: List[dict]) -> dict:
+    # Combines per-burst summaries: totals are summed, latencies are the worst burst's
+    merged = {key: sum(summary[key] for summary in summaries)
+              for key in ("requests", "errors", "seconds", "upstream_calls")}
+    merged["seconds"] = round(merged["seconds"], 4)
+    merged["throughput_rps"] = round(merged["requests"] / merged["seconds"], 1) if merged["seconds"] else 0.0
+    for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        merged[key] = max(summary[key] for summary in summaries)
+    merged["bursts"] = len(summaries)
+    return merged
+
+
+# --- Reporting --- #
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, previous: Optional[dict] = None):
+    """
+    Prints one line per scenario, with the change against a previous run when given.
+    """
+    print(f"commit {report['commit']}, python {report['python']}, config {report['config']}")
+    for name, result in report["scenarios"].items():
+        line = (f"{name:12s} {result['requests']:6d} req  {result['throughput_rps']:9.1f} req/s  "
+                f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  "
+                f"errors {result['errors']}  upstream {result['upstream_calls']}")
+        old = (previous or {}).get("scenarios", {}).get(name)
+        if old:
+            line += "  |" + "".join(
+                f"  {key} {(result[key] - old[key]) / old[key] * 100:+.1f}%"
+                for key in ("throughput_rps", "p50_ms", "p99_ms") if old[key]
+            )
+        print(line)
+    memory = report["memory"]
+    print(f"memory (MiB): app {memory['app']}, workers {memory['workers']}, stub {memory['stub']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--territories", type=int, default=500)
+    parser.add_argument("--years", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub delay per response, in seconds")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warm-rounds", type=int, default=5)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--batch-rounds", type=int, default=10)
+    parser.add_argument("--disk-cache", action="store_true", help="keep the SQLite tier on (in a temporary file)")
+    parser.add_argument("--output", help="JSON results path")
+    parser.add_argument("--compare", help="previous JSON results to compare with")
+    args = parser.parse_args()
+
+    config = {
+        "territories": args.territories, "years": args.years, "latency": args.latency,
+        "concurrency": args.concurrency, "warm_rounds": args.warm_rounds, "bursts": args.bursts,
+        "burst_size": args.burst_size, "batch_size": min(args.batch_size, args.territories),
+        "batch_rounds": args.batch_rounds, "disk_cache": args.disk_cache,
+    }
+
+    stub, base_url = start_stub(args.years, args.territories, args.latency)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # Step 1. Point the application to the stub and isolate its caches, before importing it
+            os.environ["FIREMETRICS_MAPBIOMAS_API_URL"] = base_url
+            os.environ["FIREMETRICS_DISK_CACHE_PATH"] = os.path.join(directory, "cache.sqlite3") if args.disk_cache else ""
+            os.environ["FIREMETRICS_TERRITORY_SNAPSHOT"] = os.path.join(directory, "territories.json")
+            # No outbound calls: the stub has no IBGE lists, so names keep coming from its search
+            os.environ["FIREMETRICS_IBGE_API_URL"] = f"{base_url}/ibge"
+            os.environ["FIREMETRICS_CACHE_SNAPSHOT"] = ""
+            os.environ["FIREMETRICS_WARM_KEYS"] = ""
+            os.environ["FIREMETRICS_WARM_PARENTS"] = ""
+            # The stub is local: no outbound rate limit unless asked for
+            os.environ.setdefault("FIREMETRICS_HTTP_RATE_LIMIT", "0")
+            from main import app
+
+            # Step 2. Run the scenarios
+            scenarios, memory = asyncio.run(run_benchmark(app, base_url, stub.pid, config))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "scenarios": scenarios,
+        "memory": memory,
+    }
+
+    # Step 3. Store the results and compare them with a previous run
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+    print_report(report, previous)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# benchmarks/mapbiomas_stub.py
+"""
+Local stand-in for the MapBiomas Fogo API, used by the benchmarks.
+
+Serves synthetic data on the same paths as plataforma.monitorfogo.mapbiomas.org/api:
+- /api/territories/search/{term}
+- /api/territories/{type}/{code}/groupings
+- /api/statistics/time-series/{type}/{code}/{grouping}
+and the number of requests served at /_stats.
+
+Run standalone from the repository root (port 0 picks a free port):
+    python -m benchmarks.mapbiomas_stub [port] [years] [territories] [latency]
+
+and point the application to it:
+    FIREMETRICS_MAPBIOMAS_API_URL=http://127.0.0.1:8001/api uvicorn main:app
+"""
+import json
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+_GROUPINGS = {
+    "biome": {"pt": "Bioma", "es": "Bioma", "en": "Biome"},
+    "state": {"pt": "Estado", "es": "Estado", "en": "State"},
+    "municipality": {"pt": "Município", "es": "Municipio", "en": "Municipality"},
+}
+
+
+class StubConfig:
+    """
+    Shape of the synthetic data and behaviour of the stub.
+
+    Args:
+        years: Length of each time series, in years (ending in 2024).
+        territories: Number of municipalities returned by the search endpoint.
+        latency: Artificial delay added to every response, in seconds.
+    """
+
+    def __init__(self, years: int = 40, territories: int = 5000, latency: float = 0.0):
+        self.years = years
+        self.territories = territories
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+def time_series_payload(local_code: str, years: int) -> dict:
+    """
+    Builds a deterministic synthetic time series for a territory code.
+    """
+    rng = np.random.default_rng(zlib.crc32(local_code.encode()))
+    first_year = 2024 - years + 1
+    monthly_area = rng.gamma(0.6, 400.0, size=years * 12).round(2)
+    monthly = [
+        {"year": first_year + i // 12, "month": i % 12 + 1, "areaHa": area}
+        for i, area in enumerate(monthly_area.tolist())
+    ]
+    annual = [
+        {"year": first_year + y, "areaHa": round(float(total), 2)}
+        for y, total in enumerate(monthly_area.reshape(years, 12).sum(axis=1).tolist())
+    ]
+    return {"annual": annual, "monthly": monthly}
+
+
+def territories_payload(term: str, territories: int) -> list:
+    """
+    Returns the synthetic territories matching a search term (name prefix or code).
+    """
+    term = term.strip().lower()
+    if term.isdigit():
+        code = int(term)
+        return [
+            {"name": f"Municipality {code}", "code": code, "type": "municipality", "uf": "RJ"},
+            {"name": f"State {code}", "code": code, "type": "state", "uf": None},
+        ]
+    return [
+        {"name": f"Municipality {code}", "code": code, "type": "municipality", "uf": "RJ"}
+        for code in range(territories)
+        if f"municipality {code}".startswith(term)
+    ][:50]
+
+
+def _make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; without this, keep-alive
+        # connections stall on Nagle's algorithm and delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == "/_stats":
+                # Upstream calls served so far (not counted itself), read by the load benchmark
+                return self._send(200, json.dumps({"requests": config.requests}).encode())
+
+            config.count()
+            if config.latency:
+                time.sleep(config.latency)
+
+            parts = [unquote(part) for part in urlsplit(self.path).path.strip("/").split("/")]
+            body: Optional[object] = None
+            if parts[:3] == ["api", "territories", "search"] and len(parts) == 4:
+                body = territories_payload(parts[3], config.territories)
+            elif parts[:2] == ["api", "territories"] and len(parts) == 5 and parts[4] == "groupings":
+                body = _GROUPINGS
+            elif parts[:3] == ["api", "statistics", "time-series"] and len(parts) == 6:
+                body = time_series_payload(f"{parts[3]}-{parts[4]}-{parts[5]}", config.years)
+
+            data = json.dumps(body).encode() if body is not None else b'{"detail": "Not Found"}'
+            self._send(200 if body is not None else 404, data)
+
+        def _send(self, status: int, data: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class MapBiomasStub:
+    """
+    Runs the stub server on a background thread.
+
+    Usage:
+        with MapBiomasStub(StubConfig(years=40)) as stub:
+            base_url = stub.base_url   # e.g. "http://127.0.0.1:54321/api"
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, port: int = 0):
+        self.config = config or StubConfig()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self.config))
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def __enter__(self) -> "MapBiomasStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(port: int = 8001, years: int = 40, territories: int = 5000, latency: float = 0.0):
+    config = StubConfig(years=years, territories=territories, latency=latency)
+    with MapBiomasStub(config, port=port) as stub:
+        # The load benchmark reads the URL from this line
+        print(f"MapBiomas stub listening on {stub.base_url}", flush=True)
+        threading.Event().wait()
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:5]
+    main(*(cast(value) for cast, value in zip((int, int, int, float), arguments)))
@@ -0,0 +1,75 @@
+# benchmarks/serialization.py
+"""
+Serialization cost per request of /data/all/statistics for one 40-year monthly series:
+the FastAPI path (build CachedData, validate it against the response model, encode it
+to JSON, optionally gzip it) against sending the bytes pre-serialized at cache write time.
+
+Run from the repository root:
+    python -m benchmarks.serialization [years] [requests]
+"""
+import gzip
+import json
+import sys
+import time
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks.mapbiomas_stub import time_series_payload
+from data import cache_manager
+from data.encoded_body import brotli, orjson
+from data.pydantic_models import CachedData
+from services.statistics import run_statistics
+
+
+def _per_request(func, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        func()
+    return (time.perf_counter() - started) / requests
+
+
+def main(years: int = 40, requests: int = 200):
+    cache_manager.configure_disk_cache(None)
+    payload = time_series_payload("3550308", years)
+    payload["local_name"] = "São Paulo"
+    entry = cache_manager.set_raw_data_to_cache("municipality", "3550308", "biome", payload)
+    for interval in ("annual", "monthly"):
+        run_statistics("municipality", "3550308", "biome", interval)
+
+    adapter = TypeAdapter(CachedData)
+
+    def fastapi_path() -> bytes:
+        # What serialize_response + JSONResponse do for a response_model endpoint
+        content = adapter.dump_python(adapter.validate_python(entry.to_cached_data()), mode="json")
+        return JSONResponse(content).body
+
+    def fastapi_path_gzip() -> bytes:
+        return gzip.compress(fastapi_path(), compresslevel=6)
+
+    def pre_serialized(accept_encoding: str) -> bytes:
+        return entry.body("cached").choose(accept_encoding)[0]
+
+    # Same document either way
+    assert json.loads(fastapi_path()) == json.loads(entry.body("cached").identity)
+
+    write_cost = _per_request(lambda: entry.encode_bodies(("cached",)), max(1, requests // 10))
+    timings = {
+        "fastapi (json)": _per_request(fastapi_path, requests),
+        "fastapi (json + gzip)": _per_request(fastapi_path_gzip, requests),
+        "pre-serialized (identity)": _per_request(lambda: pre_serialized("identity"), requests),
+        "pre-serialized (gzip)": _per_request(lambda: pre_serialized("gzip"), requests),
+    }
+
+    body = entry.body("cached")
+    print(f"series: {years} years ({years * 12} monthly points), encoder: {'orjson' if orjson else 'json'}, "
+          f"brotli: {'yes' if brotli else 'not installed'}")
+    print(f"body sizes: identity {len(body.identity)} B, gzip {len(body.gzip or b'')} B, br {len(body.br or b'')} B")
+    for name, seconds in timings.items():
+        print(f"{name:28s} {seconds * 1e6:10.1f} µs/request")
+    print(f"{'write-time encoding (once)':28s} {write_cost * 1e6:10.1f} µs/write")
+    print(f"speed-up (json): {timings['fastapi (json)'] / timings['pre-serialized (identity)']:.0f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
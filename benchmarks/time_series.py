@@ -0,0 +1,123 @@
+# benchmarks/time_series.py
+"""
+Times the vectorized TimeSeriesStats kernels against straightforward reference
+implementations (Python loops, numpy.polyfit) on 40 years × N groupings,
+one series at a time and as a single 2-D batch.
+Their correctness is checked by tests/test_time_series_analysis.py.
+
+Run from the repository root:
+    python -m benchmarks.time_series [groupings] [years]
+"""
+import sys
+import time
+
+import numpy as np
+
+from statistics_math.time_series_analysis import (
+    ROLLING_WINDOW,
+    calculate_linear_trend,
+    calculate_rolling_mean,
+    calculate_seasonal_index,
+    calculate_yearly_growth_rate,
+    compare_to_historical_average,
+    growth_rate_matrix,
+    historical_comparison_matrix,
+    linear_trend_matrix,
+    rolling_mean_matrix,
+    seasonal_index_matrix,
+)
+
+FUNCTIONS = (
+    calculate_yearly_growth_rate,
+    calculate_linear_trend,
+    calculate_seasonal_index,
+    calculate_rolling_mean,
+    compare_to_historical_average,
+)
+
+
+def reference_time_series(values: list[float], months: list[int], mode: str) -> dict:
+    n = len(values)
+    growth = None
+    if mode == "annual":
+        growth = [
+            None if values[i - 1] == 0 else (values[i] - values[i - 1]) / values[i - 1] * 100
+            for i in range(1, n)
+        ]
+
+    slope = float(np.polyfit(np.arange(n), values, 1)[0]) if n >= 2 else None
+
+    seasonal = None
+    if mode == "monthly":
+        by_month: dict[int, list[float]] = {}
+        for month, value in zip(months, values):
+            by_month.setdefault(month, []).append(value)
+        means = {month: sum(items) / len(items) for month, items in by_month.items()}
+        overall = sum(means.values()) / len(means)
+        seasonal = {str(month): (mean / overall if overall else 0.0) for month, mean in sorted(means.items())}
+
+    window = ROLLING_WINDOW[mode]
+    rolling = [sum(values[i:i + window]) / window for i in range(n - window + 1)]
+
+    mean = sum(values) / n
+    comparison = [(value - mean) / mean * 100 if mean else 0.0 for value in values]
+
+    return {
+        "calculate_yearly_growth_rate": growth,
+        "calculate_linear_trend": slope,
+        "calculate_seasonal_index": seasonal,
+        "calculate_rolling_mean": rolling,
+        "compare_to_historical_average": comparison,
+    }
+
+
+def main(groupings: int = 1000, years: int = 40):
+    rng = np.random.default_rng(11)
+    monthly = rng.gamma(0.6, 400.0, size=(groupings, years * 12))
+    monthly[rng.random(monthly.shape) < 0.2] = 0.0
+    annual = monthly.reshape(groupings, years, 12).sum(axis=2)
+    annual[:, 5] = 0.0  # a year without fire: undefined growth for the next one
+    months = np.tile(np.arange(1, 13, dtype=np.int8), years)
+
+    series = {"annual": (annual, None), "monthly": (monthly, months)}
+
+    # Timing
+    for mode, (matrix, mode_months) in series.items():
+        rows = matrix.tolist()
+        month_list = months.tolist() if mode == "monthly" else []
+
+        started = time.perf_counter()
+        for row in rows:
+            reference_time_series(row, month_list, mode)
+        reference_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for row in matrix:
+            for func in FUNCTIONS:
+                func(row, mode_months, mode)
+        single_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for func in FUNCTIONS:
+            func(matrix, mode_months, mode)
+        batch_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if mode == "annual":
+            growth_rate_matrix(matrix)
+        else:
+            seasonal_index_matrix(matrix, mode_months)
+        linear_trend_matrix(matrix)
+        rolling_mean_matrix(matrix, ROLLING_WINDOW[mode])
+        historical_comparison_matrix(matrix)
+        kernel_time = time.perf_counter() - started
+
+        print(f"{mode}: {groupings} series × {matrix.shape[1]} points")
+        print(f"  reference (python loops):   {reference_time * 1000:10.1f} ms")
+        print(f"  vectorized, one series:     {single_time * 1000:10.1f} ms  ({reference_time / single_time:.0f}x)")
+        print(f"  vectorized, 2-D batch:      {batch_time * 1000:10.1f} ms  ({reference_time / batch_time:.0f}x)")
+        print(f"  kernels only (no lists):    {kernel_time * 1000:10.1f} ms  ({reference_time / kernel_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
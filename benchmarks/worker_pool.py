@@ -0,0 +1,64 @@
+# benchmarks/worker_pool.py
+"""
+Times the statistics functions run inline against the same call dispatched to the
+shared-memory process pool, for monthly batches of N series × 40 years × 12 months.
+
+Two costs are measured: the wall time of the call, and the CPU time spent in the
+serving process (the part that holds its GIL and competes with other requests).
+The smallest size (in points) where dispatching costs the serving process less CPU
+than computing inline is the value to use for FIREMETRICS_STATS_INLINE_THRESHOLD.
+
+Run from the repository root:
+    python -m benchmarks.worker_pool [years] [rounds]
+"""
+import sys
+import time
+
+import numpy as np
+
+from services import worker_pool
+from services.statistics import _RESULT_FIELDS, _SECTION_FUNCTIONS
+
+BATCH_ROWS = (1, 4, 16, 64, 256, 1024, 4096)
+
+
+def _best_times(call, rounds: int) -> tuple[float, float]:
+    # Best wall time and best CPU time of this process over the rounds
+    wall = cpu = float("inf")
+    for _ in range(rounds):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        call()
+        wall = min(wall, time.perf_counter() - started)
+        cpu = min(cpu, time.process_time() - started_cpu)
+    return wall, cpu
+
+
+def main(years: int = 40, rounds: int = 5):
+    functions = [*_RESULT_FIELDS, *_SECTION_FUNCTIONS]
+    months = np.tile(np.arange(1, 13, dtype=np.int8), years)
+    rng = np.random.default_rng(17)
+
+    worker_pool.start_worker_pool()
+    try:
+        crossover = None
+        print(f"{worker_pool.STATS_WORKERS} workers, {years * 12} points per series")
+        for rows in BATCH_ROWS:
+            matrix = rng.gamma(0.6, 400.0, size=(rows, years * 12))
+            values = matrix[0] if rows == 1 else matrix
+
+            worker_pool._run_on_pool(functions, values, months, "monthly")  # warm the workers up
+            inline, inline_cpu = _best_times(lambda: [func(values, months, "monthly") for func in functions], rounds)
+            pooled, pooled_cpu = _best_times(lambda: worker_pool._run_on_pool(functions, values, months, "monthly"), rounds)
+            if crossover is None and pooled_cpu < inline_cpu:
+                crossover = values.size
+
+            print(f"  {rows:5d} series ({values.size:8d} points): "
+                  f"inline {inline * 1000:8.2f} ms ({inline_cpu * 1000:8.2f} ms CPU), "
+                  f"pool {pooled * 1000:8.2f} ms ({pooled_cpu * 1000:8.2f} ms CPU in this process)")
+        print(f"pool cheaper for the serving process from: {crossover if crossover is not None else 'never'} points")
+    finally:
+        worker_pool.shutdown_worker_pool()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,239 @@
+# data/cache_engine.py
+
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Callable, Generic, Iterator, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def is_fresh(last_updated: date, ttl: timedelta, today: Optional[date] = None) -> bool:
+    """
+    Single freshness rule for cached data: an item is fresh while its age is below the TTL.
+    """
+    return ((today or date.today()) - last_updated) < ttl
+
+
+class _Slot(Generic[V]):
+    """
+    Internal holder for a cached value and its bookkeeping.
+    """
+    __slots__ = ("value", "nbytes", "last_updated")
+
+    def __init__(self, value: V, nbytes: int, last_updated: date):
+        self.value = value
+        self.nbytes = nbytes
+        self.last_updated = last_updated
+
+
+class CacheEngine(Generic[V]):
+    """
+    Bounded in-memory cache with LRU eviction and active TTL expiry.
+
+    - Entries are kept in least-recently-used order; once the entry count or the
+      estimated byte size goes over its cap, the oldest entries are evicted.
+    - Expired entries stay available to `get_stale` during the max-stale window,
+      then are removed by `sweep`, which runs periodically on a background
+      thread once `start_sweeper` is called.
+    - Hit, miss, eviction and expiration counters are exposed by `stats`.
+
+    Args:
+        max_entries: Maximum number of entries kept in memory.
+        max_bytes: Maximum estimated size in bytes of all entries.
+        ttl: Time-to-live of an entry, measured from its `last_updated` date.
+        max_stale: How long after expiry an entry can still be served as stale.
+        sweep_interval: Seconds between two background expiry sweeps.
+        on_sweep: Optional callback run after each background sweep
+                  (e.g. to trim a persistent tier).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: timedelta, sweep_interval: float = 3600.0,
+                 on_sweep: Optional[Callable[[], Any]] = None, max_stale: timedelta = timedelta(0)):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.sweep_interval = sweep_interval
+        self.on_sweep = on_sweep
+
+        self._entries: "OrderedDict[str, _Slot[V]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # --- Read / write --- #
+
+    def get(self, key: str) -> Optional[V]:
+        """
+        Returns the value for `key` if present and fresh, otherwise None.
+        Counts a hit or a miss and marks the entry as recently used.
+        """
+        with self._lock:
+            slot = self._entries.get(key)
+            if slot is None or not is_fresh(slot.last_updated, self.ttl):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return slot.value
+
+    def get_stale(self, key: str) -> Optional[V]:
+        """
+        Returns the value for `key` if it expired less than `max_stale` ago, otherwise None.
+        Counts a stale hit and marks the entry as recently used.
+        """
+        with self._lock:
+            slot = self._entries.get(key)
+            if slot is None or not is_fresh(slot.last_updated, self.ttl + self.max_stale):
+                return None
+
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return slot.value
+
+    def peek(self, key: str) -> Optional[V]:
+        """
+        Returns the value for `key` even if expired, without touching counters or LRU order.
+        """
+        with self._lock:
+            slot = self._entries.get(key)
+            return slot.value if slot is not None else None
+
+    def set(self, key: str, value: V, nbytes: int, last_updated: date):
+        """
+        Stores `value` under `key` and evicts least-recently-used entries if over capacity.
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+
+            self._entries[key] = _Slot(value, nbytes, last_updated)
+            self._bytes += nbytes
+            self._evict_over_capacity()
+
+    def resize(self, key: str, nbytes: int):
+        """
+        Updates the estimated size of an entry (e.g. after statistics were attached to it).
+        """
+        with self._lock:
+            slot = self._entries.get(key)
+            if slot is None:
+                return
+            self._bytes += nbytes - slot.nbytes
+            slot.nbytes = nbytes
+            self._evict_over_capacity()
+
+    def delete(self, key: str) -> bool:
+        """
+        Removes `key` from the cache. Returns True if it was present.
+        """
+        with self._lock:
+            slot = self._entries.pop(key, None)
+            if slot is None:
+                return False
+            self._bytes -= slot.nbytes
+            return True
+
+    def clear(self):
+        """
+        Removes every entry (counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def items(self) -> Iterator[Tuple[str, V]]:
+        """
+        Iterates over a snapshot of (key, value) pairs, including expired ones.
+        """
+        with self._lock:
+            snapshot = [(key, slot.value) for key, slot in self._entries.items()]
+        return iter(snapshot)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _evict_over_capacity(self):
+        # The caller holds the lock. Always keep at least the newest entry.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _key, slot = self._entries.popitem(last=False)
+            self._bytes -= slot.nbytes
+            self.evictions += 1
+
+    # --- Expiry --- #
+
+    def sweep(self, today: Optional[date] = None) -> int:
+        """
+        Removes every entry past its TTL and max-stale window. Returns the number of removed entries.
+        """
+        today = today or date.today()
+        retention = self.ttl + self.max_stale
+        with self._lock:
+            expired = [
+                key for key, slot in self._entries.items()
+                if not is_fresh(slot.last_updated, retention, today)
+            ]
+            for key in expired:
+                self._bytes -= self._entries.pop(key).nbytes
+            self.expirations += len(expired)
+        return len(expired)
+
+    def start_sweeper(self):
+        """
+        Starts the background thread that periodically removes expired entries.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """
+        Stops the background sweep thread.
+        """
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def _sweep_loop(self):
+        while not self._stop_event.wait(self.sweep_interval):
+            self.sweep()
+            if self.on_sweep is not None:
+                self.on_sweep()
+
+    # --- Monitoring --- #
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the cache counters and current size.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
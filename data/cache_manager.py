@@ -1,47 +1,278 @@
 # data/cache_manager.py
 
-from datetime import date, timedelta
-from typing import Optional, List
+import os
+import threading
+import time
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
 
-# Import the cache data model from the pydantic_models file
-from data.pydantic_models import CachedData, AnnualData, MonthlyData
+import numpy as np
 
-# A dictionary to store the cached data
-_cache_store: dict[str, CachedData] = {}
+# Import the columnar series used as the cache entry
+from data.fire_series import FireSeries, series_from_payload
+from data.cache_engine import CacheEngine, is_fresh
+from data.disk_cache import DiskCache
+from data.pydantic_models import Statistics
+from statistics_math.incremental import carry_over_statistics
 
+# Cache limits, configurable through environment variables
+CACHE_TTL = timedelta(days=int(os.getenv("FIREMETRICS_CACHE_TTL_DAYS", "30")))
+# How long after expiry an entry may still be served while it is refreshed in the background
+CACHE_MAX_STALE = timedelta(days=int(os.getenv("FIREMETRICS_CACHE_MAX_STALE_DAYS", "7")))
+CACHE_MAX_ENTRIES = int(os.getenv("FIREMETRICS_CACHE_MAX_ENTRIES", "100000"))
+CACHE_MAX_BYTES = int(os.getenv("FIREMETRICS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_SWEEP_INTERVAL = float(os.getenv("FIREMETRICS_CACHE_SWEEP_SECONDS", "3600"))
 
-def set_raw_data_to_cache(local_type: str, local_id: str, grouping: str, data: dict):
+# Persistent tier shared by restarts and worker processes (set the path to "" to disable it)
+DISK_CACHE_PATH = os.getenv("FIREMETRICS_DISK_CACHE_PATH", os.path.join(".cache", "firemetrics.sqlite3"))
+# Maximum number of rows of the persistent tier; only this size limit removes them, never their age
+DISK_CACHE_MAX_ENTRIES = int(os.getenv("FIREMETRICS_DISK_CACHE_MAX_ENTRIES", "1000000"))
+
+# Rough per-entry overhead (object, key, metadata strings) added to the array sizes
+_ENTRY_OVERHEAD_BYTES = 1024
+# Rough size of the statistics per series point (the time series lists hold Python floats)
+_STATISTICS_BYTES_PER_POINT = 96
+
+# Serialize the writes to an entry (statistics of both intervals, refreshes); striped so the
+# number of locks stays bounded whatever the number of keys
+_ENTRY_LOCK_STRIPES = 64
+_entry_locks = [threading.RLock() for _ in range(_ENTRY_LOCK_STRIPES)]
+
+# The disk tier is created lazily on first access (see _get_disk_cache)
+_disk_cache: Optional[DiskCache] = None
+
+
+def configure_disk_cache(path: Optional[str]):
+    """
+    Points the persistent tier to another SQLite file (e.g. a temporary directory in tests).
+    Passing None or "" disables the disk tier.
+    """
+    global _disk_cache, DISK_CACHE_PATH
+    if _disk_cache is not None:
+        _disk_cache.close()
+    _disk_cache = None
+    DISK_CACHE_PATH = path or ""
+
+
+def _get_disk_cache() -> Optional[DiskCache]:
+    global _disk_cache
+    if _disk_cache is None and DISK_CACHE_PATH:
+        _disk_cache = DiskCache(DISK_CACHE_PATH)
+    return _disk_cache
+
+
+def _trim_disk_cache():
+    # The disk tier keeps the last good value of each key whatever its age (served when
+    # the upstream fails), so it is only trimmed when it outgrows its size limit
+    disk_cache = _get_disk_cache()
+    if disk_cache:
+        disk_cache.trim(DISK_CACHE_MAX_ENTRIES)
+
+
+# The bounded in-memory cache holding the data
+_cache_store: CacheEngine[FireSeries] = CacheEngine(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl=CACHE_TTL,
+    sweep_interval=CACHE_SWEEP_INTERVAL,
+    on_sweep=_trim_disk_cache,
+    max_stale=CACHE_MAX_STALE,
+)
+
+
+def _cache_key(local_type: str, local_id: str, grouping: str) -> str:
+    return f"{local_type}-{local_id}-{grouping}"
+
+
+def _entry_lock(cache_key: str) -> threading.RLock:
+    return _entry_locks[hash(cache_key) % _ENTRY_LOCK_STRIPES]
+
+
+def _estimate_size(entry: FireSeries) -> int:
+    size = entry.nbytes + entry.body_nbytes + _ENTRY_OVERHEAD_BYTES
+    if entry.statistic:
+        size += _STATISTICS_BYTES_PER_POINT * (entry.annual_area.size + entry.monthly_area.size)
+    return size
+
+
+def is_entry_fresh(entry: FireSeries) -> bool:
+    """
+    Returns True if the entry is younger than the cache TTL (30 days by default).
+    """
+    return is_fresh(entry.last_updated, CACHE_TTL)
+
+
+def set_raw_data_to_cache(local_type: str, local_id: str, grouping: str, data: dict) -> FireSeries:
     """
     Stores data in the cache using a compound key of type, ID, and grouping.
-    The data is stored as a Pydantic model for validation and consistency.
+    The series are stored as contiguous NumPy arrays (see FireSeries) to keep
+    the memory footprint small; Pydantic models are only built when responding.
+
+    When an entry is refreshed, its statistics are carried over: kept if the series
+    did not change, updated incrementally if new periods were only appended, and
+    dropped (for a full recompute) if historical values changed.
+    Returns the stored entry.
     """
-    cache_key = f"{local_type}-{local_id}-{grouping}"
-    _cache_store[cache_key] = CachedData(
-        local_name=data.get("local_name"),
-        local_id=local_id,
-        local_type=local_type,
-        grouping=grouping,
-        annual=data.get("annual", []),
-        monthly=data.get("monthly", []),
-        last_updated=date.today()
-    )
+    return set_series_to_cache(series_from_payload(local_type, local_id, grouping, data))
+
+
+def set_series_to_cache(entry: FireSeries) -> FireSeries:
+    """
+    Stores an already columnar series (e.g. an aggregated region) under its own key,
+    carrying the statistics over like `set_raw_data_to_cache`. Returns the stored entry.
+    """
+    cache_key = _cache_key(entry.local_type, entry.local_id, entry.grouping)
+
+    with _entry_lock(cache_key):
+        previous = show_all_data(entry.local_type, entry.local_id, entry.grouping)
+        if previous and previous.statistic:
+            entry.statistic, entry.aggregates = carry_over_statistics(previous, entry)
+        # Last-Modified only moves when the series or its statistics changed
+        entry.update_hashes(time.time(), previous)
+        entry.encode_bodies()
+
+        _cache_store.set(cache_key, entry, _estimate_size(entry), entry.last_updated)
+
+        # Write-through to the persistent tier
+        disk_cache = _get_disk_cache()
+        if disk_cache:
+            disk_cache.save(cache_key, entry)
+
+    return entry
+
+
+def set_statistics_to_cache(source: FireSeries, interval: str, update: Callable[[Any], Any],
+                            aggregates: Optional[Any] = None) -> Optional[FireSeries]:
+    """
+    Attaches the statistics of one interval, computed from `source`, to its cached entry,
+    in memory and on disk.
+
+    `update` receives the interval statistics currently stored and returns the new ones.
+    It runs under the entry's lock, so statistics computed at the same time for the same
+    key (e.g. both intervals) are merged instead of overwriting each other. `aggregates`
+    (the running aggregates of the interval, if any) are copied to the entry.
+
+    Returns the updated entry, or None if the entry is not cached or no longer holds the
+    series of `source` (e.g. a refresh replaced it meanwhile): the results are then dropped.
+    """
+    cache_key = _cache_key(source.local_type, source.local_id, source.grouping)
+    with _entry_lock(cache_key):
+        entry = show_all_data(source.local_type, source.local_id, source.grouping)
+        if not entry or entry.content_hash != source.content_hash:
+            return None
+
+        current = getattr(entry.statistic, interval) if entry.statistic else None
+        interval_stats = update(current)
+        if interval_stats is current:
+            # Already attached (repeat trigger, or a refresh that brought no change): nothing to store
+            return entry
+
+        # The entry gets its own copy: appending periods updates the aggregates in place
+        if aggregates is not None:
+            entry.aggregates[interval] = replace(aggregates)
+        entry.statistic = (entry.statistic or Statistics()).model_copy(update={interval: interval_stats})
+        entry.update_statistic_hash(time.time())
+        entry.encode_bodies(("cached",))
+        _cache_store.resize(cache_key, _estimate_size(entry))
+
+        disk_cache = _get_disk_cache()
+        if disk_cache:
+            disk_cache.save_statistics(cache_key, entry.statistic)
+
+    return entry
+
+
+def _load_from_disk(cache_key: str, max_age: Optional[timedelta] = None) -> Optional[FireSeries]:
+    """
+    Reads an entry from the persistent tier. Returns None if it is not stored,
+    or if it is older than `max_age` (None accepts any age).
+
+    Only entries still within the max-stale window are promoted into memory;
+    older ones are returned without being cached, since the sweeper would drop them.
+    """
+    disk_cache = _get_disk_cache()
+    if not disk_cache:
+        return None
+
+    with _entry_lock(cache_key):
+        # Another thread may have stored the key meanwhile: never replace its entry with a disk copy
+        entry = _cache_store.peek(cache_key)
+        if entry is None:
+            entry = disk_cache.load(cache_key)
+            promote = True
+        else:
+            promote = False
+        if entry is None or (max_age is not None and not is_fresh(entry.last_updated, max_age)):
+            return None
+        if not promote:
+            return entry
+
+        # The write time is not persisted: the start of the data's day is an earlier bound
+        entry.update_hashes(datetime.combine(entry.last_updated, datetime.min.time()).timestamp())
+        if is_fresh(entry.last_updated, CACHE_TTL + CACHE_MAX_STALE):
+            entry.encode_bodies()
+            _cache_store.set(cache_key, entry, _estimate_size(entry), entry.last_updated)
+    return entry
 
 
-def get_raw_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[CachedData]:
+def cached_in_memory(local_type: str, local_id: str, grouping: str) -> bool:
+    """
+    Returns True if the key is in the memory tier (fresh or not): a lookup then never
+    touches the disk tier.
+    """
+    return _cache_key(local_type, local_id, grouping) in _cache_store
+
+
+def get_raw_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[FireSeries]:
     """
     Retrieves data from the cache using a compound key.
+    Looks in memory first, then in the persistent tier.
     Returns the data if it's valid and not expired (30 days), otherwise returns None.
     """
-    cache_key = f"{local_type}-{local_id}-{grouping}"
+    cache_key = _cache_key(local_type, local_id, grouping)
     cached_data = _cache_store.get(cache_key)
-    
-    # Check if data exists and is not older than 30 days
-    if cached_data and (date.today() - cached_data.last_updated) < timedelta(days=30):
+    if cached_data:
         return cached_data
-    
+
+    # Only go to disk when the key is not in memory at all (an expired copy is as old on disk)
+    if cache_key not in _cache_store:
+        return _load_from_disk(cache_key, CACHE_TTL)
+
+    return None
+
+
+def get_stale_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[FireSeries]:
+    """
+    Retrieves data that may have expired, as long as it is within the max-stale window
+    (TTL + CACHE_MAX_STALE). Used to serve a value while it is refreshed in the background.
+    """
+    cache_key = _cache_key(local_type, local_id, grouping)
+    cached_data = _cache_store.get_stale(cache_key)
+    if cached_data:
+        return cached_data
+
+    if cache_key not in _cache_store:
+        return _load_from_disk(cache_key, CACHE_TTL + CACHE_MAX_STALE)
+
     return None
 
 
+def data_age_days(entry: FireSeries) -> int:
+    """
+    Returns the age of the entry's data in days.
+    """
+    return (date.today() - entry.last_updated).days
+
+
+def remaining_ttl_seconds(entry: FireSeries) -> int:
+    """
+    Returns how many seconds the entry stays fresh (0 once it expired).
+    """
+    expires_at = datetime.combine(entry.last_updated + CACHE_TTL, datetime.min.time())
+    return max(0, int((expires_at - datetime.now()).total_seconds()))
+
+
 def cache_has_basic_stats(local_type: str, local_id: str, grouping: str, interval: str) -> bool:
     '''
     Check if basic statistics exist in cache for a given location and interval.
@@ -50,54 +281,108 @@ def cache_has_basic_stats(local_type: str, local_id: str, grouping: str, interva
     Returns True if data exists, otherwise False.
     '''
     cache_data = get_raw_data_from_cache(local_type, local_id, grouping)
-    if not cache_data:
+    if not cache_data or not cache_data.statistic:
         return False
     
     # Dynamically check the field (annual or monthly) without explicit if/else
-    return getattr(cache_data, interval) is not None
+    interval_stats = getattr(cache_data.statistic, interval)
+    return interval_stats is not None and interval_stats.basic is not None
 
 
-def get_annual_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[List[AnnualData]]:
+def get_annual_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
     """
     Retrieves only the annual series data from the cache.
-    Returns a list of AnnualData if the cached data exists and is not expired,
+    Returns the (year, areaHa) arrays if the cached data exists and is not expired,
     otherwise returns None.
     """
-    cache_key = f"{local_type}-{local_id}-{grouping}"
-    cached_data = _cache_store.get(cache_key)
-    
-    # Check if data exists and is not older than 30 days before returning.
-    if cached_data and (date.today() - cached_data.last_updated) < timedelta(days=30):
-        return cached_data.annual
+    cached_data = get_raw_data_from_cache(local_type, local_id, grouping)
+    if cached_data:
+        return cached_data.annual_year, cached_data.annual_area
     
     return None
 
 
-def get_monthly_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[List[MonthlyData]]:
+def get_monthly_data_from_cache(local_type: str, local_id: str, grouping: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
     """
     Retrieves only the monthly series data from the cache.
-    Returns a list of MonthlyData if the cached data exists and is not expired,
+    Returns the (year, month, areaHa) arrays if the cached data exists and is not expired,
     otherwise returns None.
     """
-    cache_key = f"{local_type}-{local_id}-{grouping}"
-    cached_data = _cache_store.get(cache_key)
-    
-    # Check if data exists and is not older than 30 days before returning.
-    if cached_data and (date.today() - cached_data.last_updated) < timedelta(days=30):
-        return cached_data.monthly
+    cached_data = get_raw_data_from_cache(local_type, local_id, grouping)
+    if cached_data:
+        return cached_data.monthly_year, cached_data.monthly_month, cached_data.monthly_area
     
     return None
 
 
-def show_all_data(local_type: str, local_id: str, grouping: str) -> Optional[CachedData]:
+def show_all_data(local_type: str, local_id: str, grouping: str) -> Optional[FireSeries]:
     """
-    Return the full content of a cache item as a Pydantic model,
+    Return the full content of a cache item (raw series and statistics),
     using the same arguments as get_raw_data_from_cache.
     """
-    cache_key = f"{local_type}-{local_id}-{grouping}"
-    cached_data = _cache_store.get(cache_key)
+    cache_key = _cache_key(local_type, local_id, grouping)
+    cached_data = _cache_store.peek(cache_key)
+    if cached_data:
+        return cached_data
 
-    if not cached_data:
-        return None
+    return _load_from_disk(cache_key)
+
+
+def cached_entries() -> Iterator[FireSeries]:
+    """
+    Iterates over a snapshot of the in-memory entries (expired ones included).
+    """
+    return (entry for _, entry in _cache_store.items())
+
+
+def restore_entries(entries: Iterable[FireSeries]) -> int:
+    """
+    Stores entries loaded from a snapshot as they are (series, statistics and date),
+    in memory and on disk. An entry is skipped when the cache (either tier) already holds
+    newer data for its key. Returns the number of restored entries.
+    """
+    disk_cache = _get_disk_cache()
+    restored = 0
+    for entry in entries:
+        cache_key = _cache_key(entry.local_type, entry.local_id, entry.grouping)
+        stored = _cache_store.peek(cache_key)
+        stored_dates = [
+            stored.last_updated if stored else None,
+            disk_cache.last_updated(cache_key) if disk_cache else None,
+        ]
+        if any(stored_date and stored_date > entry.last_updated for stored_date in stored_dates):
+            continue
+        entry.update_hashes(datetime.combine(entry.last_updated, datetime.min.time()).timestamp())
+        entry.encode_bodies()
+        _cache_store.set(cache_key, entry, _estimate_size(entry), entry.last_updated)
+        if disk_cache:
+            disk_cache.save(cache_key, entry)
+        restored += 1
+    return restored
 
-    return cached_data
\ No newline at end of file
+
+def get_cache_stats() -> dict:
+    """
+    Returns the cache counters (hits, misses, evictions, expirations) and its current size.
+    """
+    return _cache_store.stats()
+
+
+def start_cache_maintenance():
+    """
+    Starts the background sweep that removes expired entries from memory
+    (past the max-stale window) and trims the persistent tier to its size limit.
+
+    The sweep always runs. The last good value of a swept key stays available
+    through the persistent tier when it is enabled.
+    """
+    _cache_store.start_sweeper()
+
+
+def stop_cache_maintenance():
+    """
+    Stops the background sweep and closes the persistent tier's connections.
+    """
+    _cache_store.stop_sweeper()
+    if _disk_cache is not None:
+        _disk_cache.close()
@@ -0,0 +1,397 @@
+# data/cache_snapshot.py
+"""
+Columnar snapshots of the cache, as Apache Arrow IPC or Parquet files.
+
+A snapshot is a directory with two tables:
+- series.{arrow,parquet}: one row per cache entry, the annual/monthly arrays as list columns;
+- statistics.{arrow,parquet}: one row per entry and interval, every Statistics field
+  flattened to a "section.field" column (e.g. "basic.median_area_burned").
+
+Command line, from the repository root:
+    python -m data.cache_snapshot export DIRECTORY [--format arrow|parquet]
+    python -m data.cache_snapshot load DIRECTORY
+
+pyarrow is an optional dependency: it is only needed by this module.
+"""
+import argparse
+import logging
+import os
+import tempfile
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union, get_args, get_origin
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+from data import cache_manager
+from data.cache_manager import cached_entries, restore_entries
+from data.disk_cache import DiskCache
+from data.fire_series import AREA_DTYPE, MONTH_DTYPE, YEAR_DTYPE, FireSeries
+from data.pydantic_models import BasicSummaryStats, DescriptiveStats, Statistics, TimeSeriesStats
+
+logger = logging.getLogger(__name__)
+
+# Snapshot loaded into the cache at startup, if set (see load_startup_snapshot)
+CACHE_SNAPSHOT = os.getenv("FIREMETRICS_CACHE_SNAPSHOT", "")
+# Rows of the series table written per record batch (an entry is never split)
+SNAPSHOT_BATCH_ROWS = int(os.getenv("FIREMETRICS_SNAPSHOT_BATCH_ROWS", "65536"))
+# Rows of the statistics table written per record batch
+STATISTICS_BATCH_ROWS = 1024
+
+SNAPSHOT_FORMATS = {"arrow": "application/vnd.apache.arrow.file", "parquet": "application/vnd.apache.parquet"}
+
+_SECTION_MODELS = {"basic": BasicSummaryStats, "descriptive": DescriptiveStats, "time_series": TimeSeriesStats}
+_KEY_COLUMNS = ("local_type", "local_id", "grouping")
+_ARRAY_COLUMNS = {
+    "annual_year": YEAR_DTYPE,
+    "annual_area": AREA_DTYPE,
+    "monthly_year": YEAR_DTYPE,
+    "monthly_month": MONTH_DTYPE,
+    "monthly_area": AREA_DTYPE,
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Cache snapshots need the optional 'pyarrow' package (pip install pyarrow).")
+
+
+# --- Schemas --- #
+
+def _arrow_type(annotation):
+    # Maps the annotation of a statistics field to an Arrow type
+    if get_origin(annotation) is Union:
+        return _arrow_type(next(arg for arg in get_args(annotation) if arg is not type(None)))
+    if get_origin(annotation) is list:
+        return pa.list_(_arrow_type(get_args(annotation)[0]))
+    if get_origin(annotation) is dict:
+        return pa.map_(pa.string(), _arrow_type(get_args(annotation)[1]))
+    return {int: pa.int64(), float: pa.float64(), str: pa.string()}[annotation]
+
+
+def series_schema() -> "pa.Schema":
+    _require_pyarrow()
+    return pa.schema(
+        [(name, pa.string()) for name in (*_KEY_COLUMNS, "local_name")]
+        + [("last_updated", pa.date32())]
+        + [(name, pa.list_(pa.from_numpy_dtype(dtype))) for name, dtype in _ARRAY_COLUMNS.items()]
+    )
+
+
+def statistics_schema() -> "pa.Schema":
+    _require_pyarrow()
+    fields = [(name, pa.string()) for name in (*_KEY_COLUMNS, "interval")]
+    # One flag per section, so a computed section with only empty fields stays distinct from a missing one
+    fields += [(section, pa.bool_()) for section in _SECTION_MODELS]
+    for section, model in _SECTION_MODELS.items():
+        fields += [(f"{section}.{name}", _arrow_type(info.annotation)) for name, info in model.model_fields.items()]
+    return pa.schema(fields)
+
+
+# --- Writing --- #
+
+def _list_column(arrays: List[np.ndarray], dtype) -> "pa.ListArray":
+    # Offsets plus one concatenated values buffer: no Python object per element
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int32)
+    np.cumsum([array.size for array in arrays], out=offsets[1:])
+    values = np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.empty(0, dtype=dtype)
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values))
+
+
+def _series_batch(entries: List[FireSeries], schema: "pa.Schema") -> "pa.RecordBatch":
+    columns = [pa.array([getattr(entry, name) for entry in entries], pa.string()) for name in (*_KEY_COLUMNS, "local_name")]
+    columns.append(pa.array([entry.last_updated for entry in entries], pa.date32()))
+    columns += [
+        _list_column([getattr(entry, name) for entry in entries], dtype) for name, dtype in _ARRAY_COLUMNS.items()
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _statistics_rows(entry: FireSeries) -> Iterator[dict]:
+    if entry.statistic is None:
+        return
+    for interval in ("annual", "monthly"):
+        interval_stats = getattr(entry.statistic, interval)
+        if interval_stats is None:
+            continue
+        row = {name: getattr(entry, name) for name in _KEY_COLUMNS}
+        row["interval"] = interval
+        for section in _SECTION_MODELS:
+            values = getattr(interval_stats, section)
+            row[section] = values is not None
+            for name, value in (values.model_dump() if values is not None else {}).items():
+                row[f"{section}.{name}"] = list(value.items()) if isinstance(value, dict) else value
+        yield row
+
+
+def _statistics_batch(rows: List[dict], schema: "pa.Schema") -> "pa.RecordBatch":
+    return pa.RecordBatch.from_arrays(
+        [pa.array([row.get(field.name) for row in rows], field.type) for field in schema], schema=schema
+    )
+
+
+class _TableWriter:
+    """
+    Writes record batches one by one to an Arrow IPC file or a Parquet file.
+    """
+
+    def __init__(self, path: str, schema: "pa.Schema", snapshot_format: str):
+        self.snapshot_format = snapshot_format
+        if snapshot_format == "parquet":
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._writer = pa.ipc.new_file(path, schema)
+
+    def write(self, batch: "pa.RecordBatch"):
+        if self.snapshot_format == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+
+def write_series_table(entries: Iterable[FireSeries], path: str, snapshot_format: str = "arrow") -> int:
+    """
+    Writes the raw series of the entries, batch by batch. Returns the number of rows.
+    """
+    schema = series_schema()
+    writer = _TableWriter(path, schema, snapshot_format)
+    written, pending, pending_rows = 0, [], 0
+    try:
+        for entry in entries:
+            pending.append(entry)
+            pending_rows += entry.annual_area.size + entry.monthly_area.size
+            if pending_rows >= SNAPSHOT_BATCH_ROWS:
+                writer.write(_series_batch(pending, schema))
+                written, pending, pending_rows = written + len(pending), [], 0
+        if pending or not written:
+            writer.write(_series_batch(pending, schema))
+            written += len(pending)
+    finally:
+        writer.close()
+    return written
+
+
+def write_statistics_table(entries: Iterable[FireSeries], path: str, snapshot_format: str = "arrow") -> int:
+    """
+    Writes the flattened statistics of the entries, batch by batch. Returns the number of rows.
+    """
+    schema = statistics_schema()
+    writer = _TableWriter(path, schema, snapshot_format)
+    written, pending = 0, []
+    try:
+        for entry in entries:
+            pending.extend(_statistics_rows(entry))
+            if len(pending) >= STATISTICS_BATCH_ROWS:
+                writer.write(_statistics_batch(pending, schema))
+                written, pending = written + len(pending), []
+        if pending or not written:
+            writer.write(_statistics_batch(pending, schema))
+            written += len(pending)
+    finally:
+        writer.close()
+    return written
+
+
+def table_path(directory: str, table: str, snapshot_format: str) -> str:
+    """
+    Location of a snapshot table, e.g. DIRECTORY/series.arrow.
+    """
+    return os.path.join(directory, f"{table}.{snapshot_format}")
+
+
+def export_snapshot(directory: str, snapshot_format: str = "arrow",
+                    entries: Callable[[], Iterable[FireSeries]] = cached_entries) -> Dict[str, int]:
+    """
+    Writes the cache as a snapshot directory (both tables).
+
+    Args:
+        directory: Destination directory, created if needed.
+        snapshot_format: "arrow" (IPC file) or "parquet".
+        entries: Returns the entries to write; called once per table.
+                 Defaults to the in-memory cache.
+
+    Returns:
+        The number of rows written to each table.
+    """
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    return {
+        "series": write_series_table(entries(), table_path(directory, "series", snapshot_format), snapshot_format),
+        "statistics": write_statistics_table(
+            entries(), table_path(directory, "statistics", snapshot_format), snapshot_format
+        ),
+    }
+
+
+def write_snapshot_table(table: str, snapshot_format: str = "arrow") -> str:
+    """
+    Writes one table of the in-memory cache to a temporary file and returns its path.
+    The caller removes the file.
+    """
+    _require_pyarrow()
+    writers = {"series": write_series_table, "statistics": write_statistics_table}
+    handle, path = tempfile.mkstemp(prefix=f"firemetrics-{table}-", suffix=f".{snapshot_format}")
+    os.close(handle)
+    try:
+        writers[table](cached_entries(), path, snapshot_format)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+# --- Reading --- #
+
+def _snapshot_format(directory: str) -> str:
+    for snapshot_format in SNAPSHOT_FORMATS:
+        if os.path.exists(table_path(directory, "series", snapshot_format)):
+            return snapshot_format
+    raise FileNotFoundError(f"No series table in {directory}")
+
+
+def _read_batches(path: str, snapshot_format: str) -> Iterator["pa.RecordBatch"]:
+    if snapshot_format == "parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=SNAPSHOT_BATCH_ROWS)
+        return
+    # Memory-mapped: batches are read without copying the file
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+
+
+def _column_values(column: "pa.Array") -> list:
+    # Numeric columns without nulls convert in one call; map columns come back as (key, value) pairs
+    if column.null_count == 0 and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+        return column.to_numpy().tolist()
+    if pa.types.is_map(column.type):
+        return [dict(value) if value is not None else None for value in column.to_pylist()]
+    return column.to_pylist()
+
+
+def _entry_keys(columns: Callable[[str], "pa.Array"]) -> "pa.Array":
+    # One string per entry, so the key columns of both tables can be matched in Arrow
+    return pc.binary_join_element_wise(*(columns(name) for name in _KEY_COLUMNS), "\x1f")
+
+
+def _read_statistics(path: str, snapshot_format: str) -> "pa.Table":
+    # Kept as Arrow columns (memory-mapped for IPC files): models are only built per series batch
+    if snapshot_format == "parquet":
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.append_column("key", _entry_keys(table.column))
+
+
+def _join_statistics(statistics: "pa.Table", keys: "pa.Array") -> Dict[tuple, Statistics]:
+    """
+    Builds the Statistics of the entries whose keys are in `keys` (one series batch).
+    """
+    section_fields = {
+        section: [field.name for field in statistics_schema() if field.name.startswith(f"{section}.")]
+        for section in _SECTION_MODELS
+    }
+    nested: Dict[tuple, dict] = {}
+    for batch in statistics.filter(pc.is_in(statistics.column("key"), value_set=keys)).to_batches():
+        # Column by column: no dict per row, only the values each section needs
+        columns = {name: _column_values(batch.column(name)) for name in batch.schema.names}
+        for row in range(batch.num_rows):
+            key = tuple(columns[name][row] for name in _KEY_COLUMNS)
+            nested.setdefault(key, {})[columns["interval"][row]] = {
+                section: {name.split(".", 1)[1]: columns[name][row] for name in names}
+                if columns[section][row] else None
+                for section, names in section_fields.items()
+            }
+    return {key: Statistics.model_validate(value) for key, value in nested.items()}
+
+
+def _split_list_column(column: "pa.ListArray", dtype) -> List[np.ndarray]:
+    offsets = column.offsets.to_numpy()
+    values = column.flatten().to_numpy(zero_copy_only=False)
+    offsets = offsets - offsets[0]
+    # Copies, so the entries do not keep the (memory-mapped) batch alive
+    return [np.array(values[start:end], dtype=dtype) for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def read_snapshot(directory: str) -> Iterator[FireSeries]:
+    """
+    Reads a snapshot directory back into FireSeries entries, batch by batch.
+    """
+    _require_pyarrow()
+    snapshot_format = _snapshot_format(directory)
+    statistics_path = table_path(directory, "statistics", snapshot_format)
+    statistics = _read_statistics(statistics_path, snapshot_format) if os.path.exists(statistics_path) else None
+
+    for batch in _read_batches(table_path(directory, "series", snapshot_format), snapshot_format):
+        batch_statistics = _join_statistics(statistics, _entry_keys(batch.column)) if statistics is not None else {}
+        strings = {name: batch.column(name).to_pylist() for name in (*_KEY_COLUMNS, "local_name")}
+        dates: List[date] = batch.column("last_updated").to_pylist()
+        arrays = {name: _split_list_column(batch.column(name), dtype) for name, dtype in _ARRAY_COLUMNS.items()}
+        for row in range(batch.num_rows):
+            key = tuple(strings[name][row] for name in _KEY_COLUMNS)
+            yield FireSeries(
+                local_name=strings["local_name"][row],
+                local_id=key[1],
+                local_type=key[0],
+                grouping=key[2],
+                last_updated=dates[row],
+                statistic=batch_statistics.get(key),
+                **{name: arrays[name][row] for name in _ARRAY_COLUMNS},
+            )
+
+
+def load_snapshot(directory: str) -> int:
+    """
+    Loads a snapshot directory into the cache (memory and disk tier).
+    Returns the number of restored entries.
+    """
+    return restore_entries(read_snapshot(directory))
+
+
+def load_startup_snapshot(directory: Optional[str] = None) -> int:
+    """
+    Loads FIREMETRICS_CACHE_SNAPSHOT (or `directory`) if set. Failures are logged, not raised.
+    """
+    directory = directory or CACHE_SNAPSHOT
+    if not directory:
+        return 0
+    try:
+        restored = load_snapshot(directory)
+    except (RuntimeError, OSError) as error:
+        logger.warning("Cache snapshot %s not loaded: %s", directory, error)
+        return 0
+    logger.info("Cache snapshot %s loaded: %d entries", directory, restored)
+    return restored
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m data.cache_snapshot", description="Export or load cache snapshots.")
+    parser.add_argument("command", choices=("export", "load"))
+    parser.add_argument("directory")
+    parser.add_argument("--format", choices=tuple(SNAPSHOT_FORMATS), default="arrow")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        # Outside the server the memory cache is empty: export the disk tier
+        # Read at call time: configure_disk_cache may have pointed it elsewhere
+        disk_cache_path = cache_manager.DISK_CACHE_PATH
+        if not disk_cache_path or not os.path.exists(disk_cache_path):
+            parser.error(f"No disk cache at {disk_cache_path!r} (FIREMETRICS_DISK_CACHE_PATH)")
+        disk_cache = DiskCache(disk_cache_path)
+        print(export_snapshot(args.directory, args.format, disk_cache.entries))
+    else:
+        print({"entries": load_snapshot(args.directory)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# data/disk_cache.py
+
+import os
+import sqlite3
+import threading
+from datetime import date
+from typing import Iterator, Optional, Set
+
+import numpy as np
+
+from data.fire_series import FireSeries, YEAR_DTYPE, MONTH_DTYPE, AREA_DTYPE
+from data.pydantic_models import Statistics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fire_series (
+    cache_key     TEXT PRIMARY KEY,
+    local_name    TEXT,
+    local_id      TEXT NOT NULL,
+    local_type    TEXT NOT NULL,
+    grouping      TEXT NOT NULL,
+    annual_year   BLOB NOT NULL,
+    annual_area   BLOB NOT NULL,
+    monthly_year  BLOB NOT NULL,
+    monthly_month BLOB NOT NULL,
+    monthly_area  BLOB NOT NULL,
+    statistic     TEXT,
+    last_updated  TEXT NOT NULL
+)
+"""
+
+_COLUMNS = (
+    "local_name, local_id, local_type, grouping, annual_year, annual_area, "
+    "monthly_year, monthly_month, monthly_area, statistic, last_updated"
+)
+
+
+def _entry_from_row(row: tuple) -> FireSeries:
+    # Rebuilds an entry from a row of the _COLUMNS columns
+    (local_name, local_id, local_type, grouping, annual_year, annual_area,
+     monthly_year, monthly_month, monthly_area, statistic, last_updated) = row
+
+    return FireSeries(
+        local_name=local_name,
+        local_id=local_id,
+        local_type=local_type,
+        grouping=grouping,
+        annual_year=np.frombuffer(annual_year, dtype=YEAR_DTYPE),
+        annual_area=np.frombuffer(annual_area, dtype=AREA_DTYPE),
+        monthly_year=np.frombuffer(monthly_year, dtype=YEAR_DTYPE),
+        monthly_month=np.frombuffer(monthly_month, dtype=MONTH_DTYPE),
+        monthly_area=np.frombuffer(monthly_area, dtype=AREA_DTYPE),
+        statistic=Statistics.model_validate_json(statistic) if statistic else None,
+        last_updated=date.fromisoformat(last_updated),
+    )
+
+
+class DiskCache:
+    """
+    Persistent cache tier stored in a local SQLite database.
+
+    The raw annual/monthly arrays are stored as binary blobs and the statistics
+    as JSON, so entries survive restarts and are shared by every worker process
+    pointing to the same file. The database runs in WAL mode, which lets several
+    processes read concurrently while one of them writes.
+
+    The file is only opened on first access, keeping application startup fast.
+
+    Args:
+        path: Location of the SQLite file. Parent directories are created if needed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        # Every open per-thread connection, so `close` can reach those of other threads
+        self._connections: Set[sqlite3.Connection] = set()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite connections must not be shared across threads.
+        # A connection closed by `close` is no longer tracked and gets reopened.
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and connection in self._connections:
+            return connection
+
+        with self._init_lock:
+            if not self._initialized:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+
+        # Only used by its own thread, but `close` may run on another one
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA busy_timeout = 30000")
+
+        with self._init_lock:
+            if not self._initialized:
+                connection.execute("PRAGMA journal_mode = WAL")
+                connection.execute(_SCHEMA)
+                self._initialized = True
+
+        connection.execute("PRAGMA synchronous = NORMAL")
+        with self._init_lock:
+            self._connections.add(connection)
+        self._local.connection = connection
+        return connection
+
+    def load(self, cache_key: str) -> Optional[FireSeries]:
+        """
+        Reads an entry from disk. Returns None if the key is not stored.
+        Freshness is checked by the caller.
+        """
+        row = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM fire_series WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        return _entry_from_row(row)
+
+    def last_updated(self, cache_key: str) -> Optional[date]:
+        """
+        Reads only the data date of an entry. Returns None if the key is not stored.
+        """
+        row = self._connection().execute(
+            "SELECT last_updated FROM fire_series WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        return date.fromisoformat(row[0]) if row else None
+
+    def entries(self) -> Iterator[FireSeries]:
+        """
+        Iterates over every stored entry, one row at a time (expired ones included).
+        """
+        yield from map(_entry_from_row, self._connection().execute(f"SELECT {_COLUMNS} FROM fire_series"))
+
+    def save(self, cache_key: str, entry: FireSeries):
+        """
+        Writes (or replaces) an entry, including its statistics if present.
+        """
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO fire_series (cache_key, {_COLUMNS}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                cache_key,
+                entry.local_name,
+                entry.local_id,
+                entry.local_type,
+                entry.grouping,
+                np.ascontiguousarray(entry.annual_year, dtype=YEAR_DTYPE).tobytes(),
+                np.ascontiguousarray(entry.annual_area, dtype=AREA_DTYPE).tobytes(),
+                np.ascontiguousarray(entry.monthly_year, dtype=YEAR_DTYPE).tobytes(),
+                np.ascontiguousarray(entry.monthly_month, dtype=MONTH_DTYPE).tobytes(),
+                np.ascontiguousarray(entry.monthly_area, dtype=AREA_DTYPE).tobytes(),
+                entry.statistic.model_dump_json() if entry.statistic else None,
+                entry.last_updated.isoformat(),
+            ),
+        )
+
+    def save_statistics(self, cache_key: str, statistic: Optional[Statistics]):
+        """
+        Updates only the statistics of a stored entry.
+        """
+        self._connection().execute(
+            "UPDATE fire_series SET statistic = ? WHERE cache_key = ?",
+            (statistic.model_dump_json() if statistic else None, cache_key),
+        )
+
+    def trim(self, max_entries: int) -> int:
+        """
+        Keeps at most `max_entries` rows, deleting those with the oldest data first.
+        Rows are never deleted by age alone: they hold the last good value of each key.
+        Returns the number of deleted rows.
+        """
+        cursor = self._connection().execute(
+            "DELETE FROM fire_series WHERE cache_key IN "
+            "(SELECT cache_key FROM fire_series ORDER BY last_updated DESC LIMIT -1 OFFSET ?)",
+            (max(0, max_entries),),
+        )
+        return cursor.rowcount
+
+    def close(self):
+        """
+        Closes the connections opened by every thread (e.g. the threadpool workers) at shutdown.
+        A thread using the cache afterwards opens a new connection.
+        """
+        with self._init_lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            connection.close()
+        self._local.connection = None
@@ -0,0 +1,115 @@
+# data/encoded_body.py
+
+import gzip
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are produced
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("FIREMETRICS_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("FIREMETRICS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("FIREMETRICS_BROTLI_QUALITY", "5"))
+
+# Cumulative cost of encode_body (read by the metrics endpoint through encode_stats)
+_stats = {"calls": 0, "bytes": 0, "serialize_seconds": 0.0, "compress_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def dumps(content) -> bytes:
+    """
+    Encodes JSON-compatible content to compact UTF-8 bytes, with orjson when installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(slots=True)
+class EncodedBody:
+    """
+    A response body serialized once, with its compressed variants.
+    """
+    identity: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.identity) + len(self.gzip or b"") + len(self.br or b"")
+
+    def choose(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Picks the variant to send for an Accept-Encoding header.
+
+        Returns:
+            The body bytes and the Content-Encoding to send with them (None for identity).
+        """
+        accepted = _accepted_encodings(accept_encoding)
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    # "gzip, br;q=0.5, deflate;q=0" -> {"gzip", "br", "deflate" only if q > 0}
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    if "*" in accepted:
+        accepted.update(("br", "gzip"))
+    return accepted
+
+
+def encode_body(content) -> EncodedBody:
+    """
+    Serializes content to JSON and builds its gzip (and brotli, if available) variants.
+    """
+    started = time.perf_counter()
+    identity = dumps(content)
+    serialized = time.perf_counter()
+
+    body = EncodedBody(identity)
+    if len(identity) >= COMPRESS_MIN_BYTES:
+        body.gzip = gzip.compress(identity, compresslevel=GZIP_LEVEL, mtime=0)
+        if brotli is not None:
+            body.br = brotli.compress(identity, quality=BROTLI_QUALITY)
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["bytes"] += len(identity)
+        _stats["serialize_seconds"] += serialized - started
+        _stats["compress_seconds"] += time.perf_counter() - serialized
+    return body
+
+
+def encode_stats() -> dict:
+    """
+    Returns the number of bodies encoded, their JSON bytes and the time spent
+    serializing and compressing them since startup.
+    """
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,263 @@
+# data/fire_series.py
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional, Iterable, Any
+
+import numpy as np
+
+from data.encoded_body import EncodedBody, encode_body
+from data.pydantic_models import CachedData, RawFireData, Statistics
+
+# Storage types for the columnar series.
+# Years fit in int16, months in int8 and the burned area keeps full precision.
+YEAR_DTYPE = np.int16
+MONTH_DTYPE = np.int8
+AREA_DTYPE = np.float64
+
+
+@dataclass(slots=True)
+class FireSeries:
+    """
+    Columnar representation of a cached territory.
+
+    Instead of one Pydantic object per period, each series is kept as a set of
+    contiguous NumPy arrays (year, month and areaHa). The statistics code reads
+    these arrays directly; Pydantic models are only built at the response boundary
+    through `to_raw_fire_data` and `to_cached_data`.
+    """
+    local_name: str
+    local_id: str
+    local_type: str
+    grouping: str
+    annual_year: np.ndarray
+    annual_area: np.ndarray
+    monthly_year: np.ndarray
+    monthly_month: np.ndarray
+    monthly_area: np.ndarray
+    last_updated: date
+    statistic: Optional[Statistics] = None
+    # Running aggregates by interval, used to update the statistics incrementally (memory only)
+    aggregates: dict = field(default_factory=dict)
+    # Content hashes of the series and of the statistics, set on each cache write (see update_hashes)
+    content_hash: str = ""
+    statistic_hash: str = ""
+    # Unix time of the last cache write that changed the entry, for Last-Modified
+    modified_at: float = 0.0
+    # Pre-serialized response bodies by representation ("raw", "cached"), see encode_bodies
+    bodies: dict = field(default_factory=dict)
+
+    def area(self, interval: str) -> np.ndarray:
+        """
+        Returns the areaHa array for the given interval ("annual" or "monthly").
+        """
+        return self.annual_area if interval == "annual" else self.monthly_area
+
+    def years(self, interval: str) -> np.ndarray:
+        """
+        Returns the year array for the given interval ("annual" or "monthly").
+        """
+        return self.annual_year if interval == "annual" else self.monthly_year
+
+    def months(self, interval: str) -> Optional[np.ndarray]:
+        """
+        Returns the month array for the monthly interval, or None for the annual one.
+        """
+        return self.monthly_month if interval == "monthly" else None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Number of bytes held by the series arrays.
+        """
+        return (
+            self.annual_year.nbytes + self.annual_area.nbytes
+            + self.monthly_year.nbytes + self.monthly_month.nbytes + self.monthly_area.nbytes
+        )
+
+    @property
+    def body_nbytes(self) -> int:
+        """
+        Number of bytes held by the pre-serialized bodies.
+        """
+        return sum(body.nbytes for body in self.bodies.values())
+
+    def update_hashes(self, modified_at: float, previous: Optional["FireSeries"] = None):
+        """
+        Recomputes the content hashes after a cache write. `modified_at` is only recorded
+        if a hash differs from those of `previous` (the entry the write replaces, if any),
+        so rewriting identical data keeps Last-Modified.
+        Hashing the raw arrays costs one pass over their bytes, done once per write.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((self.local_name or "").encode())
+        for array in (self.annual_year, self.annual_area, self.monthly_year, self.monthly_month, self.monthly_area):
+            digest.update(array.tobytes())
+        self.content_hash = digest.hexdigest()
+        self.statistic_hash = self._statistic_digest()
+
+        unchanged = previous is not None and (previous.content_hash, previous.statistic_hash) == (
+            self.content_hash, self.statistic_hash
+        )
+        self.modified_at = previous.modified_at if unchanged else modified_at
+
+    def update_statistic_hash(self, modified_at: float):
+        """
+        Recomputes the statistics hash after the statistics were set.
+        `modified_at` is only recorded if they actually changed.
+        """
+        statistic_hash = self._statistic_digest()
+        if statistic_hash != self.statistic_hash:
+            self.statistic_hash = statistic_hash
+            self.modified_at = modified_at
+
+    def _statistic_digest(self) -> str:
+        statistic = self.statistic.model_dump_json().encode() if self.statistic else b""
+        return hashlib.blake2b(statistic, digest_size=8).hexdigest()
+
+    @property
+    def raw_etag(self) -> str:
+        """
+        Strong ETag of the RawFireData representation.
+        """
+        return f'"{self.content_hash}"'
+
+    @property
+    def cached_etag(self) -> str:
+        """
+        Strong ETag of the CachedData representation (series, statistics and date).
+        """
+        return f'"{self.content_hash}-{self.statistic_hash}-{self.last_updated.toordinal()}"'
+
+    def encode_bodies(self, representations: Iterable[str] = ("raw", "cached")):
+        """
+        Serializes the given representations once (JSON plus compressed variants),
+        so reads can send the stored bytes without building or encoding a model.
+        """
+        for representation in representations:
+            payload = self.raw_payload() if representation == "raw" else self.cached_payload()
+            self.bodies[representation] = encode_body(payload)
+
+    def body(self, representation: str) -> EncodedBody:
+        """
+        Returns the pre-serialized body of a representation, encoding it if missing.
+        """
+        body = self.bodies.get(representation)
+        if body is None:
+            self.encode_bodies((representation,))
+            body = self.bodies[representation]
+        return body
+
+    def raw_payload(self) -> dict:
+        """
+        JSON-compatible content of the RawFireData representation.
+        """
+        return {
+            "local_name": self.local_name,
+            "local_id": self.local_id,
+            "local_type": self.local_type,
+            "grouping": self.grouping,
+            "annual": self.annual_records(),
+            "monthly": self.monthly_records(),
+        }
+
+    def cached_payload(self) -> dict:
+        """
+        JSON-compatible content of the CachedData representation.
+        """
+        payload = self.raw_payload()
+        payload["statistic"] = self.statistic.model_dump(mode="json") if self.statistic else None
+        payload["last_updated"] = self.last_updated.isoformat()
+        return payload
+
+    def annual_records(self) -> list[dict]:
+        """
+        Rebuilds the annual series as a list of {"year", "areaHa"} dictionaries.
+        """
+        return [
+            {"year": year, "areaHa": area}
+            for year, area in zip(self.annual_year.tolist(), self.annual_area.tolist())
+        ]
+
+    def monthly_records(self) -> list[dict]:
+        """
+        Rebuilds the monthly series as a list of {"year", "month", "areaHa"} dictionaries.
+        """
+        return [
+            {"year": year, "month": month, "areaHa": area}
+            for year, month, area in zip(
+                self.monthly_year.tolist(), self.monthly_month.tolist(), self.monthly_area.tolist()
+            )
+        ]
+
+    def to_raw_fire_data(self) -> RawFireData:
+        """
+        Builds the RawFireData response model from the columnar arrays.
+        """
+        return RawFireData(
+            local_name=self.local_name,
+            local_id=self.local_id,
+            local_type=self.local_type,
+            grouping=self.grouping,
+            annual=self.annual_records(),
+            monthly=self.monthly_records(),
+        )
+
+    def to_cached_data(self) -> CachedData:
+        """
+        Builds the CachedData response model (raw series plus statistics).
+        """
+        return CachedData(
+            local_name=self.local_name,
+            local_id=self.local_id,
+            local_type=self.local_type,
+            grouping=self.grouping,
+            annual=self.annual_records(),
+            monthly=self.monthly_records(),
+            statistic=self.statistic,
+            last_updated=self.last_updated,
+        )
+
+
+def _field(item: Any, name: str):
+    # Upstream payloads are dicts, but AnnualData/MonthlyData models are accepted too.
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def _column(items: list, name: str, dtype) -> np.ndarray:
+    return np.fromiter((_field(item, name) for item in items), dtype=dtype, count=len(items))
+
+
+def series_from_payload(local_type: str, local_id: str, grouping: str, data: dict,
+                        last_updated: Optional[date] = None) -> FireSeries:
+    """
+    Converts a processed payload (as built by the fire data service) into a FireSeries.
+
+    Args:
+        local_type: Type of the territory.
+        local_id: Code of the territory.
+        grouping: Grouping option.
+        data: Dictionary with "local_name", "annual" and "monthly" entries.
+        last_updated: Date of the data; defaults to today.
+
+    Returns:
+        FireSeries: The columnar series.
+    """
+    annual: Iterable = data.get("annual") or []
+    monthly: Iterable = data.get("monthly") or []
+    annual = list(annual)
+    monthly = list(monthly)
+
+    return FireSeries(
+        local_name=data.get("local_name"),
+        local_id=local_id,
+        local_type=local_type,
+        grouping=grouping,
+        annual_year=_column(annual, "year", YEAR_DTYPE),
+        annual_area=_column(annual, "areaHa", AREA_DTYPE),
+        monthly_year=_column(monthly, "year", YEAR_DTYPE),
+        monthly_month=_column(monthly, "month", MONTH_DTYPE),
+        monthly_area=_column(monthly, "areaHa", AREA_DTYPE),
+        last_updated=last_updated or date.today(),
+    )
@@ -1,7 +1,7 @@
 # data/pydantic_models.py
 
 from pydantic import BaseModel, RootModel
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 from datetime import date
 
 # --- MODELS FOR EXTERNAL API RESPONSES ---
@@ -82,7 +82,7 @@ class BasicSummaryStats(BaseModel):
     coefficient_of_variation: Optional[float] = None        # Std / Mean
     first_quartile_area_burned: Optional[float] = None      # 25th percentile
     third_quartile_area_burned: Optional[float] = None      # 75th percentile
-    sum_cumulative_area_burned: Optional[float] = None      # Running total
+    sum_cumulative_area_burned: Optional[float] = None      # Mean of the running total over the periods
     number_of_zero_burned_periods: Optional[int] = None     # Count of zeros
     proportion_of_nonzero_burned_periods: Optional[float] = None  # Fraction > 0
 
@@ -91,11 +91,15 @@ class DescriptiveStats(BaseModel):
     """
     Descriptive statistics about burned area data.
     This model groups all general calculations that are not related to time series.
+
+    large_event_proportion is the share (0-1) of the periods at or above the third
+    quartile; large_event_area_share is the share of the total burned area they hold.
     """
     coefficient_of_variation: Optional[float] = None
-    anomalies_count: Optional[int] = None
-    concentration_index: Optional[float] = None
-    large_event_proportion: Optional[float] = None
+    anomalies_count: Optional[int] = None  # periods outside Tukey's fences (1.5 IQR)
+    concentration_index: Optional[float] = None  # Gini coefficient, None for an all-zero series
+    large_event_proportion: Optional[float] = None  # share of the periods, see above
+    large_event_area_share: Optional[float] = None  # share of the area, None for an all-zero series
     event_counts_by_bin: Optional[Dict[str, int]] = None
 
 class TimeSeriesStats(BaseModel):
@@ -103,7 +107,7 @@ class TimeSeriesStats(BaseModel):
     Time series analysis statistics for burned area data.
     This model groups all calculations that analyze trends and temporal patterns.
     """
-    yearly_growth_rate: Optional[List[float]] = None
+    yearly_growth_rate: Optional[List[Optional[float]]] = None  # None when the previous year is zero
     linear_trend_slope: Optional[float] = None
     seasonal_index: Optional[Dict[str, float]] = None
     rolling_mean: Optional[List[float]] = None
@@ -154,6 +158,42 @@ class CachedData(BaseModel):
     last_updated: date
 
 
+# --- MODELS FOR BATCH REQUESTS ---
+
+class TerritoryKey(BaseModel):
+    """
+    Identifies one cached series: territory type, code and grouping.
+    """
+    local_type: str
+    local_code: str
+    grouping: str
+
+class BatchStatisticsRequest(BaseModel):
+    """
+    Request body of the batch statistics endpoint.
+    """
+    interval: Literal["annual", "monthly"]
+    territories: List[TerritoryKey]
+
+class RegionRequest(BaseModel):
+    """
+    Request body of the region aggregation endpoint: the member territories and,
+    optionally, one weight per member (a plain sum otherwise).
+    """
+    territories: List[TerritoryKey]
+    weights: Optional[List[float]] = None
+
+class BatchStatisticsResult(BaseModel):
+    """
+    Statistics computed for one territory of a batch, or the error that prevented it.
+    """
+    local_type: str
+    local_code: str
+    grouping: str
+    statistic: Optional[Statistics] = None
+    error: Optional[str] = None
+
+
 ''' diagram
 +-------------------------------------------------------------+
 | data/pydantic_models.py                                     |
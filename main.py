@@ -1,27 +1,71 @@
 # main.py
-from typing import List, Optional
+import os
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from data.pydantic_models import (
     Territory,
     GroupingsResponse,
     CachedData,
     RawFireData,
+    BatchStatisticsRequest,
+    RegionRequest,
+    BatchStatisticsResult,
 )
 from services.territory_search import (
-    search_territories_from_mapbiomas,
+    find_territories,
     get_grouping_subdivisions_from_mapbiomas,
 )
+from services.territory_index import start_territory_index, stop_territory_index
+from services.cache_warmer import cache_warmer, start_cache_warmer, stop_cache_warmer
 from services.fire_data import (
     get_raw_fire_data_of_cache,
     get_all_fire_data_from_cache
 )
 
-from services.statistics import run_statistics
+from services.export import EXPORT_FORMATS, export_children, stream_export
+from services.statistics import (
+    get_statistics_memo_stats,
+    load_region_statistics,
+    load_interval_statistics,
+    load_statistics,
+    parse_statistics_fields,
+    run_batch_statistics,
+)
+from services.worker_pool import start_worker_pool, shutdown_worker_pool
+from services import metrics, profiling
+from services.api_HTTPException import start_http_client, close_http_client, upstream_status
+from data.cache_manager import (
+    get_cache_stats,
+    start_cache_maintenance,
+    stop_cache_maintenance,
+)
+from data.cache_snapshot import SNAPSHOT_FORMATS, load_startup_snapshot, write_snapshot_table
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts and stops the background services shared by all requests.
+    """
+    start_cache_maintenance()
+    await run_in_threadpool(load_startup_snapshot)
+    start_worker_pool()
+    await start_http_client()
+    await start_territory_index()
+    await start_cache_warmer()
+    yield
+    await stop_cache_warmer()
+    await stop_territory_index()
+    await close_http_client()
+    shutdown_worker_pool()
+    stop_cache_maintenance()
+
 
 app = FastAPI(
     title="FireMetrics API",
@@ -30,8 +74,13 @@ app = FastAPI(
         "Uses data from the MapBiomas Fogo project."
     ),
     version="1.0.0",
+    lifespan=lifespan,
 )
-
+# Latency and status code of every request by route, exposed at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+# Opt-in request profiles (X-Profile header or sampling), listed at /admin/profiles.
+# Off unless FIREMETRICS_PROFILE_TOKEN is set
+app.add_middleware(profiling.ProfilingMiddleware)
 
 
 @app.get("/", tags=["Root"])
@@ -43,62 +92,196 @@ def read_root():
 
 
 @app.get("/territories/{search_term}", tags=["Territory Search"], response_model=List[Territory])
-def search_territories(search_term: Optional[str] = None):
+async def search_territories(search_term: Optional[str] = None):
     """
     Search for a territory by name or code.
     Return a list of matching territories.
+    Served from the local territory index when it holds a full snapshot;
+    otherwise MapBiomas is searched as well and the results are merged.
 
     """
-    return search_territories_from_mapbiomas(search_term)
+    return await find_territories(search_term)
 
 
 @app.get("/territories/ibge/groupings/{local_type}/{local_code}", tags=["Territory Search"], response_model=GroupingsResponse)
-def get_grouping_options(local_type: str, local_code: str):
+async def get_grouping_options(local_type: str, local_code: str):
     """
     Retrieves the list of possible territory grouping types.
     This function returns the original JSON from the external MapBiomas API,
     containing all translations ('pt', 'es', 'en').
     """
-    return get_grouping_subdivisions_from_mapbiomas(local_type, local_code)
+    return await get_grouping_subdivisions_from_mapbiomas(local_type, local_code)
 
 
 
 @app.get("/data/raw/{local_type}/{local_code}/{grouping}", tags=["Data Retrieval"], response_model=RawFireData)
-def fetch_and_cache_data(local_type: str, local_code: str, grouping: str):
+async def fetch_and_cache_data(local_type: str, local_code: str, grouping: str, request: Request, response: Response):
     """
     Fetches and caches the raw fire data for a specific territory based on type, code, and grouping.
     All data fetching, caching, and error handling are managed by a dedicated service function.
+    Expired data is served immediately while it is refreshed in the background;
+    the X-Data-Age-Days and X-Cache-Status headers tell how old it is.
+    Responses carry an ETag and Last-Modified; conditional requests get a 304.
     """
-    return get_raw_fire_data_of_cache(local_type, local_code, grouping)
+    return await get_raw_fire_data_of_cache(local_type, local_code, grouping, response, request)
 
 
 
+@app.get("/data/export/{local_type}/{local_code}/{grouping}", tags=["Data Retrieval"])
+async def export_children_data(local_type: str, local_code: str, grouping: str,
+                               format: Literal["ndjson", "csv"] = "ndjson",
+                               interval: Literal["annual", "monthly"] = "monthly"):
+    """
+    Streams the series of every child territory (the municipalities of a state)
+    as NDJSON or CSV rows: local_type, local_code, grouping, year, month, areaHa.
+    Children are fetched through the cache as the download goes.
+    """
+    children = await export_children(local_type, local_code)
+    return StreamingResponse(
+        stream_export(children, grouping, interval, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{local_type}-{local_code}-{grouping}-{interval}.{format}"'},
+    )
+
+
 @app.get("/data/all/statistics/calculation/month/{local_type}/{local_code}/{grouping}", tags=["Data calculation"], response_model=CachedData)
-def calculation_for_month(local_type: str, local_code: str, grouping: str):
+async def calculation_for_month(local_type: str, local_code: str, grouping: str):
     """
     Triggers the statistical analysis for monthly fire data for a specific territory.
-    The `run_statistics` service function processes the data and stores the results.
+    The series is loaded like on the data endpoints (stale-while-revalidate, fetched on a miss),
+    then the `compute_interval_statistics` service function processes it and stores the results.
     """
-    run_statistics(local_type, local_code, grouping, "monthly")  
-
-    return None
+    cached_data = await load_interval_statistics(local_type, local_code, grouping, "monthly")
+    return cached_data.to_cached_data()
 
 @app.get("/data/all/statistics/calculation/year/{local_type}/{local_code}/{grouping}", tags=["Data calculation"], response_model=CachedData)
-def calculation_for_yaer(local_type: str, local_code: str, grouping: str):
+async def calculation_for_yaer(local_type: str, local_code: str, grouping: str):
     """
     Triggers the statistical analysis for annual fire data for a specific territory.
     This endpoint is crucial for generating yearly reports and long-term trends.
     """
-    run_statistics(local_type, local_code, grouping, "annual")  
+    cached_data = await load_interval_statistics(local_type, local_code, grouping, "annual")
+    return cached_data.to_cached_data()
 
-    return None
+
+@app.post("/data/all/statistics/calculation/batch", tags=["Data calculation"], response_model=List[BatchStatisticsResult])
+async def calculation_for_batch(request: BatchStatisticsRequest):
+    """
+    Triggers the statistical analysis of many territories in one call.
+    All series are stacked and processed together, and each territory's cache entry is updated.
+    """
+    return await run_batch_statistics(request.territories, request.interval)
+
+
+@app.post("/data/region", tags=["Data calculation"], response_model=CachedData)
+async def aggregate_region(region: RegionRequest, request: Request, response: Response):
+    """
+    Rolls many territories up into one region (e.g. a set of municipalities): their series
+    are aligned by (year, month) and summed, with optional per-territory weights, and the
+    full statistics of the result are computed. The region is cached under a key built from
+    its sorted members, returned as `local_id` (type and grouping "region").
+    """
+    cached_data = await load_region_statistics(region.territories, region.weights)
+    return get_all_fire_data_from_cache(cached_data.local_type, cached_data.local_id, cached_data.grouping, response, request)
 
 
 @app.get("/data/all/statistics/{local_type}/{local_code}/{grouping}", tags=["Data Retrieval"], response_model=CachedData)
-def show_all_information_from_cache(local_type: str, local_code: str, grouping: str):
+async def show_all_information_from_cache(local_type: str, local_code: str, grouping: str, request: Request, response: Response,
+                                          fields: Optional[str] = None):
     '''
     Retrieves the cached data, including raw information and statistical calculations.
-    This allows users to access processed data without re-running calculations.
+    Statistics are computed on first read: only the missing sections, or only the
+    comma-separated statistics or sections listed in `fields` (e.g. `fields=basic,linear_trend_slope`),
+    and are cached for the next reads.
+    Responses carry an ETag and Last-Modified; conditional requests get a 304.
+    '''
+    await load_statistics(local_type, local_code, grouping, parse_statistics_fields(fields))
+    return get_all_fire_data_from_cache(local_type, local_code, grouping, response, request)
+
+
+@app.get("/cache/stats", tags=["Cache"])
+def show_cache_stats():
+    '''
+    Returns the cache counters (hits, misses, evictions, expirations) and its current size,
+    with the same counters for the memoized statistics under "statistics_memo".
+    '''
+    return {**get_cache_stats(), "statistics_memo": get_statistics_memo_stats()}
+
+
+@app.get("/cache/warmer", tags=["Cache"])
+def show_cache_warmer_status():
     '''
-    return get_all_fire_data_from_cache(local_type, local_code, grouping)
+    Returns the progress of the cache warming scheduler and the keys that failed to refresh.
+    '''
+    return cache_warmer.status()
+
+
+@app.get("/cache/export/{table}", tags=["Cache"])
+async def export_cache_table(table: Literal["series", "statistics"], format: Literal["arrow", "parquet"] = "arrow"):
+    '''
+    Downloads one table of the in-memory cache as an Arrow IPC or Parquet file:
+    "series" (raw annual/monthly arrays) or "statistics" (flattened Statistics fields).
+    The file loads back as a cache snapshot (see data/cache_snapshot.py).
+    '''
+    try:
+        path = await run_in_threadpool(write_snapshot_table, table, format)
+    except RuntimeError as error:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(error))
+
+    return FileResponse(
+        path,
+        media_type=SNAPSHOT_FORMATS[format],
+        filename=f"{table}.{format}",
+        background=BackgroundTask(os.remove, path),
+    )
+
 
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+def show_metrics():
+    '''
+    Prometheus metrics: upstream latency, retries and circuit breaker state, cache counters and sizes,
+    run time of each statistics function, body serialization time and request latency by route.
+    '''
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/upstream/status", tags=["Monitoring"])
+def show_upstream_status():
+    '''
+    Returns, per external API host, the circuit breaker state (closed, open or half_open),
+    its consecutive failures and the retries, fast-failed calls and rate-limit waits so far.
+    '''
+    return upstream_status()
+
+
+def _require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    '''
+    Guards the profile endpoints: 404 while profiling is off, 403 without the right X-Profile-Token.
+    '''
+    if not profiling.profiling_enabled():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing or invalid X-Profile-Token header.")
+
+
+@app.get("/admin/profiles", tags=["Monitoring"], dependencies=[Depends(_require_profile_token)])
+def show_profiles():
+    '''
+    Lists the kept request profiles, newest first: requests sent with the X-Profile header
+    and sampled requests slower than the threshold, with their time per phase.
+    '''
+    return profiling.list_profiles()
+
+
+@app.get("/admin/profiles/{profile_id}", tags=["Monitoring"], dependencies=[Depends(_require_profile_token)])
+def show_profile(profile_id: int, format: Literal["json", "collapsed"] = "json"):
+    '''
+    Returns one profile (its id is sent in the X-Profile-Id response header):
+    spans and stack samples as JSON, or the samples as collapsed stacks for flame graph tools.
+    '''
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found (never kept or already dropped).")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return profile.to_dict()
@@ -1,19 +1,160 @@
-import requests
+import asyncio
 import json
-from typing import Any
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
 from fastapi import HTTPException, status
-from requests.exceptions import Timeout, RequestException
+
+from services.metrics import (
+    observe_circuit_state,
+    observe_rejected,
+    observe_retry,
+    observe_throttled,
+    observe_upstream,
+)
+from services.profiling import UPSTREAM_FETCH, span
+from services.resilience import CLOSED, CircuitBreaker, TokenBucket, backoff_delay
 
 # Default headers to simulate a browser request.
 # Useful to avoid being blocked by some external APIs.
 _HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Mobile Safari/537.36 Edg/138.0.0.0',
     'Accept': 'application/json, text/plain, */*',
-    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'Accept-Encoding': 'gzip, deflate',
     'Connection': 'keep-alive'
 }
 
-def fetch_external_api_data(url: str, timeout: int = 10) -> Any:
+# Connection pool and concurrency limits, configurable through environment variables
+HTTP_MAX_CONNECTIONS = int(os.getenv("FIREMETRICS_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("FIREMETRICS_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_PER_HOST_CONCURRENCY = int(os.getenv("FIREMETRICS_HTTP_PER_HOST_CONCURRENCY", "10"))
+# Outbound requests per second per host (token bucket) and the burst allowed above it; 0 disables the limit
+HTTP_RATE_LIMIT = float(os.getenv("FIREMETRICS_HTTP_RATE_LIMIT", "50"))
+HTTP_RATE_BURST = float(os.getenv("FIREMETRICS_HTTP_RATE_BURST", "100"))
+# Retries of a GET after a 5xx, a 429, a timeout or a connection error, with jittered exponential backoff
+HTTP_RETRIES = int(os.getenv("FIREMETRICS_HTTP_RETRIES", "2"))
+HTTP_RETRY_BASE_SECONDS = float(os.getenv("FIREMETRICS_HTTP_RETRY_BASE_SECONDS", "0.2"))
+HTTP_RETRY_MAX_SECONDS = float(os.getenv("FIREMETRICS_HTTP_RETRY_MAX_SECONDS", "5"))
+# Consecutive failures that open a host's circuit breaker, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("FIREMETRICS_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("FIREMETRICS_BREAKER_RESET_SECONDS", "30"))
+
+# Shared client kept for the whole application lifetime (see start_http_client)
+_client: Optional[httpx.AsyncClient] = None
+# One semaphore per upstream host, limiting the requests in flight
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+# Outbound rate limit and circuit breaker of each upstream host
+_host_buckets: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=_HEADERS,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+    )
+
+
+async def start_http_client():
+    """
+    Opens the pooled keep-alive HTTP client used for every upstream call.
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_http_client():
+    """
+    Closes the pooled HTTP client and its connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_limits.clear()
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Lazily creates the client when used outside the application lifespan (scripts, CLI)
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+def _host_limit(host: str) -> asyncio.Semaphore:
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST_CONCURRENCY)
+    return limit
+
+
+def _breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(
+            BREAKER_FAILURES, BREAKER_RESET_SECONDS, on_change=lambda state: observe_circuit_state(host, state)
+        )
+        observe_circuit_state(host, breaker.state)
+    return breaker
+
+
+async def _throttle(host: str):
+    # Token bucket per host; no limit when HTTP_RATE_LIMIT is 0
+    if HTTP_RATE_LIMIT <= 0:
+        return
+    bucket = _host_buckets.get(host)
+    if bucket is None:
+        bucket = _host_buckets[host] = TokenBucket(HTTP_RATE_LIMIT, HTTP_RATE_BURST)
+    wait = bucket.reserve()
+    if wait:
+        observe_throttled(host, wait)
+        await asyncio.sleep(wait)
+
+
+def upstream_status() -> Dict[str, dict]:
+    """
+    Circuit breaker state, retries and rate-limit waits of every upstream host called so far.
+    """
+    return {
+        host: {
+            **breaker.status(),
+            "throttled": _host_buckets[host].throttled if host in _host_buckets else 0,
+            "throttled_seconds": round(_host_buckets[host].throttled_seconds, 3) if host in _host_buckets else 0.0,
+        }
+        for host, breaker in _breakers.items()
+    }
+
+
+async def _get(url: str, host: str, timeout: int, endpoint: str) -> httpx.Response:
+    # One attempt: rate limit, per-host concurrency limit, then the request on the shared client
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        await _throttle(host)
+        async with _host_limit(host):
+            started = time.perf_counter()
+            with span(UPSTREAM_FETCH, endpoint):
+                response = await _get_client().get(url, timeout=timeout)
+        outcome = f"{response.status_code // 100}xx"
+        return response
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise
+    finally:
+        # Time on the wire only: waiting for the rate and per-host limits is not upstream latency
+        observe_upstream(endpoint, outcome, time.perf_counter() - started)
+
+
+async def fetch_external_api_data(url: str, timeout: int = 10, endpoint: str = "other") -> Any:
     """
     Makes a GET request to an external API and handles common errors gracefully.
 
@@ -21,50 +162,107 @@ def fetch_external_api_data(url: str, timeout: int = 10) -> Any:
     ensuring the response is a valid JSON and providing user-friendly
     error messages through FastAPI's HTTPException.
 
+    Requests go through a shared keep-alive connection pool. Per upstream host:
+    - outbound requests are rate limited (token bucket, HTTP_RATE_LIMIT per second)
+      and the number in flight is limited (HTTP_PER_HOST_CONCURRENCY);
+    - 5xx and 429 answers, timeouts and connection errors are retried up to
+      HTTP_RETRIES times, with jittered exponential backoff (GETs are idempotent);
+    - a circuit breaker opens after BREAKER_FAILURES consecutive failures: calls then
+      fail fast with a 503 for BREAKER_RESET_SECONDS, and callers holding cached data
+      serve it instead (see load_fire_series).
+
     Args:
         url (str): The URL of the external API endpoint.
-        timeout (int, optional): Maximum time in seconds to wait for the response.
+        timeout (int, optional): Maximum time in seconds to wait for each attempt.
                                  Defaults to 10.
+        endpoint (str, optional): Name of the upstream endpoint in the latency metrics
+                                  (e.g. "time_series"), so codes in the URL do not
+                                  create new series.
 
     Returns:
         Any: The JSON object (dictionary, list, etc.) returned by the API.
 
     Raises:
         HTTPException:
+            - 503 Service Unavailable: If the circuit breaker of the host is open
+              (with a Retry-After header).
             - 504 Gateway Timeout: If the external API takes too long to respond.
             - 502 Bad Gateway: If there's a connection issue or the API returns
               invalid JSON data.
             - Other HTTP error codes (e.g., 404, 500): If the API returns a status
               code indicating an error.
     """
+    host = urlsplit(url).netloc
+    breaker = _breaker(host)
+
+    for attempt in range(HTTP_RETRIES + 1):
+        # Step 1. Fail fast while the upstream is unhealthy
+        if not breaker.allow():
+            observe_rejected(endpoint)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The external service is unavailable at the moment. Please try again later.",
+                headers={"Retry-After": str(math.ceil(breaker.retry_after()))},
+            )
+
+        # Step 2. One attempt; failures that may succeed on retry are classified
+        try:
+            response = await _get(url, host, timeout, endpoint)
+
+        except httpx.TimeoutException:
+            # The external service is not responding within the timeout period.
+            reason, error = "timeout", HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="The external service is taking too long to respond. Please try again in a moment."
+            )
+
+        except httpx.TransportError:
+            # Connection errors (refused, reset, DNS failures).
+            reason, error = "connection", HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to connect to the external service at the moment."
+            )
+
+        except httpx.HTTPError:
+            # Any other client error (e.g. an invalid URL): retrying would not help.
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Unable to connect to the external service at the moment."
+            )
+
+        else:
+            if response.status_code < 500 and response.status_code != 429:
+                # The upstream answered: healthy, even for a 4xx
+                breaker.record_success()
+                return _parse_response(response)
+            reason = "429" if response.status_code == 429 else "5xx"
+            error = _status_error(response)
+
+        # Step 3. Count the failure, then retry after a jittered backoff unless the breaker opened
+        breaker.record_failure()
+        if attempt == HTTP_RETRIES or breaker.state != CLOSED:
+            raise error
+        breaker.retries += 1
+        observe_retry(endpoint, reason)
+        await asyncio.sleep(backoff_delay(attempt, HTTP_RETRY_BASE_SECONDS, HTTP_RETRY_MAX_SECONDS))
+
+
+def _status_error(response: httpx.Response) -> HTTPException:
+    # The external service answered with an error status (4xx or 5xx).
+    return HTTPException(
+        status_code=response.status_code,
+        detail=f"The external service returned an error: {response.status_code} {response.reason_phrase}"
+    )
+
+
+def _parse_response(response: httpx.Response) -> Any:
+    if response.is_error:
+        raise _status_error(response)
     try:
-        response = requests.get(url, headers=_HEADERS, timeout=timeout)
-        # Raise an exception for bad status codes (4xx or 5xx)
-        response.raise_for_status()
         return response.json()
-    
-    except Timeout:
-        # The external service is not responding within the timeout period.
-        raise HTTPException(
-            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail="The external service is taking too long to respond. Please try again in a moment."
-        )
-
     except json.JSONDecodeError:
         # The external service returned data that is not valid JSON.
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="The external service returned data in an unexpected format."
         )
-        
-    except RequestException as e:
-        # Catches all other requests-related exceptions (e.g., connection errors,
-        # DNS failures, and HTTP errors caught by raise_for_status).
-        status_code = getattr(e.response, "status_code", status.HTTP_502_BAD_GATEWAY)
-        detail = "Unable to connect to the external service at the moment."
-        
-        # If there's a specific HTTP error from the external service, provide a more specific detail.
-        if e.response is not None:
-            detail = f"The external service returned an error: {e.response.status_code} {e.response.reason}"
-        
-        raise HTTPException(status_code=status_code, detail=detail)
\ No newline at end of file
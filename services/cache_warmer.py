@@ -0,0 +1,205 @@
+# services/cache_warmer.py
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from data.cache_manager import CACHE_TTL, show_all_data
+from data.fire_series import FireSeries
+from services.fire_data import refresh_fire_series
+from services.statistics import run_statistics
+from services.territory_search import get_grouping_subdivisions_from_mapbiomas
+
+logger = logging.getLogger(__name__)
+
+# Keys kept warm, as "type/code/grouping" separated by commas (e.g. "state/33/biome")
+WARM_KEYS = os.getenv("FIREMETRICS_WARM_KEYS", "")
+# Parent territories as "type/code": every grouping available for them is kept warm
+WARM_PARENTS = os.getenv("FIREMETRICS_WARM_PARENTS", "")
+# Statistics intervals computed for each warm key
+WARM_INTERVALS = [interval for interval in os.getenv("FIREMETRICS_WARM_INTERVALS", "annual,monthly").split(",") if interval]
+# Maximum number of keys refreshed at the same time (bounds the upstream load)
+WARM_CONCURRENCY = int(os.getenv("FIREMETRICS_WARM_CONCURRENCY", "4"))
+# Entries are refreshed this long before they expire
+WARM_REFRESH_MARGIN = timedelta(days=int(os.getenv("FIREMETRICS_WARM_REFRESH_MARGIN_DAYS", "3")))
+# Seconds between two warming cycles
+WARM_CHECK_INTERVAL = float(os.getenv("FIREMETRICS_WARM_CHECK_SECONDS", "3600"))
+
+WarmKey = Tuple[str, str, str]
+
+
+def parse_keys(spec: str, size: int) -> List[tuple]:
+    """
+    Parses "a/b/c,d/e/f" into tuples of `size` items, skipping malformed entries.
+    """
+    keys = []
+    for item in spec.split(","):
+        parts = tuple(part.strip() for part in item.strip().split("/"))
+        if len(parts) == size and all(parts):
+            keys.append(parts)
+    return keys
+
+
+class CacheWarmer:
+    """
+    Keeps a set of hot keys populated: raw series and statistics.
+
+    Every cycle, each key whose entry is missing or will expire within the refresh
+    margin is fetched again, and the statistics of the configured intervals are
+    computed when missing. Refreshes run with bounded concurrency; progress and
+    failures are logged and exposed by `status`.
+
+    Args:
+        keys: Explicit (local_type, local_code, grouping) keys.
+        parents: (local_type, local_code) territories whose groupings are all kept warm.
+        intervals: Statistics intervals to compute ("annual", "monthly").
+        concurrency: Maximum number of keys refreshed at once.
+        refresh_margin: How long before expiry an entry is refreshed.
+    """
+
+    def __init__(self, keys: List[WarmKey], parents: List[Tuple[str, str]], intervals: List[str],
+                 concurrency: int, refresh_margin: timedelta):
+        self.keys = keys
+        self.parents = parents
+        self.intervals = intervals
+        self.concurrency = concurrency
+        self.refresh_margin = refresh_margin
+
+        self.cycles = 0
+        self.running = False
+        self.last_started: Optional[datetime] = None
+        self.last_finished: Optional[datetime] = None
+        self.total = 0
+        self.done = 0
+        self.refreshed = 0
+        self.failures: Dict[str, str] = {}
+
+    async def resolve_keys(self) -> List[WarmKey]:
+        """
+        Returns the explicit keys plus the keys derived from the parents' groupings.
+        """
+        keys = list(self.keys)
+        for local_type, local_code in self.parents:
+            try:
+                groupings = await get_grouping_subdivisions_from_mapbiomas(local_type, local_code)
+            except HTTPException as error:
+                self.failures[f"{local_type}/{local_code}"] = str(error.detail)
+                continue
+            keys.extend((local_type, local_code, grouping) for grouping in groupings.root)
+        return list(dict.fromkeys(keys))
+
+    def _needs_refresh(self, cached_data: Optional[FireSeries], today: date) -> bool:
+        return cached_data is None or today - cached_data.last_updated >= CACHE_TTL - self.refresh_margin
+
+    def _missing_intervals(self, cached_data: Optional[FireSeries]) -> List[str]:
+        statistic = cached_data.statistic if cached_data else None
+        missing = []
+        for interval in self.intervals:
+            interval_stats = getattr(statistic, interval) if statistic else None
+            if interval_stats is None or None in (interval_stats.basic, interval_stats.descriptive, interval_stats.time_series):
+                missing.append(interval)
+        return missing
+
+    async def _warm(self, key: WarmKey, limit: asyncio.Semaphore, today: date):
+        name = "/".join(key)
+        async with limit:
+            try:
+                # The lookups may read the disk tier: they run in a worker thread
+                cached_data = await run_in_threadpool(show_all_data, *key)
+                if self._needs_refresh(cached_data, today):
+                    cached_data = await refresh_fire_series(*key)
+                    self.refreshed += 1
+                for interval in self._missing_intervals(cached_data):
+                    await run_in_threadpool(run_statistics, *key, interval)
+                self.failures.pop(name, None)
+            except Exception as error:
+                detail = error.detail if isinstance(error, HTTPException) else repr(error)
+                self.failures[name] = str(detail)
+                logger.warning("Cache warming failed for %s: %s", name, detail)
+            finally:
+                self.done += 1
+
+    async def run_cycle(self):
+        """
+        Runs one warming pass over every key.
+        """
+        self.running = True
+        self.last_started = datetime.now()
+        self.done = self.refreshed = 0
+        try:
+            keys = await self.resolve_keys()
+            self.total = len(keys)
+            limit = asyncio.Semaphore(self.concurrency)
+            today = date.today()
+            await asyncio.gather(*(self._warm(key, limit, today) for key in keys))
+        finally:
+            self.running = False
+            self.cycles += 1
+            self.last_finished = datetime.now()
+        logger.info(
+            "Cache warming cycle %d: %d keys, %d refreshed, %d failures",
+            self.cycles, self.total, self.refreshed, len(self.failures),
+        )
+
+    def status(self) -> dict:
+        """
+        Returns the progress of the current (or last) cycle and the failing keys.
+        """
+        return {
+            "running": self.running,
+            "cycles": self.cycles,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "keys": self.total,
+            "done": self.done,
+            "refreshed": self.refreshed,
+            "failures": dict(self.failures),
+        }
+
+
+cache_warmer = CacheWarmer(
+    keys=parse_keys(WARM_KEYS, 3),
+    parents=parse_keys(WARM_PARENTS, 2),
+    intervals=WARM_INTERVALS,
+    concurrency=WARM_CONCURRENCY,
+    refresh_margin=WARM_REFRESH_MARGIN,
+)
+
+_warm_task: Optional[asyncio.Task] = None
+
+
+async def _warm_loop():
+    while True:
+        try:
+            await cache_warmer.run_cycle()
+        except Exception:
+            logger.exception("Cache warming cycle failed")
+        await asyncio.sleep(WARM_CHECK_INTERVAL)
+
+
+async def start_cache_warmer():
+    """
+    Starts the background warming scheduler if any key or parent is configured.
+    """
+    global _warm_task
+    if _warm_task is None and (cache_warmer.keys or cache_warmer.parents):
+        _warm_task = asyncio.create_task(_warm_loop())
+
+
+async def stop_cache_warmer():
+    """
+    Stops the background warming scheduler.
+    """
+    global _warm_task
+    if _warm_task is not None:
+        _warm_task.cancel()
+        try:
+            await _warm_task
+        except asyncio.CancelledError:
+            pass
+        _warm_task = None
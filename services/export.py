@@ -0,0 +1,121 @@
+# services/export.py
+
+import asyncio
+import csv
+import io
+import logging
+import os
+from collections import deque
+from typing import AsyncIterator, List
+
+from fastapi import HTTPException
+
+from data.encoded_body import dumps
+from data.fire_series import FireSeries
+from services.fire_data import load_fire_series
+from services.territory_index import territory_index
+from services.territory_search import get_municipalities_of_state
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of child series fetched at the same time during an export
+EXPORT_CONCURRENCY = int(os.getenv("FIREMETRICS_EXPORT_CONCURRENCY", "8"))
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_COLUMNS = ("local_type", "local_code", "grouping", "year", "month", "areaHa")
+
+
+async def export_children(local_type: str, local_code: str) -> List[tuple]:
+    """
+    Returns the (local_type, local_code) keys exported for a parent territory:
+    the municipalities of a state. They come from the territory index when it holds
+    a complete snapshot, otherwise from the IBGE localities API (see
+    get_municipalities_of_state), whose results are added to the index.
+
+    Raises:
+        HTTPException: 422 if the parent is not a state given by its numeric code,
+        404 if no child territory is found, or the upstream error.
+    """
+    if local_type != "state" or not local_code.isdigit():
+        raise HTTPException(
+            status_code=422,
+            detail=f"Exports list the municipalities of a state: use local_type 'state' with its "
+                   f"numeric code (got {local_type} {local_code}).",
+        )
+
+    # A partial index (territories learned from searches) could miss children
+    children = territory_index.children(local_type, local_code) if territory_index.complete else []
+    if not children:
+        children = await get_municipalities_of_state(local_code)
+    if not children:
+        raise HTTPException(status_code=404, detail=f"No child territories known for {local_type} {local_code}.")
+    return [(territory.type, str(territory.code)) for territory in children]
+
+
+def _rows(series: FireSeries, interval: str):
+    years = series.years(interval).tolist()
+    months = series.months(interval)
+    months = months.tolist() if months is not None else [None] * len(years)
+    for year, month, area in zip(years, months, series.area(interval).tolist()):
+        yield series.local_type, series.local_id, series.grouping, year, month, area
+
+
+def _encode_chunk(series: FireSeries, interval: str, export_format: str) -> bytes:
+    # One chunk per child series: memory stays bounded by the largest series
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(_rows(series, interval))
+        return buffer.getvalue().encode()
+    return b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in _rows(series, interval))
+
+
+async def stream_export(children: List[tuple], grouping: str, interval: str = "monthly",
+                        export_format: str = "ndjson", concurrency: int = EXPORT_CONCURRENCY) -> AsyncIterator[bytes]:
+    """
+    Streams the series of many territories as NDJSON or CSV rows
+    (local_type, local_code, grouping, year, month, areaHa).
+
+    Children are loaded through the cache (fetching missing ones upstream) with at most
+    `concurrency` loads in flight, and written in order as soon as each one is ready,
+    so the first rows go out before every child is fetched and memory does not grow
+    with the output size. Children that cannot be loaded are logged and skipped.
+
+    Args:
+        children: (local_type, local_code) keys to export.
+        grouping: Grouping option.
+        interval: "monthly" or "annual" (the month column is empty for annual rows).
+        export_format: "ndjson" or "csv".
+        concurrency: Maximum number of children loaded at once.
+    """
+    if export_format == "csv":
+        yield (",".join(EXPORT_COLUMNS) + "\n").encode()
+
+    pending: deque = deque()
+    keys = iter(children)
+
+    def schedule():
+        # Starts loading the next child, if any
+        for local_type, local_code in keys:
+            task = asyncio.ensure_future(load_fire_series(local_type, local_code, grouping))
+            pending.append((local_type, local_code, task))
+            return
+
+    try:
+        for _ in range(max(1, concurrency)):
+            schedule()
+
+        while pending:
+            local_type, local_code, task = pending.popleft()
+            try:
+                series = await task
+            except HTTPException as error:
+                series = None
+                logger.warning("Export skipped %s/%s/%s: %s", local_type, local_code, grouping, error.detail)
+            # Only now that this load is done: at most `concurrency` loads are ever in flight
+            schedule()
+            if series is not None:
+                yield _encode_chunk(series, interval, export_format)
+    finally:
+        # Client went away (or the export failed): stop the loads still in flight
+        for _, _, task in pending:
+            task.cancel()
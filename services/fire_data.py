@@ -1,51 +1,94 @@
 # services/fire_data.py
 
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+
 from data.cache_manager import (
+    cached_in_memory,
+    data_age_days,
     get_raw_data_from_cache,
+    get_stale_data_from_cache,
+    is_entry_fresh,
+    remaining_ttl_seconds,
     set_raw_data_to_cache,
+    set_series_to_cache,
     show_all_data,
 )
-from data.pydantic_models import RawFireData, CachedData
-from services.territory_search import search_territories_from_mapbiomas
+from data.fire_series import AREA_DTYPE, MONTH_DTYPE, YEAR_DTYPE, FireSeries
+from data.pydantic_models import RawFireData, CachedData, TerritoryKey
+from services.territory_search import resolve_territory_name
 from services.api_HTTPException import fetch_external_api_data  # import corrigido
+from services.http_cache import is_not_modified, validator_headers
+from services.profiling import CACHE_LOOKUP, NAME_LOOKUP, SERIALIZATION, span
+from services.single_flight import SingleFlight
 
-# External API base URL for fire data
-FIRE_DATA_API_URL = "https://plataforma.monitorfogo.mapbiomas.org/api/statistics/time-series/"
+# External API base URL for fire data; defaults to the time-series path under FIREMETRICS_MAPBIOMAS_API_URL
+FIRE_DATA_API_URL = os.getenv(
+    "FIREMETRICS_FIRE_DATA_API_URL",
+    os.getenv("FIREMETRICS_MAPBIOMAS_API_URL", "https://plataforma.monitorfogo.mapbiomas.org/api").rstrip("/") + "/statistics/time-series/",
+)
 
+# Seconds to wait before retrying a background refresh that failed
+REVALIDATE_RETRY_SECONDS = float(os.getenv("FIREMETRICS_REVALIDATE_RETRY_SECONDS", "60"))
 
-def get_raw_fire_data_of_cache(local_type: str, local_code: str, grouping: str) -> RawFireData:
-    """
-    Fetches fire data for a territory, using cache when available.
+# Maximum number of member series loaded at the same time when aggregating a region
+AGGREGATE_CONCURRENCY = int(os.getenv("FIREMETRICS_AGGREGATE_CONCURRENCY", "8"))
 
-    Steps:
-    1. Tries to load from cache.
-    2. If not cached, fetches from the external API.
-    3. Retrieves the local name for enrichment.
-    4. Caches the processed data.
-    5. Returns the result as a validated Pydantic model.
+# Cache key parts of aggregated regions: ("region", <region id>, "region")
+REGION_TYPE = "region"
+REGION_GROUPING = "region"
 
-    Args:
-        local_type: Type of the territory (e.g., "state", "municipality").
-        local_code: Unique code of the territory.
-        grouping: Grouping option for aggregation (e.g., "biome").
+logger = logging.getLogger(__name__)
 
-    Returns:
-        RawFireData: Validated fire data for the requested territory.
-    """
-    # 1. Try cache
+# Coalesces concurrent cache misses for the same key into one upstream fetch
+_fetch_flight = SingleFlight()
+# Coalesces concurrent aggregations of the same region
+_region_flight = SingleFlight()
+# Background refresh tasks (kept referenced until they finish) and last failures by key
+_background_refreshes: set = set()
+_failed_refreshes: Dict[tuple, float] = {}
+
+
+async def _read_cache(lookup: Callable, local_type: str, local_code: str, grouping: str):
+    # A memory hit is answered on the event loop. A miss goes to the disk tier (SQLite read,
+    # array decoding, body encoding), so it runs in a worker thread like the cache writes
+    if cached_in_memory(local_type, local_code, grouping):
+        return lookup(local_type, local_code, grouping)
+    result = await run_in_threadpool(lookup, local_type, local_code, grouping)
+    # A concurrent fetch may have stored the key while the disk was read (its flight may even
+    # be over): look again in memory, so the caller does not start a second fetch
+    if cached_in_memory(local_type, local_code, grouping):
+        return lookup(local_type, local_code, grouping)
+    return result
+
+
+def _fresh_or_stale(local_type: str, local_code: str, grouping: str) -> Tuple[Optional[FireSeries], Optional[FireSeries]]:
+    # The fresh entry, or else the expired one still within the max-stale window
     cached_data = get_raw_data_from_cache(local_type, local_code, grouping)
-    if cached_data:
-        return cached_data
+    return cached_data, None if cached_data else get_stale_data_from_cache(local_type, local_code, grouping)
+
 
-    # 2. Fetch from API
+async def _fetch_and_cache(local_type: str, local_code: str, grouping: str) -> FireSeries:
+    """
+    Fetches the series of a territory from the external API and caches it.
+    """
+    # 1. Fetch from API
     api_url = f"{FIRE_DATA_API_URL}{local_type}/{local_code}/{grouping}?monthStart=1&monthEnd=12"
-    data = fetch_external_api_data(api_url)
+    data = await fetch_external_api_data(api_url, endpoint="time_series")
 
-    # 3. Enrich with local name
-    territories = search_territories_from_mapbiomas(local_code)
-    local_name = next((t.name for t in territories if t.type == local_type), "unknoing")
+    # 2. Enrich with local name (local index, upstream search as fallback)
+    with span(NAME_LOOKUP, f"{local_type}/{local_code}"):
+        local_name = await resolve_territory_name(local_type, local_code) or "unknoing"
 
-    # 4. Prepare processed data
+    # 3. Prepare processed data
     processed_data = {
         "local_name": local_name,
         "local_id": local_code,
@@ -55,14 +98,190 @@ def get_raw_fire_data_of_cache(local_type: str, local_code: str, grouping: str)
         "monthly": data.get("monthly", []),
     }
 
-    # 5. Cache the data
-    set_raw_data_to_cache(local_type, local_code, grouping, processed_data)
+    # 4. Cache the data (columnar conversion, pre-serialized bodies and the SQLite write)
+    #    in a worker thread, so a slow disk write does not stall the event loop
+    with span(SERIALIZATION, "raw data"):
+        return await run_in_threadpool(set_raw_data_to_cache, local_type, local_code, grouping, processed_data)
+
+
+async def load_fire_series(local_type: str, local_code: str, grouping: str) -> FireSeries:
+    """
+    Returns the cached series of a territory, fetching and caching it when missing.
+
+    Stale-while-revalidate:
+    - a fresh entry is returned as is;
+    - an expired entry still within the max-stale window is returned immediately,
+      and a refresh runs in the background;
+    - otherwise the data is fetched, and if the upstream fails the last good value
+      (of any age) is served instead of the error.
+
+    Concurrent misses for the same key are coalesced: only one upstream fetch is in
+    flight per key, and the other callers wait for its result (or its error).
+
+    Regions (type "region") have no upstream series: their stored copy is served at any
+    age and never revalidated here; `aggregate_territories` rebuilds them from their members.
+
+    Args:
+        local_type: Type of the territory (e.g., "state", "municipality").
+        local_code: Unique code of the territory.
+        grouping: Grouping option for aggregation (e.g., "biome").
+
+    Returns:
+        FireSeries: The cached columnar series.
+
+    Raises:
+        HTTPException: 404 for a region that is not cached, or the upstream error when
+        there is no last good value.
+    """
+    if local_type == REGION_TYPE:
+        return await _stored_region(local_code)
+
+    # Try cache
+    with span(CACHE_LOOKUP, f"{local_type}/{local_code}/{grouping}"):
+        cached_data, stale_data = await _read_cache(_fresh_or_stale, local_type, local_code, grouping)
+    if cached_data:
+        return cached_data
+
+    # Serve stale data while it is refreshed in the background
+    if stale_data:
+        _revalidate_in_background(local_type, local_code, grouping)
+        return stale_data
+
+    try:
+        return await refresh_fire_series(local_type, local_code, grouping)
+    except HTTPException:
+        # Upstream failed: keep serving the last good value if there is one
+        last_good = await _read_cache(show_all_data, local_type, local_code, grouping)
+        if last_good:
+            return last_good
+        raise
+
+
+async def _stored_region(region_id: str) -> FireSeries:
+    with span(CACHE_LOOKUP, f"{REGION_TYPE}/{region_id}"):
+        cached_data = await _read_cache(show_all_data, REGION_TYPE, region_id, REGION_GROUPING)
+    if cached_data is None:
+        raise HTTPException(status_code=404, detail="Region not cached: build it with POST /data/region.")
+    return cached_data
+
+
+def _revalidate_in_background(local_type: str, local_code: str, grouping: str):
+    key = (local_type, local_code, grouping)
+    # Don't hammer a failing upstream: wait a bit after a failed refresh
+    if time.monotonic() - _failed_refreshes.get(key, -REVALIDATE_RETRY_SECONDS) < REVALIDATE_RETRY_SECONDS:
+        return
+
+    task = asyncio.create_task(_revalidate(local_type, local_code, grouping))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def _revalidate(local_type: str, local_code: str, grouping: str):
+    key = (local_type, local_code, grouping)
+    try:
+        await refresh_fire_series(local_type, local_code, grouping)
+        _failed_refreshes.pop(key, None)
+    except Exception as error:
+        # Any failure (upstream, disk tier...) leaves the stale value in cache, still served
+        _failed_refreshes[key] = time.monotonic()
+        logger.warning("Background refresh failed for %s: %s", "/".join(key),
+                       error.detail if isinstance(error, HTTPException) else repr(error))
+
+
+def data_age_headers(cached_data: FireSeries) -> Dict[str, str]:
+    """
+    Response headers describing the age of the served data.
+    """
+    return {
+        "X-Data-Age-Days": str(data_age_days(cached_data)),
+        "X-Cache-Status": "fresh" if is_entry_fresh(cached_data) else "stale",
+    }
+
+
+async def refresh_fire_series(local_type: str, local_code: str, grouping: str) -> FireSeries:
+    """
+    Fetches the series of a territory from the external API even if it is cached
+    (e.g. to renew it before it expires), and stores it in the cache.
+    Concurrent calls for the same key share a single fetch.
+
+    Raises:
+        HTTPException: 404 for a region, which is rebuilt from its members instead
+        (see `aggregate_territories`).
+    """
+    if local_type == REGION_TYPE:
+        raise HTTPException(status_code=404, detail="Regions have no upstream series: build them with POST /data/region.")
+    # Fetch once per key, however many callers are waiting for it
+    return await _fetch_flight.do(
+        (local_type, local_code, grouping),
+        lambda: _fetch_and_cache(local_type, local_code, grouping),
+    )
+
+
+def _respond(cached_data: FireSeries, representation: str, etag: str, build: Callable,
+             request: Optional[Request], response: Optional[Response]) -> Union[RawFireData, CachedData, Response]:
+    """
+    Answers a read of a cached entry.
+
+    For HTTP requests the body is never rebuilt: a bare 304 is sent when the client's
+    copy is still valid, otherwise the bytes serialized at cache write time, in the
+    variant (br, gzip or identity) chosen from Accept-Encoding. Without a request
+    (direct calls) the response model is built.
+    """
+    if request is None:
+        if response is not None:
+            response.headers.update(data_age_headers(cached_data))
+        with span(SERIALIZATION, f"{representation} model"):
+            return build()
+
+    with span(SERIALIZATION, f"{representation} body"):
+        body, encoding = cached_data.body(representation).choose(request.headers.get("accept-encoding"))
+    if encoding:
+        # Strong validators must differ between content codings of the same data
+        etag = f'{etag[:-1]}-{encoding}"'
+
+    # The raw series only changes on refresh. The statistics change whenever they are
+    # (re)computed, so shared caches must revalidate them on every reuse
+    max_age = remaining_ttl_seconds(cached_data) if representation == "raw" else None
+
+    headers = {
+        **data_age_headers(cached_data),
+        **validator_headers(etag, cached_data.modified_at, max_age),
+        "Vary": "Accept-Encoding",
+    }
+    if is_not_modified(request, etag, cached_data.modified_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
-    # 6. Return as Pydantic model
-    return RawFireData(**processed_data)
+async def get_raw_fire_data_of_cache(local_type: str, local_code: str, grouping: str,
+                                     response: Optional[Response] = None,
+                                     request: Optional[Request] = None) -> Union[RawFireData, Response]:
+    """
+    Fetches fire data for a territory, using cache when available.
 
+    Args:
+        local_type: Type of the territory (e.g., "state", "municipality").
+        local_code: Unique code of the territory.
+        grouping: Grouping option for aggregation (e.g., "biome").
+        response: If given, receives the data age headers (direct calls only).
+        request: If given, the pre-serialized body is sent and the conditional headers are honoured.
 
-def get_all_fire_data_from_cache(local_type: str, local_code: str, grouping: str) -> CachedData:
+    Returns:
+        RawFireData: Validated fire data for the requested territory, or, for an HTTP
+        request, a response with the pre-serialized body (or a 304).
+    """
+    cached_data = await load_fire_series(local_type, local_code, grouping)
+
+    # Pre-serialized bytes for HTTP requests, Pydantic model (built from the cached arrays) otherwise
+    return _respond(cached_data, "raw", cached_data.raw_etag, cached_data.to_raw_fire_data, request, response)
+
+
+def get_all_fire_data_from_cache(local_type: str, local_code: str, grouping: str,
+                                 response: Optional[Response] = None,
+                                 request: Optional[Request] = None) -> Union[CachedData, Response]:
     """
     Returns all fire data stored in the cache, including raw data and statistics.
 
@@ -70,12 +289,154 @@ def get_all_fire_data_from_cache(local_type: str, local_code: str, grouping: str
         local_type: Type of the territory.
         local_code: Code of the territory.
         grouping: Grouping option.
+        response: If given, receives the data age headers (direct calls only).
+        request: If given, the pre-serialized body is sent and the conditional headers are honoured.
 
     Returns:
-        CachedData: The cached data object.
+        CachedData: The cached data object, or, for an HTTP request, a response with
+        the pre-serialized body (or a 304).
     """
 
     cached_data = show_all_data(local_type, local_code, grouping)
     if cached_data:
-        return cached_data
+        return _respond(cached_data, "cached", cached_data.cached_etag, cached_data.to_cached_data, request, response)
     return None
+
+
+# --- Region aggregation --- #
+
+def canonical_region(territories: Sequence[TerritoryKey],
+                     weights: Optional[Sequence[float]] = None) -> Tuple[str, List[Tuple[Tuple[str, str, str], float]]]:
+    """
+    Canonical form of a region: its members sorted by key, with the weights of repeated
+    keys added up, and the id it is cached under (a hash of that form), so the same set
+    of territories gets the same cache entry whatever the request order.
+
+    Args:
+        territories: Member keys.
+        weights: One weight per member (all 1 for a plain sum).
+
+    Returns:
+        The region id and the sorted ((local_type, local_code, grouping), weight) members.
+    """
+    if weights is None:
+        weights = [1.0] * len(territories)
+    if len(weights) != len(territories):
+        raise HTTPException(status_code=422, detail="There must be one weight per territory.")
+    if not territories:
+        raise HTTPException(status_code=422, detail="A region needs at least one territory.")
+
+    combined: Dict[Tuple[str, str, str], float] = {}
+    for key, weight in zip(territories, weights):
+        member = (key.local_type, key.local_code, key.grouping)
+        combined[member] = combined.get(member, 0.0) + float(weight)
+    members = sorted(combined.items())
+
+    digest = hashlib.blake2b(digest_size=12)
+    for (local_type, local_code, grouping), weight in members:
+        digest.update(f"{local_type}/{local_code}/{grouping}={weight!r};".encode())
+    return digest.hexdigest(), members
+
+
+def _period_keys(series: FireSeries, interval: str) -> np.ndarray:
+    # One sortable integer per period: year (annual) or year * 100 + month (monthly)
+    keys = series.years(interval).astype(np.int32)
+    months = series.months(interval)
+    return keys * 100 + months if months is not None else keys
+
+
+def align_series(series: Sequence[FireSeries], interval: str) -> Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]:
+    """
+    Aligns the series of many territories on the union of their periods.
+
+    Args:
+        series: Member series.
+        interval: "annual" or "monthly".
+
+    Returns:
+        Years and months (None for the annual interval) of the sorted period axis, and a dense
+        matrix of areaHa (members × periods) with 0 where a member has no data for a period.
+    """
+    keys = [_period_keys(member, interval) for member in series]
+    all_keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int32)
+    axis = np.unique(all_keys)
+
+    # One bincount over (member, period) cells fills the whole matrix
+    rows = np.repeat(np.arange(len(series)), [member_keys.size for member_keys in keys])
+    cells = rows * axis.size + np.searchsorted(axis, all_keys)
+    areas = np.concatenate([member.area(interval) for member in series]) if keys else np.empty(0)
+    matrix = np.bincount(cells, weights=areas, minlength=len(series) * axis.size).reshape(len(series), axis.size)
+
+    if interval == "monthly":
+        return (axis // 100).astype(YEAR_DTYPE), (axis % 100).astype(MONTH_DTYPE), matrix
+    return axis.astype(YEAR_DTYPE), None, matrix
+
+
+async def _load_members(members: List[Tuple[Tuple[str, str, str], float]], concurrency: int) -> List[FireSeries]:
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def load(key: Tuple[str, str, str]) -> FireSeries:
+        async with limit:
+            try:
+                return await load_fire_series(*key)
+            except HTTPException as error:
+                raise HTTPException(status_code=error.status_code, detail=f"{'/'.join(key)}: {error.detail}")
+
+    return await asyncio.gather(*(load(key) for key, _weight in members))
+
+
+def _aggregate(region_id: str, members: List[Tuple[Tuple[str, str, str], float]],
+               series: List[FireSeries]) -> FireSeries:
+    weights = np.array([weight for _key, weight in members], dtype=AREA_DTYPE)
+    columns = {}
+    for interval in ("annual", "monthly"):
+        years, months, matrix = align_series(series, interval)
+        # Rounded like the upstream areas, so float error does not show up (7137.650000000001)
+        columns[interval] = (years, months, np.round(weights @ matrix, 2))
+
+    return FireSeries(
+        local_name=f"Region of {len(members)} territories",
+        local_id=region_id,
+        local_type=REGION_TYPE,
+        grouping=REGION_GROUPING,
+        annual_year=columns["annual"][0],
+        annual_area=columns["annual"][2],
+        monthly_year=columns["monthly"][0],
+        monthly_month=columns["monthly"][1],
+        monthly_area=columns["monthly"][2],
+        # The region expires with its oldest member
+        last_updated=min(member.last_updated for member in series),
+    )
+
+
+async def aggregate_territories(territories: Sequence[TerritoryKey], weights: Optional[Sequence[float]] = None,
+                                concurrency: int = AGGREGATE_CONCURRENCY) -> FireSeries:
+    """
+    Rolls the series of many territories up into one region series (a plain or weighted sum).
+
+    The members are loaded through the cache (fetching missing ones upstream) with at most
+    `concurrency` loads in flight, aligned on the union of their (year, month) periods and
+    summed with their weights. The result is cached under ("region", <region id>, "region"),
+    where the id comes from `canonical_region`, and is reused while it is fresh.
+
+    Args:
+        territories: Member keys (e.g. the municipalities of a custom region).
+        weights: One weight per member, or None for a plain sum.
+        concurrency: Maximum number of members loaded at once.
+
+    Returns:
+        FireSeries: The cached region series.
+
+    Raises:
+        HTTPException: 422 for an invalid region, or the error of a member that could not be loaded.
+    """
+    region_id, members = canonical_region(territories, weights)
+    cached_data = await _read_cache(get_raw_data_from_cache, REGION_TYPE, region_id, REGION_GROUPING)
+    if cached_data:
+        return cached_data
+
+    async def build() -> FireSeries:
+        series = await _load_members(members, concurrency)
+        return await run_in_threadpool(set_series_to_cache, _aggregate(region_id, members, series))
+
+    return await _region_flight.do(region_id, build)
@@ -0,0 +1,63 @@
+# services/http_cache.py
+
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: a W/ prefix is ignored
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(request: Request, etag: str, modified_at: float) -> bool:
+    """
+    Evaluates the conditional request headers against the current representation.
+
+    If-None-Match takes precedence; If-Modified-Since is only used when the client
+    sent no ETag (RFC 9110, section 13.2.2).
+
+    Args:
+        request: The incoming request.
+        etag: Current strong ETag of the representation.
+        modified_at: Unix time of the last change of the representation.
+
+    Returns:
+        bool: True if the client's copy is still valid and a 304 can be sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have a one-second resolution
+        return int(modified_at) <= since
+
+    return False
+
+
+def validator_headers(etag: str, modified_at: float, max_age: Optional[int]) -> Dict[str, str]:
+    """
+    Builds the ETag, Last-Modified and Cache-Control headers of a cached representation.
+
+    Args:
+        etag: Strong ETag of the representation.
+        modified_at: Unix time of the last change of the representation.
+        max_age: Seconds the representation may be reused without revalidation, or None
+                 when every reuse must be revalidated (no-cache, answered with a 304).
+    """
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified_at, usegmt=True),
+        "Cache-Control": f"public, max-age={max_age}" if max_age is not None else "public, no-cache",
+    }
+
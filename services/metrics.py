@@ -0,0 +1,313 @@
+# services/metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from data.cache_manager import get_cache_stats
+from data.encoded_body import encode_stats
+
+# Bucket upper bounds in seconds: upstream calls and requests (ms to tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Statistics functions run in microseconds to a few hundred milliseconds
+FUNCTION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with labels. `inc` takes the label values in declaration order.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values]
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets and labels. Observing costs one binary search
+    and a few additions under a lock, so it can stay on in production.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """
+        Context manager observing the duration of its block.
+        """
+        return _Timer(self, labels)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Value that can go up and down, with labels. `set` takes the label values in declaration order.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values]
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+# --- Metrics of the application --- #
+
+UPSTREAM_LATENCY = Histogram(
+    "firemetrics_upstream_request_seconds", "Latency of the calls to the external APIs.", ("endpoint",)
+)
+UPSTREAM_REQUESTS = Counter(
+    "firemetrics_upstream_requests_total", "Calls to the external APIs by outcome.", ("endpoint", "outcome")
+)
+FUNCTION_LATENCY = Histogram(
+    "firemetrics_statistics_function_seconds", "Run time of each statistics function.", ("function",),
+    buckets=FUNCTION_BUCKETS,
+)
+UPSTREAM_RETRIES = Counter(
+    "firemetrics_upstream_retries_total", "Retries of failed calls to the external APIs by reason.",
+    ("endpoint", "reason")
+)
+UPSTREAM_THROTTLED_SECONDS = Counter(
+    "firemetrics_upstream_throttled_seconds_total", "Time calls waited for the outbound rate limit.", ("host",)
+)
+# 0 closed, 1 half open, 2 open
+CIRCUIT_STATE = Gauge(
+    "firemetrics_upstream_circuit_state", "Circuit breaker state per upstream host (0 closed, 1 half open, 2 open).",
+    ("host",)
+)
+REQUEST_LATENCY = Histogram(
+    "firemetrics_http_request_seconds", "Latency of the API requests by route.", ("method", "route")
+)
+REQUESTS = Counter(
+    "firemetrics_http_requests_total", "API requests by route and status code.", ("method", "route", "status")
+)
+
+_METRICS = (UPSTREAM_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_RETRIES, UPSTREAM_THROTTLED_SECONDS, CIRCUIT_STATE,
+            FUNCTION_LATENCY, REQUEST_LATENCY, REQUESTS)
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+# Caches reported by /metrics, by name: function returning CacheEngine.stats()
+_caches: Dict[str, Callable[[], dict]] = {"series": get_cache_stats}
+
+_CACHE_COUNTERS = ("hits", "stale_hits", "misses", "evictions", "expirations")
+_CACHE_GAUGES = ("entries", "bytes", "max_entries", "max_bytes")
+
+
+def register_cache(name: str, stats: Callable[[], dict]):
+    """
+    Adds a CacheEngine to the cache metrics, under the label cache="<name>".
+    """
+    _caches[name] = stats
+
+
+def _cache_lines() -> List[str]:
+    stats = {name: get_stats() for name, get_stats in _caches.items()}
+    lines = []
+    for field in (*_CACHE_COUNTERS, *_CACHE_GAUGES):
+        kind = "counter" if field in _CACHE_COUNTERS else "gauge"
+        name = f"firemetrics_cache_{field}_total" if kind == "counter" else f"firemetrics_cache_{field}"
+        lines += [f"# HELP {name} Cache {field.replace('_', ' ')}.", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache}"}} {values[field]}' for cache, values in stats.items()]
+    return lines
+
+
+def _serialization_lines() -> List[str]:
+    stats = encode_stats()
+    lines = []
+    for phase in ("serialize", "compress"):
+        name = f"firemetrics_body_{phase}_seconds"
+        lines += [
+            f"# HELP {name} Time spent encoding pre-serialized response bodies ({phase}).",
+            f"# TYPE {name} summary",
+            f"{name}_sum {_number(stats[f'{phase}_seconds'])}",
+            f"{name}_count {stats['calls']}",
+        ]
+    lines += [
+        "# HELP firemetrics_body_bytes_total Bytes of JSON encoded into pre-serialized bodies.",
+        "# TYPE firemetrics_body_bytes_total counter",
+        f"firemetrics_body_bytes_total {stats['bytes']}",
+    ]
+    return lines
+
+
+def render() -> str:
+    """
+    Renders every metric in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines += metric.expose()
+    lines += _cache_lines()
+    lines += _serialization_lines()
+    return "\n".join(lines) + "\n"
+
+
+def _route_label(scope: dict) -> str:
+    # Path template of the matched route, so territory codes do not create new series
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and status code of every HTTP request by route.
+    The latency runs until the last body chunk is sent (streamed responses included).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = _route_label(scope)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, scope["method"], route)
+            REQUESTS.inc(scope["method"], route, str(status_code[0]))
+
+
+def observe_functions(timings: Iterable[Tuple[str, float]]):
+    """
+    Records the run time of statistics functions, given as (function name, seconds) pairs.
+    """
+    for name, seconds in timings:
+        FUNCTION_LATENCY.observe(seconds, name)
+
+
+def observe_upstream(endpoint: str, outcome: str, seconds: float):
+    """
+    Records one call to an external API.
+    """
+    UPSTREAM_LATENCY.observe(seconds, endpoint)
+    UPSTREAM_REQUESTS.inc(endpoint, outcome)
+
+
+def observe_retry(endpoint: str, reason: str):
+    """
+    Records one retry of a call to an external API (reason: "5xx", "429", "timeout" or "connection").
+    """
+    UPSTREAM_RETRIES.inc(endpoint, reason)
+
+
+def observe_rejected(endpoint: str):
+    """
+    Records a call refused without reaching the network because the circuit breaker is open.
+    """
+    UPSTREAM_REQUESTS.inc(endpoint, "circuit_open")
+
+
+def observe_throttled(host: str, seconds: float):
+    """
+    Records the time a call waited for the outbound rate limit of a host.
+    """
+    UPSTREAM_THROTTLED_SECONDS.inc(host, amount=seconds)
+
+
+def observe_circuit_state(host: str, state: str):
+    """
+    Sets the circuit breaker state gauge of an upstream host.
+    """
+    CIRCUIT_STATE.set(_CIRCUIT_STATES[state], host)
@@ -0,0 +1,354 @@
+# services/profiling.py
+
+import asyncio
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Shared secret: profiling (header, sampling and /admin/profiles) is off while it is empty
+PROFILE_TOKEN = os.getenv("FIREMETRICS_PROFILE_TOKEN", "")
+# Requests sent with this header set to PROFILE_TOKEN are profiled
+PROFILE_HEADER = os.getenv("FIREMETRICS_PROFILE_HEADER", "X-Profile")
+# Fraction (0-1) of the other requests profiled at random; 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.getenv("FIREMETRICS_PROFILE_SAMPLE_RATE", "0"))
+# Sampled requests slower than this (seconds) are kept; requests asked by header are always kept
+PROFILE_SLOW_SECONDS = float(os.getenv("FIREMETRICS_PROFILE_SLOW_SECONDS", "1.0"))
+# Seconds between two stack samples of a profiled request
+PROFILE_INTERVAL = float(os.getenv("FIREMETRICS_PROFILE_INTERVAL_SECONDS", "0.005"))
+# Number of profiles kept in memory (oldest dropped first)
+PROFILE_RING_SIZE = int(os.getenv("FIREMETRICS_PROFILE_RING_SIZE", "50"))
+
+# Names of the per-phase spans
+CACHE_LOOKUP = "cache_lookup"
+UPSTREAM_FETCH = "upstream_fetch"
+NAME_LOOKUP = "name_lookup"
+POOL_DISPATCH = "pool_dispatch"
+STAT_KERNELS = "stat_kernels"
+SERIALIZATION = "serialization"
+
+
+@dataclass(slots=True)
+class Span:
+    """
+    One timed phase of a profiled request (offsets in milliseconds from the request start).
+    """
+    phase: str
+    detail: str
+    start_ms: float
+    duration_ms: float
+    thread: str
+
+
+@dataclass(eq=False)
+class ProfileSession:
+    """
+    Profile of one request: its spans and the collapsed stacks sampled while it ran.
+    """
+    id: int
+    method: str
+    path: str
+    reason: str                                  # "header" or "sampled"
+    started_at: float                            # Unix time
+    started: float = field(default_factory=time.perf_counter)
+    duration_ms: float = 0.0
+    status: int = 0
+    spans: List[Span] = field(default_factory=list)
+    samples: Counter = field(default_factory=Counter)
+    # Event loop running the request, its thread and the task the ASGI call runs in
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    loop_thread: Optional[int] = None
+    task: Optional[asyncio.Task] = None
+    # Worker threads currently running a span of this request, with their nesting depth
+    threads: Dict[int, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def summary(self) -> dict:
+        """
+        Overview of the profile: request, duration, sample count and time per phase.
+        """
+        phases: Dict[str, float] = {}
+        for span in self.spans:
+            phases[span.phase] = phases.get(span.phase, 0.0) + span.duration_ms
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": sum(self.samples.values()),
+            "phases_ms": {phase: round(total, 3) for phase, total in phases.items()},
+        }
+
+    def to_dict(self) -> dict:
+        """
+        Full profile: the summary plus every span and the collapsed stacks.
+        """
+        return {
+            **self.summary(),
+            "spans": [
+                {"phase": span.phase, "detail": span.detail, "start_ms": round(span.start_ms, 3),
+                 "duration_ms": round(span.duration_ms, 3), "thread": span.thread}
+                for span in self.spans
+            ],
+            "stacks": dict(self.samples.most_common()),
+        }
+
+    def collapsed(self) -> str:
+        """
+        Samples in the collapsed-stack format ("root;caller;callee count" per line)
+        read by flamegraph.pl, speedscope and most flame graph viewers.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+_session: ContextVar[Optional[ProfileSession]] = ContextVar("firemetrics_profile", default=None)
+_ids = itertools.count(1)
+_profiles: deque = deque(maxlen=PROFILE_RING_SIZE)
+_profiles_lock = threading.Lock()
+
+
+# --- Spans --- #
+
+class _NoSpan:
+    # Shared no-op context manager: a span costs one ContextVar lookup when not profiling
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("session", "phase", "detail", "started", "thread_id")
+
+    def __init__(self, session: ProfileSession, phase: str, detail: str):
+        self.session = session
+        self.phase = phase
+        self.detail = detail
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        if self.thread_id != self.session.loop_thread:
+            # Work done for the request in a worker thread is sampled while the span is open
+            with self.session.lock:
+                self.session.threads[self.thread_id] = self.session.threads.get(self.thread_id, 0) + 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        finished = time.perf_counter()
+        session = self.session
+        with session.lock:
+            if self.thread_id != session.loop_thread:
+                depth = session.threads.get(self.thread_id, 1) - 1
+                if depth:
+                    session.threads[self.thread_id] = depth
+                else:
+                    session.threads.pop(self.thread_id, None)
+            session.spans.append(Span(
+                self.phase, self.detail, (self.started - session.started) * 1000,
+                (finished - self.started) * 1000, threading.current_thread().name,
+            ))
+        return False
+
+
+def span(phase: str, detail: str = ""):
+    """
+    Times a phase of the current request when it is profiled (a no-op otherwise).
+
+        with span(CACHE_LOOKUP, "state/35/biome"):
+            ...
+    """
+    session = _session.get()
+    if session is None:
+        return _NO_SPAN
+    return _ActiveSpan(session, phase, detail)
+
+
+def record_span(phase: str, detail: str, seconds: float):
+    """
+    Adds a span measured elsewhere (e.g. a statistics function timed in a worker process),
+    ending now.
+    """
+    session = _session.get()
+    if session is None:
+        return
+    ended = (time.perf_counter() - session.started) * 1000
+    with session.lock:
+        session.spans.append(Span(phase, detail, ended - seconds * 1000, seconds * 1000, "worker process"))
+
+
+# --- Stack sampler --- #
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def _runs_request(session: ProfileSession) -> bool:
+    # The event loop thread is shared by every request: only count it while it runs this one
+    task = asyncio.current_task(session.loop) if session.loop is not None else None
+    if task is None:
+        return False
+    if task is session.task:
+        return True
+    get_context = getattr(task, "get_context", None)  # Python 3.12+
+    return get_context is not None and get_context().get(_session) is session
+
+
+class _Sampler:
+    """
+    Background thread sampling the stacks of the threads working for profiled requests.
+    It only wakes up while at least one request is being profiled.
+    """
+
+    def __init__(self):
+        self._sessions: set = set()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, session: ProfileSession):
+        with self._condition:
+            self._sessions.add(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def remove(self, session: ProfileSession):
+        with self._condition:
+            self._sessions.discard(session)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._sessions:
+                    self._condition.wait()
+                sessions = list(self._sessions)
+            self._sample(sessions)
+            time.sleep(PROFILE_INTERVAL)
+
+    @staticmethod
+    def _sample(sessions: List[ProfileSession]):
+        frames = sys._current_frames()
+        for session in sessions:
+            with session.lock:
+                thread_ids = list(session.threads)
+            if session.loop_thread is not None and _runs_request(session):
+                thread_ids.append(session.loop_thread)
+            stacks = [_collapse(frames[thread_id]) for thread_id in thread_ids if thread_id in frames]
+            with session.lock:
+                session.samples.update(stacks)
+
+
+_sampler = _Sampler()
+
+
+# --- Middleware and stored profiles --- #
+
+def profiling_enabled() -> bool:
+    """
+    Whether profiling is on, i.e. FIREMETRICS_PROFILE_TOKEN is set.
+    """
+    return bool(PROFILE_TOKEN)
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """
+    Whether `token` is the profiling token (always False while profiling is off).
+    """
+    if not profiling_enabled() or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def _profile_reason(scope: dict) -> Optional[str]:
+    if not profiling_enabled():
+        return None
+    header = PROFILE_HEADER.lower().encode()
+    for name, value in scope.get("headers", ()):
+        if name == header:
+            return "header" if hmac.compare_digest(value, PROFILE_TOKEN.encode()) else None
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling opt-in requests: those sent with the X-Profile header set
+    to PROFILE_TOKEN, and a random PROFILE_SAMPLE_RATE share of the others. Nothing is
+    profiled while PROFILE_TOKEN is empty.
+
+    A profiled request records its per-phase spans (see `span`) and stack samples of the
+    threads working for it. Its profile id is returned in the X-Profile-Id header. Profiles
+    asked by header, and sampled ones slower than PROFILE_SLOW_SECONDS, are kept in a
+    bounded ring (see `list_profiles` and `get_profile`).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        reason = _profile_reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(
+            id=next(_ids), method=scope["method"], path=scope["path"], reason=reason, started_at=time.time(),
+            loop=asyncio.get_running_loop(), loop_thread=threading.get_ident(), task=asyncio.current_task(),
+        )
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                session.status = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-profile-id", str(session.id).encode())]
+            await send(message)
+
+        token = _session.set(session)
+        _sampler.add(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _sampler.remove(session)
+            _session.reset(token)
+            session.duration_ms = (time.perf_counter() - session.started) * 1000
+            if reason == "header" or session.duration_ms >= PROFILE_SLOW_SECONDS * 1000:
+                with _profiles_lock:
+                    _profiles.append(session)
+
+
+def list_profiles() -> List[dict]:
+    """
+    Summaries of the kept profiles, newest first.
+    """
+    with _profiles_lock:
+        return [session.summary() for session in reversed(_profiles)]
+
+
+def get_profile(profile_id: int) -> Optional[ProfileSession]:
+    """
+    Returns a kept profile by id, or None if it was never kept or already dropped from the ring.
+    """
+    with _profiles_lock:
+        return next((session for session in _profiles if session.id == profile_id), None)
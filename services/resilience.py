@@ -0,0 +1,130 @@
+# services/resilience.py
+
+import random
+import time
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class TokenBucket:
+    """
+    Limits a rate of calls: `rate` tokens per second are added, up to `burst`, and each
+    call takes one.
+
+    Callers that find the bucket empty reserve the next token anyway and are told how
+    long to sleep until it is due, so waiters are served in arrival order without polling.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self.throttled = 0          # Calls that had to wait for a token
+        self.throttled_seconds = 0.0
+
+    def reserve(self) -> float:
+        """
+        Takes a token and returns how long to wait (in seconds) before using it.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        wait = -self._tokens / self.rate
+        self.throttled += 1
+        self.throttled_seconds += wait
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Stops calling an unhealthy dependency for a while.
+
+    - closed: calls go through; after `failure_threshold` consecutive failures the
+      breaker opens;
+    - open: calls are refused until `reset_seconds` have passed;
+    - half_open: one probe call goes through; its success closes the breaker, its
+      failure opens it again. If the probe never reports back, another one is let
+      through after `reset_seconds`.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_seconds: Time the breaker stays open before a probe is allowed.
+        on_change: Called with the new state on every transition (e.g. to update a gauge).
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float,
+                 on_change: Optional[Callable[[str], None]] = None):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_seconds = reset_seconds
+        self._on_change = on_change
+        self.state = CLOSED
+        self.failures = 0           # Consecutive failures
+        self._opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0           # Calls refused while open
+        self.retries = 0            # Retries of calls through this breaker (see fetch_external_api_data)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            if self._on_change is not None:
+                self._on_change(state)
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go through now. Refused calls are counted in `rejected`.
+        """
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at >= self.reset_seconds:
+            # Let one probe through, and re-arm the timer in case it never reports back
+            self._opened_at = now
+            self._set_state(HALF_OPEN)
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._set_state(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+            self._set_state(OPEN)
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the next probe is allowed (0 when closed).
+        """
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after_seconds": round(self.retry_after(), 3),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retries": self.retries,
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter: a random delay between 0 and
+    min(cap, base * 2 ** attempt), so clients retrying together spread out.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,60 @@
+# services/single_flight.py
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent calls that share the same key.
+
+    The first caller for a key starts the work as a task; every caller arriving while
+    it is in flight waits on that same task and gets the same result, or the same
+    exception. Once the task finishes, the key is released and the next call starts
+    fresh work.
+
+    The task is shielded from its callers: if the client that started it disconnects,
+    the work still completes for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0      # Calls that did the work
+        self.coalesced = 0    # Calls that waited on a call already in flight
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `func()` for `key`, unless a call with the same key is already in flight.
+
+        Args:
+            key: Identifies the work (e.g. the cache key).
+            func: Coroutine function doing the work.
+
+        Returns:
+            The result of the call in flight for `key`.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """
+        Number of keys currently being processed.
+        """
+        return len(self._calls)
@@ -1,14 +1,39 @@
 # statistics.py
-from concurrent.futures import ProcessPoolExecutor
-from statistics_math.basic_data import basic_stats
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import replace
+from datetime import date
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from statistics_math.basic_data import basic_stats, basic_stats_matrix, basic_stats_from_row
+from statistics_math.incremental import RunningAggregates, aggregates_from_values
+from data.cache_engine import CacheEngine
 from data.cache_manager import (
-    get_raw_data_from_cache)
-from statistics_math.descriptive_stats import (
-    calculate_coefficient_of_variation,
-    detect_anomalies,
-    calculate_concentration_index,
-    calculate_large_event_proportion,
-    count_events_by_size_bin)
+    CACHE_TTL,
+    get_raw_data_from_cache,
+    get_stale_data_from_cache,
+    set_statistics_to_cache)
+from data.fire_series import FireSeries
+from data.pydantic_models import (
+    BasicSummaryStats,
+    BatchStatisticsResult,
+    TerritoryKey,
+    Statistics,
+    AnnualStatistics,
+    MonthlyStatistics,
+    DescriptiveStats,
+    TimeSeriesStats)
+from services.fire_data import aggregate_territories, load_fire_series
+from services.metrics import FUNCTION_LATENCY, register_cache
+from services.profiling import CACHE_LOOKUP, SERIALIZATION, STAT_KERNELS, span
+from services.worker_pool import run_functions
+from statistics_math.descriptive_stats import EVENT_BIN_EDGES, descriptive_stats
 from statistics_math.time_series_analysis import (
     calculate_yearly_growth_rate,
     calculate_linear_trend,
@@ -16,30 +41,448 @@ from statistics_math.time_series_analysis import (
     calculate_rolling_mean,
     compare_to_historical_average)
 
-def run_statistics(local_type: str, local_code: str, grouping: str, interval: str):
-    # Step 1. Run the main function to generate basic data
-    cached_data = get_raw_data_from_cache(local_type, local_code, grouping)
-    if cached_data:
-        basic_stats(local_type, local_code, grouping, interval)
+# Where each function's result is stored: (section of the interval statistics, field)
+_RESULT_FIELDS = {
+    calculate_yearly_growth_rate: ("time_series", "yearly_growth_rate"),
+    calculate_linear_trend: ("time_series", "linear_trend_slope"),
+    calculate_seasonal_index: ("time_series", "seasonal_index"),
+    calculate_rolling_mean: ("time_series", "rolling_mean"),
+    compare_to_historical_average: ("time_series", "historical_comparison"),
+}
+
+# Functions computing every field of a section at once (their result is a dict of fields).
+# The descriptive statistics share a single sort of the series this way.
+_SECTION_FUNCTIONS = {
+    descriptive_stats: "descriptive",
+}
+
+_INTERVAL_MODELS = {
+    "annual": AnnualStatistics,
+    "monthly": MonthlyStatistics,
+}
+
+_SECTION_MODELS = {
+    "descriptive": DescriptiveStats,
+    "time_series": TimeSeriesStats,
+}
+
+# Functions whose result only exists for one interval (None for the other)
+_ONLY_FOR_INTERVAL = {
+    calculate_yearly_growth_rate: "annual",
+    calculate_seasonal_index: "monthly",
+}
+
+# Names accepted by `fields=`: a section name, or a field of a section (which selects the
+# function computing it; a descriptive field selects the whole descriptive section)
+STATISTICS_FIELDS = frozenset({
+    "basic", *_SECTION_MODELS, *BasicSummaryStats.model_fields, *DescriptiveStats.model_fields,
+    *TimeSeriesStats.model_fields,
+})
+
+# Version of the statistics functions: bump it whenever a function changes its results,
+# so results memoized by an older version are never served
+STATISTICS_VERSION = 4
+
+# Memoized interval statistics, keyed by the content of the series (see statistics_memo_key)
+STATISTICS_MEMO_MAX_ENTRIES = int(os.getenv("FIREMETRICS_STATISTICS_MEMO_MAX_ENTRIES", "20000"))
+STATISTICS_MEMO_MAX_BYTES = int(os.getenv("FIREMETRICS_STATISTICS_MEMO_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Rough size of a memoized result per series point (statistics lists and the sorted aggregates copy)
+_MEMO_BYTES_PER_POINT = 104
+_MEMO_OVERHEAD_BYTES = 2048
+
+# Everything besides the series that the results depend on
+_FUNCTION_VERSION = f"{STATISTICS_VERSION}:{','.join(f'{edge:g}' for edge in EVENT_BIN_EDGES)}".encode()
+
+_statistics_memo: CacheEngine[Tuple[Any, RunningAggregates]] = CacheEngine(
+    max_entries=STATISTICS_MEMO_MAX_ENTRIES,
+    max_bytes=STATISTICS_MEMO_MAX_BYTES,
+    ttl=CACHE_TTL,
+)
+
+
+def statistics_memo_key(values: np.ndarray, months: Optional[np.ndarray], interval: str) -> str:
+    """
+    Content key of the statistics of a series: a hash of its areaHa values (and month
+    of each period, for the seasonal index), the interval and the function version.
+    Identical series share their statistics, whatever their territory or grouping.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_FUNCTION_VERSION)
+    digest.update(interval.encode())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    if months is not None:
+        digest.update(b"|")
+        digest.update(np.ascontiguousarray(months, dtype=np.int8).tobytes())
+    return digest.hexdigest()
+
+
+def _memoize(memo_key: str, values: np.ndarray, months: Optional[np.ndarray], interval: str,
+             interval_stats) -> Tuple[Any, RunningAggregates]:
+    memoized = (interval_stats, aggregates_from_values(values, months, interval))
+    _statistics_memo.set(
+        memo_key, memoized, values.size * _MEMO_BYTES_PER_POINT + _MEMO_OVERHEAD_BYTES, date.today()
+    )
+    return memoized
+
+
+register_cache("statistics_memo", _statistics_memo.stats)
+
+
+def get_statistics_memo_stats() -> dict:
+    """
+    Returns the counters (hits, misses, evictions) and the current size of the statistics memo.
+    """
+    return _statistics_memo.stats()
+
+
+def clear_statistics_memo():
+    """
+    Drops every memoized result (e.g. after changing a statistics function at runtime).
+    """
+    _statistics_memo.clear()
+
+
+def _row(result, row: Optional[int]):
+    # Functions called with a 2-D array return one result per row
+    if result is None or row is None:
+        return result
+    return result[row]
+
+
+def _build_interval_statistics(interval: str, basic: Optional[BasicSummaryStats], results: Dict[str, Any],
+                               row: Optional[int] = None, current=None):
+    """
+    Merges the results of the statistics functions into AnnualStatistics/MonthlyStatistics.
+    Functions absent from `results` were not run: their fields, and `basic` when it is None,
+    are kept from `current` (the statistics already stored for the interval, if any).
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    for func, (section, field) in _RESULT_FIELDS.items():
+        if func.__name__ in results:
+            sections.setdefault(section, {})[field] = _row(results[func.__name__], row)
+    for func, section in _SECTION_FUNCTIONS.items():
+        if func.__name__ in results:
+            sections.setdefault(section, {}).update(_row(results[func.__name__], row) or {})
+
+    current = current or _INTERVAL_MODELS[interval]()
+    updates = {"basic": basic} if basic is not None else {}
+    for section, fields in sections.items():
+        previous = getattr(current, section)
+        updates[section] = previous.model_copy(update=fields) if previous else _SECTION_MODELS[section](**fields)
+    return current.model_copy(update=updates)
+
+
+def _store_interval_statistics(cached_data: FireSeries, interval: str,
+                               memoized: Tuple[Any, Optional[RunningAggregates]],
+                               merge: Optional[Callable[[Any], Any]] = None) -> FireSeries:
+    """
+    Stores the statistics of one interval, computed from `cached_data`, in its cache entry.
+    `merge` rebuilds partial results on top of the statistics stored meanwhile; complete
+    results replace them. If the cached series changed in the meantime, the results are
+    not stored and a copy of `cached_data` carrying them is returned instead.
+    """
+    interval_stats, aggregates = memoized
+    update = merge or (lambda current: interval_stats)
+    with span(SERIALIZATION, f"statistics {interval}"):
+        stored = set_statistics_to_cache(cached_data, interval, update, aggregates)
+    if stored is not None:
+        return stored
+
+    # The results only belong to the series they were computed from
+    current = getattr(cached_data.statistic, interval) if cached_data.statistic else None
+    statistic = (cached_data.statistic or Statistics()).model_copy(update={interval: update(current)})
+    detached = replace(cached_data, statistic=statistic, bodies=dict(cached_data.bodies))
+    detached.update_statistic_hash(time.time())
+    detached.encode_bodies(("cached",))
+    return detached
+
+
+def _timed(kernel: Callable, *args):
+    # Basic statistics are timed like the functions of run_functions (metrics and profile span)
+    with FUNCTION_LATENCY.time(kernel.__name__), span(STAT_KERNELS, kernel.__name__):
+        return kernel(*args)
+
+
+def compute_interval_statistics(cached_data: FireSeries, interval: str) -> FireSeries:
+    """
+    Computes every statistic of a series for one interval and stores them in its
+    `statistic` field. Results are memoized by series content (see statistics_memo_key),
+    so a series that was already computed, under any key, is answered without running
+    the functions.
+
+    Args:
+        cached_data: The cache entry (fresh or stale).
+        interval: "annual" or "monthly".
+
+    Returns:
+        FireSeries: The cache entry with the updated statistics.
+    """
+    values = cached_data.area(interval)
+    months = cached_data.months(interval)
+
+    # Step 1. Reuse the memoized results of an identical series
+    memo_key = statistics_memo_key(values, months, interval)
+    memoized = _statistics_memo.get(memo_key)
+    if memoized is not None:
+        return _store_interval_statistics(cached_data, interval, memoized)
+
+    # Step 2. Run the main function to generate basic data
+    basic = _timed(basic_stats, values, months, interval)
+
+    # Step 3. List of additional functions (expandable over time)
+    functions = [*_RESULT_FIELDS, *_SECTION_FUNCTIONS]
+
+    # Step 4. Run additional functions on the shared process pool (or inline for small series)
+    results = run_functions(functions, values, months, interval)
+
+    # Step 5. Merge the results into the interval statistics, memoize and store them
+    interval_stats = _build_interval_statistics(interval, basic, results)
+    memoized = _memoize(memo_key, values, months, interval, interval_stats)
+    return _store_interval_statistics(cached_data, interval, memoized)
+
+
+def run_statistics(local_type: str, local_code: str, grouping: str, interval: str) -> Optional[FireSeries]:
+    """
+    Computes every statistic of an already cached series (see `compute_interval_statistics`).
+    Entries expired but still within the max-stale window are used, like the data endpoints do.
+
+    Args:
+        local_type: Type of the territory.
+        local_code: Code of the territory.
+        grouping: Grouping option.
+        interval: "annual" or "monthly".
+
+    Returns:
+        FireSeries: The cache entry with the updated statistics,
+        or None if the raw data is not cached.
+    """
+    with span(CACHE_LOOKUP, f"{local_type}/{local_code}/{grouping}"):
+        cached_data = (get_raw_data_from_cache(local_type, local_code, grouping)
+                       or get_stale_data_from_cache(local_type, local_code, grouping))
+    if not cached_data:
+        return None
+    return compute_interval_statistics(cached_data, interval)
+
+
+def parse_statistics_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    Parses a comma-separated `fields=` value into the set of requested statistics.
+    None (or an empty value) means every statistic.
+
+    Raises:
+        HTTPException: 422 if a name is not a known section or statistic.
+    """
+    names = frozenset(name.strip() for name in (fields or "").split(",") if name.strip())
+    unknown = names - STATISTICS_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown statistics: {', '.join(sorted(unknown))}. Valid names: {', '.join(sorted(STATISTICS_FIELDS))}",
+        )
+    return names or None
+
+
+def _wants(fields: Optional[FrozenSet[str]], section: str, names) -> bool:
+    return fields is None or section in fields or not fields.isdisjoint(names)
+
+
+def _missing_statistics(interval_stats, interval: str, fields: Optional[FrozenSet[str]]) -> Tuple[bool, List]:
+    """
+    Returns whether BasicSummaryStats and which functions are needed to fill the requested
+    statistics of an interval: sections not computed yet and time series fields still None.
+    """
+    current = interval_stats or _INTERVAL_MODELS[interval]()
+    run_basic = current.basic is None and _wants(fields, "basic", BasicSummaryStats.model_fields)
 
-    # Step 2. List of additional functions (expandable over time)
     functions = [
-        calculate_yearly_growth_rate,
-        calculate_linear_trend,
-        detect_anomalies,
-        calculate_seasonal_index,
-        calculate_rolling_mean,
-        calculate_concentration_index,
-        calculate_large_event_proportion,
-        count_events_by_size_bin,
-        calculate_coefficient_of_variation,
-        compare_to_historical_average
+        func for func, section in _SECTION_FUNCTIONS.items()
+        if getattr(current, section) is None and _wants(fields, section, _SECTION_MODELS[section].model_fields)
     ]
+    for func, (section, field) in _RESULT_FIELDS.items():
+        stored = getattr(current, section)
+        if _ONLY_FOR_INTERVAL.get(func, interval) != interval or (stored is not None and getattr(stored, field) is not None):
+            continue
+        if _wants(fields, section, (field,)):
+            functions.append(func)
+    return run_basic, functions
+
+
+def compute_missing_statistics(cached_data: FireSeries, fields: Optional[FrozenSet[str]] = None) -> FireSeries:
+    """
+    Fills in the statistics of a cached series on demand, for both intervals.
+
+    Only what is missing is computed: sections that were never computed and, in the time
+    series section, fields still empty. With `fields`, only the requested statistics are
+    considered. Complete results are memoized like those of `compute_interval_statistics`.
+
+    Args:
+        cached_data: The cache entry (fresh or stale).
+        fields: Requested sections or statistics (see STATISTICS_FIELDS), or None for all.
+
+    Returns:
+        FireSeries: The cache entry with its statistics filled in.
+    """
+    for interval in _INTERVAL_MODELS:
+        interval_stats = getattr(cached_data.statistic, interval) if cached_data.statistic else None
+
+        # Step 1. Find what is missing; nothing to do if every requested statistic is there
+        run_basic, functions = _missing_statistics(interval_stats, interval, fields)
+        if not run_basic and not functions:
+            continue
+
+        # Step 2. Reuse the memoized results of an identical series
+        values = cached_data.area(interval)
+        months = cached_data.months(interval)
+        memo_key = statistics_memo_key(values, months, interval)
+        memoized = _statistics_memo.get(memo_key)
+        if memoized is not None:
+            cached_data = _store_interval_statistics(cached_data, interval, memoized)
+            continue
+
+        # Step 3. Run only the missing functions
+        basic = _timed(basic_stats, values, months, interval) if run_basic else None
+        results = run_functions(functions, values, months, interval)
+        merged = _build_interval_statistics(interval, basic, results, current=interval_stats)
+        if merged == interval_stats:
+            continue  # e.g. a trend slope that stays undefined for a single period
+
+        # Step 4. Memoize complete results, then store. Partial results are merged into the
+        #         statistics stored meanwhile (e.g. other fields computed by a concurrent read)
+        if _missing_statistics(merged, interval, None) == (False, []):
+            memoized = _memoize(memo_key, values, months, interval, merged)
+            cached_data = _store_interval_statistics(cached_data, interval, memoized)
+        else:
+            cached_data = _store_interval_statistics(
+                cached_data, interval, (merged, None),
+                lambda current: _build_interval_statistics(interval, basic, results, current=current),
+            )
+
+    return cached_data
+
+
+async def load_statistics(local_type: str, local_code: str, grouping: str,
+                          fields: Optional[FrozenSet[str]] = None) -> FireSeries:
+    """
+    Loads a series (from cache, or from the API on a miss) and computes its missing
+    statistics in a worker thread, so the first read of the statistics fills them in.
+
+    Raises:
+        HTTPException: If the series cannot be loaded.
+    """
+    cached_data = await load_fire_series(local_type, local_code, grouping)
+    return await run_in_threadpool(compute_missing_statistics, cached_data, fields)
+
+
+async def load_interval_statistics(local_type: str, local_code: str, grouping: str, interval: str) -> FireSeries:
+    """
+    Loads a series like the data endpoints (fresh, stale while it is refreshed, fetched on
+    a miss) and computes its statistics for one interval in a worker thread.
+
+    Raises:
+        HTTPException: If the series cannot be loaded.
+    """
+    cached_data = await load_fire_series(local_type, local_code, grouping)
+    return await run_in_threadpool(compute_interval_statistics, cached_data, interval)
+
+
+async def load_region_statistics(territories: List[TerritoryKey],
+                                 weights: Optional[List[float]] = None) -> FireSeries:
+    """
+    Aggregates a region (see `aggregate_territories`) and computes its full statistics
+    in a worker thread. Both are cached under the region key, so repeating the request
+    is answered from cache.
+    """
+    region = await aggregate_territories(territories, weights)
+    return await run_in_threadpool(compute_missing_statistics, region)
+
+
+async def _load_for_batch(key: TerritoryKey):
+    # Returns the series, or the HTTPException that prevented loading it
+    try:
+        return await load_fire_series(key.local_type, key.local_code, key.grouping)
+    except HTTPException as error:
+        return error
+
+
+async def run_batch_statistics(territories: List[TerritoryKey], interval: str) -> List[BatchStatisticsResult]:
+    """
+    Computes the statistics of many territories at once.
+
+    The series are fetched concurrently (or read from cache), then the statistics are
+    computed in a worker thread by `compute_batch_statistics`, so the event loop stays free.
+
+    Args:
+        territories: Keys of the territories to process.
+        interval: "annual" or "monthly".
+
+    Returns:
+        One BatchStatisticsResult per requested key, in the same order.
+    """
+    loaded = await asyncio.gather(*(_load_for_batch(key) for key in territories))
+    return await run_in_threadpool(compute_batch_statistics, territories, loaded, interval)
+
+
+def compute_batch_statistics(territories: List[TerritoryKey], loaded: List[Union[FireSeries, HTTPException]],
+                             interval: str) -> List[BatchStatisticsResult]:
+    """
+    Computes the statistics of already loaded series in a single vectorized sweep.
+
+    Series whose results are memoized are answered directly. The others are grouped by
+    identical period axis, stacked into one 2-D array per group (territories × periods)
+    and every statistics function runs once per group over all rows.
+    The results are then scattered back into each territory's cache entry.
+
+    Args:
+        territories: Keys of the territories to process.
+        loaded: For each key, its series or the error raised while loading it.
+        interval: "annual" or "monthly".
+
+    Returns:
+        One BatchStatisticsResult per requested key, in the same order.
+    """
+    results: List[BatchStatisticsResult] = [None] * len(territories)
+
+    def store(position: int, cached_data: FireSeries, memoized: Tuple[Any, RunningAggregates]):
+        updated = _store_interval_statistics(cached_data, interval, memoized)
+        results[position] = BatchStatisticsResult(**territories[position].model_dump(), statistic=updated.statistic)
+
+    # Step 1. Answer memoized series, group the others by their (year, month) axis
+    groups: Dict[bytes, List[Tuple[int, FireSeries, str]]] = {}
+    for position, (key, cached_data) in enumerate(zip(territories, loaded)):
+        if isinstance(cached_data, HTTPException):
+            results[position] = BatchStatisticsResult(**key.model_dump(), error=str(cached_data.detail))
+            continue
+
+        months = cached_data.months(interval)
+        memo_key = statistics_memo_key(cached_data.area(interval), months, interval)
+        memoized = _statistics_memo.get(memo_key)
+        if memoized is not None:
+            store(position, cached_data, memoized)
+            continue
+
+        axis = cached_data.years(interval).tobytes() + (months.tobytes() if months is not None else b"")
+        groups.setdefault(axis, []).append((position, cached_data, memo_key))
+
+    functions = [*_RESULT_FIELDS, *_SECTION_FUNCTIONS]
+    for members in groups.values():
+        # Step 2. Stack the group into one matrix and run every function in a single sweep
+        first = members[0][1]
+        months = first.months(interval)
+        matrix = np.stack([cached_data.area(interval) for _position, cached_data, _memo_key in members])
+
+        basic = _timed(basic_stats_matrix, matrix) if matrix.shape[1] else None
+        function_results = run_functions(functions, matrix, months, interval)
+
+        # Step 3. Memoize the rows and scatter them back into each territory's cache entry
+        for row, (position, cached_data, memo_key) in enumerate(members):
+            interval_stats = _build_interval_statistics(
+                interval, basic_stats_from_row(basic, row) if basic else None, function_results, row
+            )
+            memoized = _memoize(memo_key, matrix[row], months, interval, interval_stats)
+            store(position, cached_data, memoized)
 
-    # Step 3. Run additional functions in parallel using multiple processes
-    with ProcessPoolExecutor(max_workers=4) as executor:
-        for func in functions:
-            executor.submit(func, local_type, local_code, grouping, interval)
+    return results
 
 
 '''
@@ -64,7 +507,7 @@ Lista de Funções para Análise de Queimadas
     * Determina se a área total queimada está concentrada em poucos eventos de grande escala.
 
 * **Proporção de Eventos de Grande Escala** (`calculate_large_event_proportion(data)`)
-    * Calcula a porcentagem de eventos que representam uma grande porção do total.
+    * Calcula a fração (0-1) dos períodos no quartil superior; a fração da área total queimada que eles representam fica em `large_event_area_share`.
 
 * **Contagem de Eventos por Faixa de Tamanho** (`count_events_by_size_bin(data, bins)`)
     * Conta quantos eventos se encaixam em categorias de tamanho predefinidas (pequeno, médio, grande, etc.).
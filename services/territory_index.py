@@ -0,0 +1,302 @@
+# services/territory_index.py
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from data.pydantic_models import Territory
+from services.api_HTTPException import fetch_external_api_data
+
+logger = logging.getLogger(__name__)
+
+# Bulk snapshot of Territory records: a local JSON file or an http(s) URL returning a JSON list
+TERRITORY_SNAPSHOT = os.getenv("FIREMETRICS_TERRITORY_SNAPSHOT", os.path.join(".cache", "territories.json"))
+# Seconds between two background reloads of the snapshot
+TERRITORY_REFRESH_INTERVAL = float(os.getenv("FIREMETRICS_TERRITORY_REFRESH_SECONDS", str(24 * 3600)))
+
+# IBGE localities API, for the bulk lists of states and municipalities (MapBiomas uses IBGE codes)
+IBGE_API_URL = os.getenv("FIREMETRICS_IBGE_API_URL", "https://servicodados.ibge.gov.br/api/v1").rstrip("/")
+
+# Brazilian biomes by IBGE biome code (the codes MapBiomas uses); the localities API does not list them
+BIOMES = {1: "Amazônia", 2: "Caatinga", 3: "Cerrado", 4: "Mata Atlântica", 5: "Pampa", 6: "Pantanal"}
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalizes a name for accent- and case-insensitive matching ("São Paulo" -> "sao paulo").
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def _name_suffixes(name: str) -> List[str]:
+    # The normalized name from each word on: "rio de janeiro", "de janeiro", "janeiro"
+    words = normalize_name(name).split(" ")
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+class TerritoryIndex:
+    """
+    In-process index of Territory records.
+
+    - O(1) lookup by (type, code) and by code.
+    - Prefix search on names through a sorted index of normalized name suffixes
+      starting at each word, so "janeiro" and "rio de j" both find "Rio de Janeiro".
+
+    Reads never take a lock: `load` builds new structures and swaps them in at once.
+    `complete` tells whether the index holds a full bulk snapshot, or only the
+    territories learned from upstream searches (whose results it may miss).
+    """
+
+    def __init__(self):
+        self.complete = False
+        self._territories: List[Territory] = []
+        self._by_key: Dict[Tuple[str, int], Territory] = {}
+        self._by_code: Dict[int, List[Territory]] = {}
+        self._names: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._territories)
+
+    def load(self, territories: Iterable[Territory], complete: bool = False):
+        """
+        Replaces the index content with the given territories.
+        `complete` marks them as a full snapshot of every territory.
+        """
+        by_key: Dict[Tuple[str, int], Territory] = {}
+        for territory in territories:
+            by_key[(territory.type, territory.code)] = territory
+
+        ordered = list(by_key.values())
+        by_code: Dict[int, List[Territory]] = {}
+        names: List[Tuple[str, int]] = []
+        for position, territory in enumerate(ordered):
+            by_code.setdefault(territory.code, []).append(territory)
+            names.extend((suffix, position) for suffix in _name_suffixes(territory.name))
+        names.sort()
+
+        # Swap everything at once so concurrent readers see a consistent index
+        self._territories, self._by_key, self._by_code, self._names = ordered, by_key, by_code, names
+        self.complete = complete
+
+    def add(self, territories: Iterable[Territory]):
+        """
+        Adds territories learned elsewhere (e.g. from an upstream search) to the index.
+        Only the new name suffixes are inserted in the sorted name index (no rebuild).
+        Called from the event loop, like the reads, so no reader sees a partial update.
+        """
+        for territory in territories:
+            key = (territory.type, territory.code)
+            if key in self._by_key:
+                continue
+            position = len(self._territories)
+            self._territories.append(territory)
+            self._by_key[key] = territory
+            self._by_code.setdefault(territory.code, []).append(territory)
+            for suffix in _name_suffixes(territory.name):
+                bisect.insort(self._names, (suffix, position))
+
+    def lookup(self, local_type: str, local_code: str) -> Optional[Territory]:
+        """
+        Returns the territory with this type and code, or None.
+        """
+        if not local_code.isdigit():
+            return None
+        return self._by_key.get((local_type, int(local_code)))
+
+    def search(self, search_term: str, limit: int = 50) -> List[Territory]:
+        """
+        Finds territories by code, or by accent-insensitive name prefix (of any word).
+        """
+        term = search_term.strip()
+        if term.isdigit():
+            return list(self._by_code.get(int(term), []))[:limit]
+
+        prefix = normalize_name(term)
+        if not prefix:
+            return []
+
+        names, territories = self._names, self._territories
+        found: Dict[int, None] = {}
+        index = bisect.bisect_left(names, (prefix, -1))
+        while index < len(names) and len(found) < limit:
+            name, position = names[index]
+            if not name.startswith(prefix):
+                break
+            found[position] = None
+            index += 1
+        return [territories[position] for position in found]
+
+    def children(self, local_type: str, local_code: str) -> List[Territory]:
+        """
+        Returns the municipalities of a state, in code order.
+
+        IBGE municipality codes start with the two-digit code of their state;
+        the state's UF, when known, is accepted as well.
+        """
+        if local_type != "state" or not local_code.isdigit():
+            return []
+        state = self.lookup(local_type, local_code)
+        uf = state.uf if state else None
+        prefix = local_code if len(local_code) == 2 else None
+        found = []
+        for territory in self._territories:
+            if territory.type != "municipality":
+                continue
+            code = str(territory.code)
+            if (len(code) == 7 and code[:2] == prefix) or (uf is not None and territory.uf == uf):
+                found.append(territory)
+        return sorted(found, key=lambda territory: territory.code)
+
+    def territories(self) -> List[Territory]:
+        """
+        Returns every indexed territory.
+        """
+        return list(self._territories)
+
+    def snapshot(self) -> List[dict]:
+        """
+        Returns the index content as a list of Territory dictionaries.
+        """
+        return [territory.model_dump() for territory in self._territories]
+
+
+# Index shared by the whole application
+territory_index = TerritoryIndex()
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def municipality_uf(item: dict) -> Optional[str]:
+    """
+    UF of the state of an IBGE municipality record, or None.
+    """
+    # The state's UF sits under the micro-region, or the immediate region in newer records
+    for path in (("microrregiao", "mesorregiao", "UF"), ("regiao-imediata", "regiao-intermediaria", "UF")):
+        node = item
+        for key in path:
+            node = node.get(key) if isinstance(node, dict) else None
+        if isinstance(node, dict) and node.get("sigla"):
+            return node["sigla"]
+    return None
+
+
+async def fetch_territory_snapshot() -> List[Territory]:
+    """
+    Builds a full snapshot of the territories: every state and municipality from the
+    IBGE localities API, plus the biomes.
+    """
+    states, municipalities = await asyncio.gather(
+        fetch_external_api_data(f"{IBGE_API_URL}/localidades/estados", endpoint="territory_snapshot"),
+        fetch_external_api_data(f"{IBGE_API_URL}/localidades/municipios", endpoint="territory_snapshot"),
+    )
+    territories = [Territory(name=item["nome"], code=int(item["id"]), type="state", uf=item.get("sigla"))
+                   for item in states]
+    territories += [Territory(name=item["nome"], code=int(item["id"]), type="municipality", uf=municipality_uf(item))
+                    for item in municipalities]
+    territories += [Territory(name=name, code=code, type="biome") for code, name in BIOMES.items()]
+    return territories
+
+
+def _read_snapshot_file(path: str) -> Optional[list]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_snapshot_file(path: str, records: List[dict]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(records, file, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+async def refresh_territory_index(source: str = None) -> int:
+    """
+    Reloads the index from the snapshot (file path or URL).
+    When the snapshot file does not exist yet (e.g. a fresh deploy), a full snapshot is
+    built from the IBGE lists (see fetch_territory_snapshot) and written to it.
+    Territories already learned from upstream searches are kept.
+    Returns the number of territories in the index.
+    """
+    source = source or TERRITORY_SNAPSHOT
+    remote = source.startswith(("http://", "https://"))
+    if remote:
+        records = await fetch_external_api_data(source, endpoint="territory_snapshot")
+    else:
+        records = await run_in_threadpool(_read_snapshot_file, source)
+
+    if records:
+        snapshot = [Territory(**record) for record in records]
+    elif not remote:
+        snapshot = await fetch_territory_snapshot()
+    else:
+        return len(territory_index)
+
+    known = {(territory.type, territory.code) for territory in snapshot}
+    learned = [t for t in territory_index.territories() if (t.type, t.code) not in known]
+    territory_index.load(snapshot + learned, complete=True)
+    if not records:
+        try:
+            await run_in_threadpool(_write_snapshot_file, source, territory_index.snapshot())
+        except OSError:
+            logger.exception("Could not save the territory index snapshot")
+    return len(territory_index)
+
+
+async def save_territory_index(path: str = None):
+    """
+    Writes the index (including territories learned from upstream) to a snapshot file.
+    Only a complete index is written: the file is read back as a full snapshot, and
+    territories learned from searches alone would hide the upstream results.
+    """
+    path = path or TERRITORY_SNAPSHOT
+    if territory_index.complete and not path.startswith(("http://", "https://")):
+        await run_in_threadpool(_write_snapshot_file, path, territory_index.snapshot())
+
+
+async def _refresh_loop():
+    while True:
+        try:
+            count = await refresh_territory_index()
+            logger.info("Territory index loaded: %d territories", count)
+        except Exception:
+            logger.exception("Territory index refresh failed; keeping the current index")
+        await asyncio.sleep(TERRITORY_REFRESH_INTERVAL)
+
+
+async def start_territory_index():
+    """
+    Starts the background task that loads the snapshot and reloads it periodically.
+    Startup does not wait for the first load.
+    """
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_territory_index():
+    """
+    Stops the background refresh and saves the index for the next start.
+    """
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    try:
+        await save_territory_index()
+    except OSError:
+        logger.exception("Could not save the territory index snapshot")
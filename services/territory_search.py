@@ -1,16 +1,26 @@
 # territory_search.py
-from typing import List
+import os
+from typing import List, Optional
+from fastapi import HTTPException
 from .api_HTTPException import fetch_external_api_data
+from .single_flight import SingleFlight
+from .territory_index import IBGE_API_URL, municipality_uf, territory_index
 from data.pydantic_models import Territory, GroupingsResponse
 
-# external URL used to access the MapBiomas Fire info
-MAPBIOMAS_API_URL = "https://plataforma.monitorfogo.mapbiomas.org/api"
+# external URL used to access the MapBiomas Fire info (FIREMETRICS_MAPBIOMAS_API_URL points it elsewhere, e.g. to a local stub)
+MAPBIOMAS_API_URL = os.getenv("FIREMETRICS_MAPBIOMAS_API_URL", "https://plataforma.monitorfogo.mapbiomas.org/api").rstrip("/")
 
+# Coalesce identical lookups that are in flight at the same time
+_groupings_flight = SingleFlight()
+_search_flight = SingleFlight()
+_children_flight = SingleFlight()
 
-def get_grouping_subdivisions_from_mapbiomas(local_type: str, local_code: str) -> GroupingsResponse:
+
+async def get_grouping_subdivisions_from_mapbiomas(local_type: str, local_code: str) -> GroupingsResponse:
     """
     Retrieves a list of subdivisions (e.g., states for a country, municipalities for a state)
     for a given territory from the MapBiomas API.
+    Identical lookups in flight at the same time share a single upstream call.
     
     Args:
         local_type: Type of the territory (e.g., "country", "state").
@@ -20,13 +30,14 @@ def get_grouping_subdivisions_from_mapbiomas(local_type: str, local_code: str) -
         GroupingsResponse model containing subdivisions.
     """
     url = f"{MAPBIOMAS_API_URL}/territories/{local_type}/{local_code}/groupings"
-    response_data = fetch_external_api_data(url)
+    response_data = await _groupings_flight.do(url, lambda: fetch_external_api_data(url, endpoint="groupings"))
     return GroupingsResponse(**response_data)
 
 
-def search_territories_from_mapbiomas(search_term: str) -> List[Territory]:
+async def search_territories_from_mapbiomas(search_term: str) -> List[Territory]:
     """
     Searches for a territory in the MapBiomas Fogo API by name or code.
+    Identical searches in flight at the same time share a single upstream call.
     
     Args:
         search_term: The search term (territory name or code).
@@ -36,8 +47,75 @@ def search_territories_from_mapbiomas(search_term: str) -> List[Territory]:
     """
     clean_search_term = search_term.strip() if search_term and search_term.strip() else "Rio de Janeiro"
     url = f"{MAPBIOMAS_API_URL}/territories/search/{clean_search_term}"
-    print(url)
-    data = fetch_external_api_data(url)
+    data = await _search_flight.do(url, lambda: fetch_external_api_data(url, endpoint="territory_search"))
 
     # Convert each dict to a Territory model
     return [Territory(**item) for item in data]
+
+
+async def get_municipalities_of_state(state_code: str) -> List[Territory]:
+    """
+    Lists the municipalities of a state from the IBGE localities API.
+    Identical lookups in flight at the same time share a single upstream call,
+    and the municipalities found are added to the local index.
+
+    Args:
+        state_code: Two-digit IBGE code of the state.
+
+    Returns:
+        A list of Territory models (type "municipality"), in code order.
+    """
+    url = f"{IBGE_API_URL}/localidades/estados/{state_code}/municipios"
+    data = await _children_flight.do(url, lambda: fetch_external_api_data(url, endpoint="territory_children"))
+
+    territories = sorted(
+        (Territory(name=item["nome"], code=int(item["id"]), type="municipality", uf=municipality_uf(item)) for item in data),
+        key=lambda territory: territory.code,
+    )
+    territory_index.add(territories)
+    return territories
+
+
+async def find_territories(search_term: str) -> List[Territory]:
+    """
+    Searches territories in the local index first. The index answers alone only when it
+    was loaded from a complete snapshot; otherwise it only knows territories learned from
+    earlier lookups, so the MapBiomas search runs as well and both results are merged
+    (upstream first). Upstream results are added to the index.
+
+    Args:
+        search_term: The search term (territory name or code).
+
+    Returns:
+        A list of Territory models representing the territories found.
+    """
+    clean_search_term = search_term.strip() if search_term and search_term.strip() else "Rio de Janeiro"
+    known = territory_index.search(clean_search_term)
+    if known and territory_index.complete:
+        return known
+
+    try:
+        territories = await search_territories_from_mapbiomas(clean_search_term)
+    except HTTPException:
+        # Upstream unavailable: the known matches are better than an error
+        if known:
+            return known
+        raise
+
+    territory_index.add(territories)
+    found = {(territory.type, territory.code) for territory in territories}
+    return territories + [territory for territory in known if (territory.type, territory.code) not in found]
+
+
+async def resolve_territory_name(local_type: str, local_code: str) -> Optional[str]:
+    """
+    Returns the name of a territory, from the local index when possible.
+    Falls back to the MapBiomas search by code. Returns None if it is not found.
+    """
+    territory = territory_index.lookup(local_type, local_code)
+    if territory:
+        return territory.name
+
+    territories = await search_territories_from_mapbiomas(local_code)
+    territory_index.add(territories)
+    return next((t.name for t in territories if t.type == local_type), None)
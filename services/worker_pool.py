@@ -0,0 +1,141 @@
+# services/worker_pool.py
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import observe_functions
+from services.profiling import POOL_DISPATCH, STAT_KERNELS, record_span, span
+
+# Number of worker processes of the long-lived statistics pool
+STATS_WORKERS = int(os.getenv("FIREMETRICS_STATS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Calls with fewer points than this are computed inline: for them the IPC cost (shared memory
+# setup, pickling the call and its results) takes more CPU in the serving process than the
+# work itself. Measured with benchmarks/worker_pool.py: a single monthly series (~480 points)
+# costs ~0.5 ms inline, dispatching breaks even at ~64 stacked series (~30000 points) and is
+# clearly cheaper from ~128, so the pool takes batch matrices while single series stay inline.
+INLINE_THRESHOLD = int(os.getenv("FIREMETRICS_STATS_INLINE_THRESHOLD", "65536"))
+
+# The pool is created once at application startup (see start_worker_pool)
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def start_worker_pool(max_workers: int = STATS_WORKERS):
+    """
+    Creates the long-lived process pool used by the statistics functions.
+    Uses the "forkserver" start method when available, which is safe in a threaded server.
+    """
+    global _executor
+    if _executor is not None:
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+def shutdown_worker_pool():
+    """
+    Shuts down the process pool, waiting for running tasks.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    # The parent owns the segment and unlinks it, so the worker does not track it.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+
+    # Before 3.13 attaching always registers the segment. Pool workers share the parent's
+    # resource tracker, where that is a no-op (the name is already registered) and the
+    # parent's unlink unregisters it once; unregistering here would drop the parent's entry.
+    return SharedMemory(name=name)
+
+
+def _run_in_worker(func: Callable, shm_name: str, shape: Tuple[int, int], is_matrix: bool,
+                   has_months: bool, mode: str) -> Tuple[Any, float]:
+    """
+    Worker side: attaches to the shared series (no copy) and runs one statistics function.
+    The first rows hold the areaHa values (one row per series) and the last row the months
+    (monthly interval only). Returns the result and the run time of the function.
+    """
+    shm = _attach_shared_memory(shm_name)
+    rows = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    try:
+        values = rows[:-1] if is_matrix else rows[0]
+        months = rows[-1].astype(np.int8) if has_months else None
+        started = time.perf_counter()
+        return func(values, months, mode), time.perf_counter() - started
+    finally:
+        # Views must be released before the buffer can be closed
+        del rows, values
+        shm.close()
+
+
+def run_functions(functions: List[Callable], values: np.ndarray, months: Optional[np.ndarray], mode: str) -> Dict[str, Any]:
+    """
+    Runs every statistics function over a series and collects their results by function name.
+
+    Small series (or a pool that was not started) are computed inline. Larger ones are
+    copied once into a shared memory block that every worker reads without copying.
+    The run time of each function is recorded in the metrics.
+
+    Args:
+        functions: Statistics functions with the signature `func(values, months, mode)`.
+        values: areaHa array of one series (1-D) or of several aligned series (2-D, one per row).
+        months: Month array for the monthly interval, otherwise None.
+        mode: "annual" or "monthly".
+
+    Returns:
+        Dict mapping each function name to its result.
+    """
+    if _executor is None or values.size < INLINE_THRESHOLD:
+        results, timings = {}, []
+        for func in functions:
+            with span(STAT_KERNELS, func.__name__):
+                started = time.perf_counter()
+                results[func.__name__] = func(values, months, mode)
+                timings.append((func.__name__, time.perf_counter() - started))
+        observe_functions(timings)
+        return results
+
+    with span(POOL_DISPATCH, f"{len(functions)} functions, {values.size} points"):
+        outcomes = _run_on_pool(functions, values, months, mode)
+    for name, (_result, seconds) in outcomes.items():
+        record_span(STAT_KERNELS, name, seconds)
+    observe_functions((name, seconds) for name, (_result, seconds) in outcomes.items())
+    return {name: result for name, (result, _seconds) in outcomes.items()}
+
+
+def _run_on_pool(functions: List[Callable], values: np.ndarray, months: Optional[np.ndarray],
+                 mode: str) -> Dict[str, Tuple[Any, float]]:
+    # Copies the series once into shared memory and runs each function on a worker
+    matrix = np.atleast_2d(values)
+    shape = (matrix.shape[0] + 1, matrix.shape[1])
+    shm = SharedMemory(create=True, size=max(1, shape[0] * shape[1] * np.dtype(np.float64).itemsize))
+    try:
+        rows = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        rows[:-1] = matrix
+        rows[-1] = months if months is not None else 0
+        del rows
+
+        futures = {
+            func.__name__: _executor.submit(
+                _run_in_worker, func, shm.name, shape, values.ndim == 2, months is not None, mode
+            )
+            for func in functions
+        }
+        return {name: future.result() for name, future in futures.items()}
+    finally:
+        shm.close()
+        shm.unlink()
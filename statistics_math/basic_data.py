@@ -1,10 +1,82 @@
 # statistics_math.basic_data.py
 
-from data.cache_manager import (
-    get_raw_data_from_cache,
-    set_raw_data_to_cache,
-    show_all_data
-)
-
-def basic_stats(local_type: str, local_code: str, grouping: str, interval: str):
-    return None
\ No newline at end of file
+from typing import Dict, Optional
+
+import numpy as np
+
+from data.pydantic_models import BasicSummaryStats
+
+
+def basic_stats_matrix(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Computes every BasicSummaryStats field for each row of a 2-D array (series × periods)
+    in a single vectorized pass, without per-element Python loops.
+    A 1-D array is treated as a single row.
+
+    Args:
+        values: areaHa array, shape (periods,) or (series, periods).
+
+    Returns:
+        Dict mapping each BasicSummaryStats field name to an array with one value per row.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    n = values.shape[-1]
+
+    total = values.sum(axis=-1)
+    mean = total / n
+    # One partition-based call for the three quantiles (linear interpolation, like numpy's default)
+    first_quartile, median, third_quartile = np.quantile(values, [0.25, 0.5, 0.75], axis=-1)
+    minimum = values.min(axis=-1)
+    maximum = values.max(axis=-1)
+
+    # Sample variance (n - 1), as in statistics.variance
+    deviations = values - mean[:, None]
+    variance = (deviations * deviations).sum(axis=-1) / (n - 1) if n > 1 else np.zeros_like(total)
+    standard_deviation = np.sqrt(variance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coefficient_of_variation = np.where(mean != 0, standard_deviation / mean, np.nan)
+
+    zeros = np.count_nonzero(values == 0, axis=-1)
+    # Mean of the running total: period i is part of the last n - i running totals
+    cumulative_mean = values @ np.arange(n, 0, -1, dtype=np.float64) / n
+
+    return {
+        "sample_size": np.full(values.shape[0], n),
+        "total_area_burned": total,
+        "average_area_burned": mean,
+        "median_area_burned": median,
+        "minimum_area_burned": minimum,
+        "maximum_area_burned": maximum,
+        "range_area_burned": maximum - minimum,
+        "variance_area_burned": variance,
+        "standard_deviation_area_burned": standard_deviation,
+        "coefficient_of_variation": coefficient_of_variation,
+        "first_quartile_area_burned": first_quartile,
+        "third_quartile_area_burned": third_quartile,
+        "sum_cumulative_area_burned": cumulative_mean,
+        "number_of_zero_burned_periods": zeros,
+        "proportion_of_nonzero_burned_periods": (n - zeros) / n,
+    }
+
+
+def basic_stats_from_row(stats: Dict[str, np.ndarray], row: int = 0) -> BasicSummaryStats:
+    """
+    Builds the BasicSummaryStats model of one row of `basic_stats_matrix`.
+    Undefined values (NaN, e.g. the CV of an all-zero series) become None.
+    """
+    fields = {}
+    for name, column in stats.items():
+        value = column[row].item()
+        fields[name] = None if isinstance(value, float) and np.isnan(value) else value
+    return BasicSummaryStats(**fields)
+
+
+def basic_stats(values: np.ndarray, months: Optional[np.ndarray], mode: str) -> Optional[BasicSummaryStats]:
+    """
+    Computes the basic summary statistics of a series (annual or monthly).
+    Returns None for an empty series.
+    """
+    if values.size == 0:
+        return None
+
+    return basic_stats_from_row(basic_stats_matrix(values))
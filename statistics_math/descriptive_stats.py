@@ -1,31 +1,190 @@
 # math/descriptive_stats.py
 
-def calculate_coefficient_of_variation(local_code: str, grouping: str, mode: str):
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Lower edges (in hectares) of the size bins of count_events_by_size_bin; the last bin is open-ended
+EVENT_BIN_EDGES = tuple(
+    float(edge) for edge in os.getenv("FIREMETRICS_EVENT_BIN_EDGES", "0,10,100,1000,10000").split(",")
+)
+# Periods beyond this many interquartile ranges outside the quartiles are anomalies (Tukey's fences)
+ANOMALY_IQR_FACTOR = 1.5
+
+
+# --- Shared building blocks (one series per row) --- #
+
+def _sorted_quantile(sorted_matrix: np.ndarray, q: float) -> np.ndarray:
+    # Linear interpolation over rows that are already sorted (numpy's default method)
+    position = q * (sorted_matrix.shape[-1] - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, sorted_matrix.shape[-1] - 1)
+    return sorted_matrix[:, lower] + (sorted_matrix[:, upper] - sorted_matrix[:, lower]) * (position - lower)
+
+
+def _coefficient_of_variation(matrix: np.ndarray) -> np.ndarray:
+    # Sample standard deviation over the mean, as in BasicSummaryStats; NaN when the mean is 0
+    n = matrix.shape[-1]
+    mean = matrix.mean(axis=-1)
+    std = matrix.std(axis=-1, ddof=1) if n > 1 else np.zeros_like(mean)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mean != 0, std / mean, np.nan)
+
+
+def _anomalies(matrix: np.ndarray, first_quartile: np.ndarray, third_quartile: np.ndarray) -> np.ndarray:
+    iqr = third_quartile - first_quartile
+    low = (first_quartile - ANOMALY_IQR_FACTOR * iqr)[:, None]
+    high = (third_quartile + ANOMALY_IQR_FACTOR * iqr)[:, None]
+    return np.count_nonzero((matrix < low) | (matrix > high), axis=-1)
+
+
+def _gini(sorted_matrix: np.ndarray) -> np.ndarray:
+    # Gini coefficient from ascending rows: 2·Σ i·x(i) / (n·Σx) - (n + 1) / n; NaN for an all-zero row
+    n = sorted_matrix.shape[-1]
+    total = sorted_matrix.sum(axis=-1)
+    ranks = np.arange(1, n + 1, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, 2 * (sorted_matrix @ ranks) / (n * total) - (n + 1) / n, np.nan)
+
+
+def _upper_quartile_proportion(matrix: np.ndarray, third_quartile: np.ndarray) -> np.ndarray:
+    # Share of the periods at or above the third quartile
+    return np.count_nonzero(matrix >= third_quartile[:, None], axis=-1) / matrix.shape[-1]
+
+
+def _upper_quartile_area_share(matrix: np.ndarray, third_quartile: np.ndarray) -> np.ndarray:
+    # Share of the total area burned in periods at or above the third quartile
+    total = matrix.sum(axis=-1)
+    upper = np.where(matrix >= third_quartile[:, None], matrix, 0.0).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, upper / total, np.nan)
+
+
+def _bin_counts(matrix: np.ndarray, edges: Sequence[float]) -> np.ndarray:
+    # Bin of each value by binary search over the edges, then one offset bincount for every row
+    edges = np.asarray(edges, dtype=np.float64)
+    rows, bins = matrix.shape[0], edges.size
+    index = np.searchsorted(edges, matrix, side="right") - 1
+    valid = index >= 0  # values below the first edge are not counted
+    offsets = np.broadcast_to(np.arange(rows)[:, None] * bins, matrix.shape)
+    counts = np.bincount((offsets + index)[valid], minlength=rows * bins)
+    return counts.reshape(rows, bins)
+
+
+def bin_labels(edges: Sequence[float] = EVENT_BIN_EDGES) -> List[str]:
+    """
+    Labels of the size bins, e.g. ["0-10", "10-100", ..., "10000+"].
+    """
+    names = [f"{edge:g}" for edge in edges]
+    return [f"{low}-{high}" for low, high in zip(names, names[1:])] + [f"{names[-1]}+"]
+
+
+# --- Shared kernel --- #
+
+def descriptive_stats_matrix(values: np.ndarray, bin_edges: Sequence[float] = EVENT_BIN_EDGES) -> Dict[str, np.ndarray]:
+    """
+    Computes every DescriptiveStats field for each row of a 2-D array (series × periods).
+    A 1-D array is treated as a single row.
+
+    Each row is sorted once; the quartiles, the anomaly fences, the concentration index
+    and the upper-quartile proportions all come from that sorted copy.
+
+    Args:
+        values: areaHa array, shape (periods,) or (series, periods), with at least one period.
+        bin_edges: Ascending lower edges of the size bins.
+
+    Returns:
+        Dict mapping each DescriptiveStats field name to an array with one value per row
+        (for "event_counts_by_bin", one row of counts per series).
+    """
+    matrix = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    sorted_matrix = np.sort(matrix, axis=-1)
+    first_quartile = _sorted_quantile(sorted_matrix, 0.25)
+    third_quartile = _sorted_quantile(sorted_matrix, 0.75)
+
+    return {
+        "coefficient_of_variation": _coefficient_of_variation(sorted_matrix),
+        "anomalies_count": _anomalies(sorted_matrix, first_quartile, third_quartile),
+        "concentration_index": _gini(sorted_matrix),
+        "large_event_proportion": _upper_quartile_proportion(sorted_matrix, third_quartile),
+        "large_event_area_share": _upper_quartile_area_share(sorted_matrix, third_quartile),
+        "event_counts_by_bin": _bin_counts(sorted_matrix, bin_edges),
+    }
+
+
+def descriptive_stats_from_row(stats: Dict[str, np.ndarray], row: int = 0,
+                               bin_edges: Sequence[float] = EVENT_BIN_EDGES) -> dict:
+    """
+    Builds the DescriptiveStats fields of one row of `descriptive_stats_matrix`.
+    Undefined values (NaN, e.g. the CV of an all-zero series) become None.
+    """
+    fields = {}
+    for name, column in stats.items():
+        if name == "event_counts_by_bin":
+            fields[name] = dict(zip(bin_labels(bin_edges), column[row].tolist()))
+            continue
+        value = column[row].item()
+        fields[name] = None if isinstance(value, float) and np.isnan(value) else value
+    return fields
+
+
+def descriptive_stats(values: np.ndarray, months: Optional[np.ndarray], mode: str):
+    """
+    Computes all the descriptive statistics of a series in one pass over a single sort.
+    Returns a dict of DescriptiveStats fields (a list with one dict per row for 2-D input),
+    or None for an empty series.
+    """
+    if values.size == 0:
+        return None
+
+    stats = descriptive_stats_matrix(values)
+    if values.ndim == 1:
+        return descriptive_stats_from_row(stats)
+    return [descriptive_stats_from_row(stats, row) for row in range(values.shape[0])]
+
+
+# --- Single statistics (thin wrappers over the shared kernel) --- #
+
+def _single_field(values: np.ndarray, field: str):
+    # One value for a 1-D series, one per row for 2-D input; None for an empty series
+    if values.size == 0:
+        return None
+    column = {field: descriptive_stats_matrix(values)[field]}
+    fields = [descriptive_stats_from_row(column, row)[field] for row in range(column[field].shape[0])]
+    return fields[0] if values.ndim == 1 else fields
+
+
+def calculate_coefficient_of_variation(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Calculates the data's variability relative to the mean.
     """
-    pass
+    return _single_field(values, "coefficient_of_variation")
 
-def detect_anomalies(local_code: str, grouping: str, mode: str):
+def detect_anomalies(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Identifies values that are statistically uncommon.
+    Counts the periods outside Tukey's fences (1.5 IQR beyond the quartiles).
     """
-    pass
+    return _single_field(values, "anomalies_count")
 
-def calculate_concentration_index(local_code: str, grouping: str, mode: str):
+def calculate_concentration_index(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Determines if the total burned area is concentrated in a few events.
+    Gini coefficient: 0 when every period burns the same area, close to 1 when one period holds it all.
     """
-    pass
+    return _single_field(values, "concentration_index")
 
-def calculate_large_event_proportion(local_code: str, grouping: str, mode: str):
+def calculate_large_event_proportion(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Calculates the percentage of events that are in the upper quartile.
+    Share (0-1) of the periods at or above the third quartile.
     """
-    pass
+    return _single_field(values, "large_event_proportion")
 
-def count_events_by_size_bin(local_code: str, grouping: str, mode: str):
+def count_events_by_size_bin(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Counts the frequency of events by predefined size ranges.
+    Bins are [edge, next edge) in hectares, from FIREMETRICS_EVENT_BIN_EDGES.
     """
-    pass
\ No newline at end of file
+    return _single_field(values, "event_counts_by_bin")
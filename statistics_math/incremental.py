@@ -0,0 +1,284 @@
+# statistics_math/incremental.py
+
+from dataclasses import dataclass, field, replace
+from typing import Optional, Tuple
+
+import numpy as np
+
+from data.fire_series import FireSeries
+from data.pydantic_models import BasicSummaryStats, Statistics, TimeSeriesStats
+from statistics_math.time_series_analysis import (
+    ROLLING_WINDOW,
+    growth_rate_matrix,
+    historical_comparison_matrix,
+    month_dict,
+    rolling_mean_matrix,
+    seasonal_index_from_totals,
+)
+
+
+@dataclass(slots=True)
+class RunningAggregates:
+    """
+    Running state of one series (annual or monthly) that lets BasicSummaryStats and
+    TimeSeriesStats be updated when new periods are appended, without a full recompute.
+    """
+    count: int
+    mean: float
+    m2: float                       # Sum of squared deviations from the mean (Welford)
+    total: float                    # Cumulative sum
+    running_totals: float           # Σ of the running total at each period
+    minimum: float
+    maximum: float
+    zeros: int
+    sum_xy: float                   # Σ index·value, for the least squares slope
+    sorted_values: np.ndarray       # Kept sorted for the quantiles
+    last_value: float               # For the growth rate of the next period
+    window_tail: np.ndarray         # Last (window - 1) values, for the rolling mean
+    window: int
+    month_totals: np.ndarray = field(default_factory=lambda: np.zeros(12))
+    month_counts: np.ndarray = field(default_factory=lambda: np.zeros(12, dtype=np.int64))
+
+
+def aggregates_from_values(values: np.ndarray, months: Optional[np.ndarray], mode: str) -> RunningAggregates:
+    """
+    Builds the running aggregates of a full series (O(n log n) because of the sort).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    window = ROLLING_WINDOW[mode]
+    count = values.size
+    mean = float(values.mean()) if count else 0.0
+
+    aggregates = RunningAggregates(
+        count=count,
+        mean=mean,
+        m2=float(((values - mean) ** 2).sum()),
+        total=float(values.sum()),
+        running_totals=float(values.cumsum().sum()),
+        minimum=float(values.min()) if count else np.inf,
+        maximum=float(values.max()) if count else -np.inf,
+        zeros=int(np.count_nonzero(values == 0)),
+        sum_xy=float(np.dot(np.arange(count, dtype=np.float64), values)),
+        sorted_values=np.sort(values),
+        last_value=float(values[-1]) if count else 0.0,
+        window_tail=values[max(0, count - window + 1):].copy(),
+        window=window,
+    )
+    if months is not None:
+        month_index = np.asarray(months, dtype=np.intp) - 1
+        aggregates.month_totals = np.bincount(month_index, weights=values, minlength=12)
+        aggregates.month_counts = np.bincount(month_index, minlength=12)
+    return aggregates
+
+
+def append_values(aggregates: RunningAggregates, new_values: np.ndarray,
+                  new_months: Optional[np.ndarray]) -> RunningAggregates:
+    """
+    Updates the aggregates in place with appended periods. Pass a copy (dataclasses.replace)
+    to keep the original: the arrays are replaced, never written to.
+
+    The running sums take O(k) for k new points. The sorted copy used for the quantiles
+    takes an insertion instead of a re-sort: O(k log n) to find the positions, plus one
+    O(n) memory move of the array.
+    """
+    new_values = np.asarray(new_values, dtype=np.float64)
+    k = new_values.size
+    if k == 0:
+        return aggregates
+
+    # Chan et al. merge of the mean and the sum of squared deviations
+    batch_mean = float(new_values.mean())
+    batch_m2 = float(((new_values - batch_mean) ** 2).sum())
+    count = aggregates.count + k
+    delta = batch_mean - aggregates.mean
+    aggregates.m2 += batch_m2 + delta * delta * aggregates.count * k / count
+    aggregates.mean += delta * k / count
+
+    indexes = np.arange(aggregates.count, count, dtype=np.float64)
+    aggregates.sum_xy += float(np.dot(indexes, new_values))
+    aggregates.count = count
+    aggregates.running_totals += k * aggregates.total + float(new_values.cumsum().sum())
+    aggregates.total += float(new_values.sum())
+    aggregates.minimum = min(aggregates.minimum, float(new_values.min()))
+    aggregates.maximum = max(aggregates.maximum, float(new_values.max()))
+    aggregates.zeros += int(np.count_nonzero(new_values == 0))
+
+    sorted_new = np.sort(new_values)
+    positions = np.searchsorted(aggregates.sorted_values, sorted_new)
+    aggregates.sorted_values = np.insert(aggregates.sorted_values, positions, sorted_new)
+
+    aggregates.last_value = float(new_values[-1])
+    keep = aggregates.window - 1
+    aggregates.window_tail = np.concatenate([aggregates.window_tail, new_values])[-keep:] if keep else new_values[:0]
+
+    if new_months is not None:
+        month_index = np.asarray(new_months, dtype=np.intp) - 1
+        aggregates.month_totals = aggregates.month_totals + np.bincount(month_index, weights=new_values, minlength=12)
+        aggregates.month_counts = aggregates.month_counts + np.bincount(month_index, minlength=12)
+    return aggregates
+
+
+def _quantile(sorted_values: np.ndarray, q: float) -> float:
+    # Linear interpolation over an already sorted array (numpy's default method)
+    position = q * (sorted_values.size - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, sorted_values.size - 1)
+    return float(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower))
+
+
+def basic_stats_from_aggregates(aggregates: RunningAggregates) -> Optional[BasicSummaryStats]:
+    """
+    Builds BasicSummaryStats from the running aggregates in O(1).
+    """
+    n = aggregates.count
+    if n == 0:
+        return None
+
+    variance = aggregates.m2 / (n - 1) if n > 1 else 0.0
+    standard_deviation = float(np.sqrt(variance))
+    return BasicSummaryStats(
+        sample_size=n,
+        total_area_burned=aggregates.total,
+        average_area_burned=aggregates.mean,
+        median_area_burned=_quantile(aggregates.sorted_values, 0.5),
+        minimum_area_burned=aggregates.minimum,
+        maximum_area_burned=aggregates.maximum,
+        range_area_burned=aggregates.maximum - aggregates.minimum,
+        variance_area_burned=variance,
+        standard_deviation_area_burned=standard_deviation,
+        coefficient_of_variation=standard_deviation / aggregates.mean if aggregates.mean != 0 else None,
+        first_quartile_area_burned=_quantile(aggregates.sorted_values, 0.25),
+        third_quartile_area_burned=_quantile(aggregates.sorted_values, 0.75),
+        sum_cumulative_area_burned=aggregates.running_totals / n,
+        number_of_zero_burned_periods=aggregates.zeros,
+        proportion_of_nonzero_burned_periods=(n - aggregates.zeros) / n,
+    )
+
+
+def _slope(aggregates: RunningAggregates) -> Optional[float]:
+    # Closed-form least squares slope with x = 0..n-1
+    n = aggregates.count
+    if n < 2:
+        return None
+    sum_x = n * (n - 1) / 2
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6
+    return (n * aggregates.sum_xy - sum_x * aggregates.total) / (n * sum_xx - sum_x * sum_x)
+
+
+def _growth_rates(previous_value: float, new_values: np.ndarray) -> list:
+    rates = growth_rate_matrix(np.concatenate([[previous_value], new_values])[None, :])[0]
+    return [None if rate != rate else rate for rate in rates.tolist()]
+
+
+def update_time_series_stats(previous: TimeSeriesStats, before: RunningAggregates, after: RunningAggregates,
+                             values: np.ndarray, new_values: np.ndarray, mode: str) -> TimeSeriesStats:
+    """
+    Updates TimeSeriesStats after periods were appended.
+
+    Growth rate and rolling mean are extended with the new periods only (O(k)), the slope
+    and the seasonal index come from the running sums (O(1)). The historical comparison is
+    relative to the overall mean, so every one of its n values changes with it: it is
+    rebuilt with one vectorized O(n) pass over `values`.
+
+    Args:
+        previous: Statistics computed before the new periods arrived.
+        before: Aggregates before the new periods (for the growth rate and the window).
+        after: Aggregates including the new periods.
+        values: Full areaHa array, including the new periods.
+        new_values: Appended areaHa values.
+        mode: "annual" or "monthly".
+    """
+    updates = {"linear_trend_slope": _slope(after)}
+
+    if previous.yearly_growth_rate is not None and before.count:
+        updates["yearly_growth_rate"] = previous.yearly_growth_rate + _growth_rates(before.last_value, new_values)
+
+    if previous.rolling_mean is not None:
+        joined = np.concatenate([before.window_tail, new_values])
+        updates["rolling_mean"] = previous.rolling_mean + rolling_mean_matrix(joined[None, :], after.window)[0].tolist()
+
+    if previous.seasonal_index is not None and mode == "monthly":
+        updates["seasonal_index"] = month_dict(seasonal_index_from_totals(after.month_totals, after.month_counts)[0])
+
+    if previous.historical_comparison is not None:
+        updates["historical_comparison"] = historical_comparison_matrix(np.atleast_2d(values))[0].tolist()
+
+    return previous.model_copy(update=updates)
+
+
+def _appended_periods(previous: FireSeries, entry: FireSeries, interval: str) -> Optional[int]:
+    """
+    Returns how many periods were appended to the interval series,
+    or None if historical values (or their order) changed.
+    """
+    old_size = previous.area(interval).size
+    if entry.area(interval).size < old_size:
+        return None
+
+    same_history = (
+        np.array_equal(entry.years(interval)[:old_size], previous.years(interval))
+        and np.array_equal(entry.area(interval)[:old_size], previous.area(interval))
+    )
+    months = previous.months(interval)
+    if months is not None:
+        same_history = same_history and np.array_equal(entry.months(interval)[:old_size], months)
+
+    return entry.area(interval).size - old_size if same_history else None
+
+
+def carry_over_statistics(previous: FireSeries, entry: FireSeries) -> Tuple[Optional[Statistics], dict]:
+    """
+    Carries the statistics of a refreshed entry over to the new one.
+
+    For each interval:
+    - unchanged series keep their statistics as they are;
+    - series that only gained new periods get BasicSummaryStats and TimeSeriesStats
+      updated from the running aggregates: O(k) for the k new points in the sums, plus
+      O(n) memory moves for the sorted quantile copy and the historical comparison (no
+      sort, no pass over the statistics functions); DescriptiveStats are dropped (they
+      need the whole series) and are computed again on the next calculation;
+    - series whose historical values changed lose their statistics, so the next
+      calculation does a full recompute.
+
+    `previous` is left untouched (its aggregates included), so the entry still being
+    served stays consistent if the refresh fails or is discarded.
+
+    Returns:
+        The statistics for the new entry and its running aggregates by interval.
+    """
+    if previous.statistic is None:
+        return None, {}
+
+    statistic = previous.statistic
+    aggregates = {}
+    for interval in ("annual", "monthly"):
+        interval_stats = getattr(statistic, interval)
+        if interval_stats is None:
+            continue
+
+        appended = _appended_periods(previous, entry, interval)
+        if appended is None:
+            statistic = statistic.model_copy(update={interval: None})
+            continue
+
+        old_size = previous.area(interval).size
+        before = previous.aggregates.get(interval) or aggregates_from_values(
+            previous.area(interval), previous.months(interval), interval
+        )
+        if appended == 0:
+            aggregates[interval] = before
+            continue
+
+        new_values = entry.area(interval)[old_size:]
+        new_months = entry.months(interval)[old_size:] if entry.months(interval) is not None else None
+        after = append_values(replace(before), new_values, new_months)
+
+        updates = {"basic": basic_stats_from_aggregates(after), "descriptive": None}
+        if interval_stats.time_series is not None:
+            updates["time_series"] = update_time_series_stats(
+                interval_stats.time_series, before, after, entry.area(interval), new_values, interval
+            )
+        statistic = statistic.model_copy(update={interval: interval_stats.model_copy(update=updates)})
+        aggregates[interval] = after
+
+    return statistic, aggregates
@@ -1,33 +1,161 @@
 # math/time_series_analysis.py
 
-def calculate_yearly_growth_rate(local_code: str, grouping: str, mode: str):
+from typing import Callable, Optional
+
+import numpy as np
+
+# Window (in periods) of the rolling mean for each interval
+ROLLING_WINDOW = {"annual": 3, "monthly": 12}
+
+
+# --- Matrix kernels (one series per row, O(n) each) --- #
+
+def growth_rate_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Percentage change between consecutive periods, shape (series, periods - 1).
+    NaN where the previous period is zero.
+    """
+    previous, current = matrix[:, :-1], matrix[:, 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous != 0, (current - previous) / previous * 100, np.nan)
+
+
+def linear_trend_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Closed-form least squares slope of each row against x = 0..n-1.
+    NaN for rows with fewer than two periods.
+    """
+    n = matrix.shape[-1]
+    if n < 2:
+        return np.full(matrix.shape[0], np.nan)
+    # Centered x: Σ(x - x̄)(y - ȳ) = Σ(x - x̄)·y, so the mean of y is not needed
+    x = np.arange(n, dtype=np.float64) - (n - 1) / 2
+    return matrix @ x / (x @ x)
+
+
+def seasonal_index_from_totals(month_totals: np.ndarray, month_counts: np.ndarray) -> np.ndarray:
+    """
+    Seasonal index from per-month sums and counts: each month's mean divided by the
+    mean of the monthly means. Shape (series, 12); NaN for months without data,
+    0 when the mean of the monthly means is zero.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        month_means = np.atleast_2d(month_totals) / month_counts
+        if not np.any(month_counts):
+            return month_means
+        overall = np.nanmean(month_means, axis=-1, keepdims=True)
+        return np.where(overall != 0, month_means / overall, np.where(month_counts > 0, 0.0, np.nan))
+
+
+def seasonal_index_matrix(matrix: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Seasonal index of each row, with the month sums computed by a single bincount.
+    `months` (1..12) is shared by every row.
+    """
+    rows = matrix.shape[0]
+    month_index = np.asarray(months, dtype=np.intp) - 1
+    # Offsetting each row by 12 bins sums every row in one pass
+    bins = (np.arange(rows, dtype=np.intp)[:, None] * 12 + month_index).ravel()
+    totals = np.bincount(bins, weights=matrix.ravel(), minlength=rows * 12).reshape(rows, 12)
+    counts = np.bincount(month_index, minlength=12)
+    return seasonal_index_from_totals(totals, counts)
+
+
+def rolling_mean_matrix(matrix: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling mean over full windows only, shape (series, periods - window + 1),
+    from differences of the cumulative sum.
+    """
+    n = matrix.shape[-1]
+    if n < window:
+        return np.empty((matrix.shape[0], 0))
+    cumulative = np.zeros((matrix.shape[0], n + 1))
+    np.cumsum(matrix, axis=-1, out=cumulative[:, 1:])
+    return (cumulative[:, window:] - cumulative[:, :-window]) / window
+
+
+def historical_comparison_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Percentage difference of each period to the series mean (0 when the mean is zero).
+    """
+    mean = matrix.mean(axis=-1, keepdims=True) if matrix.shape[-1] else np.zeros((matrix.shape[0], 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mean != 0, (matrix - mean) / mean * 100, 0.0)
+
+
+# --- Conversion to the TimeSeriesStats field types --- #
+
+def _float_list(row: np.ndarray) -> list:
+    return row.tolist()
+
+
+def _optional_float_list(row: np.ndarray) -> list:
+    # NaN (undefined growth) becomes None
+    return [None if value != value else value for value in row.tolist()]
+
+
+def _optional_float(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def month_dict(row: np.ndarray) -> dict:
+    """
+    Converts one row of seasonal indexes to the {"month": index} form, skipping months without data.
+    """
+    return {str(month + 1): value for month, value in enumerate(row.tolist()) if value == value}
+
+
+def _per_series(values: np.ndarray, kernel: Callable[[np.ndarray], np.ndarray], convert: Callable):
+    """
+    Runs a matrix kernel on one series (1-D) or on several (2-D, one per row) and
+    converts the output: a single result for 1-D input, a list with one result per row for 2-D.
+    """
+    matrix = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    result = kernel(matrix)
+    if np.ndim(values) == 1:
+        return convert(result[0])
+    return [convert(row) for row in result]
+
+
+# --- Statistics functions (see services/statistics.py) --- #
+
+def calculate_yearly_growth_rate(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Measures the percentage growth of the burned area from one year to the next.
+    None where the previous year had no burned area.
     """
     if mode != "annual":
         return
+    return _per_series(values, growth_rate_matrix, _optional_float_list)
 
-def calculate_linear_trend(local_code: str, grouping: str, mode: str):
+def calculate_linear_trend(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Indicates whether the burned area has a general trend of increase or decrease over time.
+    Least squares slope in area per period (None with fewer than two periods).
     """
-    pass
+    return _per_series(values, linear_trend_matrix, _optional_float)
 
-def calculate_seasonal_index(local_code: str, grouping: str, mode: str):
+def calculate_seasonal_index(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Reveals which months of the year are historically more prone to fires.
+    Maps each month ("1".."12") to its mean divided by the mean of the monthly means.
     """
     if mode != "monthly":
         return
+    return _per_series(values, lambda matrix: seasonal_index_matrix(matrix, months), month_dict)
 
-def calculate_rolling_mean(local_code: str, grouping: str, mode: str):
+def calculate_rolling_mean(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Smooths monthly or annual fluctuations to more clearly show the long-term trend.
+    Mean of each full window of ROLLING_WINDOW[mode] periods.
     """
-    pass
+    window = ROLLING_WINDOW[mode]
+    return _per_series(values, lambda matrix: rolling_mean_matrix(matrix, window), _float_list)
 
-def compare_to_historical_average(local_code: str, grouping: str, mode: str):
+def compare_to_historical_average(values: np.ndarray, months: Optional[np.ndarray], mode: str):
     """
     Compares the burned area of a period to the average for the entire period, indicating if the year was above or below 'normal'.
+    Percentage above (positive) or below (negative) the series mean.
     """
-    pass
\ No newline at end of file
+    return _per_series(values, historical_comparison_matrix, _float_list)
@@ -0,0 +1,60 @@
+# tests/conftest.py
+
+import asyncio
+
+import pytest
+
+from data import cache_manager
+from services import fire_data
+
+# Series returned by the fake upstream for every territory
+SERIES = {
+    "annual": [{"year": 2023, "areaHa": 10.5}, {"year": 2024, "areaHa": 4.0}],
+    "monthly": [{"year": 2024, "month": 8, "areaHa": 4.0}],
+}
+
+
+class FakeUpstream:
+    """
+    Stands in for fetch_external_api_data: records the called URLs and returns SERIES
+    (or raises `error` when set).
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.error = None
+
+    async def __call__(self, url: str, endpoint: str = "other"):
+        self.calls.append(url)
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return SERIES
+
+
+@pytest.fixture
+def isolated_cache(tmp_path):
+    """
+    Empty in-memory cache backed by a SQLite file in a temporary directory.
+    """
+    cache_manager._cache_store.clear()
+    cache_manager.configure_disk_cache(str(tmp_path / "cache.sqlite3"))
+    yield cache_manager
+    cache_manager._cache_store.clear()
+    cache_manager.configure_disk_cache(None)
+
+
+@pytest.fixture
+def upstream(isolated_cache, monkeypatch):
+    """
+    Fake MapBiomas behind the fire data service, with names resolved locally.
+    """
+    fake = FakeUpstream()
+    monkeypatch.setattr(fire_data, "fetch_external_api_data", fake)
+
+    async def resolve_name(local_type, local_code):
+        return "Acre"
+
+    monkeypatch.setattr(fire_data, "resolve_territory_name", resolve_name)
+    fire_data._failed_refreshes.clear()
+    return fake
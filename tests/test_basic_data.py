@@ -0,0 +1,77 @@
+# tests/test_basic_data.py
+
+import itertools
+import statistics
+
+import numpy as np
+import pytest
+
+from statistics_math.basic_data import basic_stats, basic_stats_from_row, basic_stats_matrix
+
+
+def _quantile(values, q):
+    # Linear interpolation between the closest ranks (numpy's default method)
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def reference_basic_stats(values):
+    n = len(values)
+    mean = statistics.fmean(values)
+    variance = statistics.variance(values) if n > 1 else 0.0
+    zeros = sum(1 for value in values if value == 0)
+    return {
+        "sample_size": n,
+        "total_area_burned": sum(values),
+        "average_area_burned": mean,
+        "median_area_burned": statistics.median(values),
+        "minimum_area_burned": min(values),
+        "maximum_area_burned": max(values),
+        "range_area_burned": max(values) - min(values),
+        "variance_area_burned": variance,
+        "standard_deviation_area_burned": variance ** 0.5,
+        "coefficient_of_variation": variance ** 0.5 / mean if mean else None,
+        "first_quartile_area_burned": _quantile(values, 0.25),
+        "third_quartile_area_burned": _quantile(values, 0.75),
+        "sum_cumulative_area_burned": statistics.fmean(itertools.accumulate(values)),
+        "number_of_zero_burned_periods": zeros,
+        "proportion_of_nonzero_burned_periods": (n - zeros) / n,
+    }
+
+
+def assert_fields_close(actual: dict, expected: dict):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        if value is None:
+            assert actual[name] is None, name
+        else:
+            assert actual[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+
+SERIES = {
+    "gamma": np.random.default_rng(5).gamma(0.6, 400.0, size=480),
+    "one period": np.array([42.0]),
+    "two periods": np.array([0.0, 10.0]),
+    "all zeros": np.zeros(12),
+}
+
+
+@pytest.mark.parametrize("name", SERIES, ids=str)
+def test_basic_stats_matches_reference(name):
+    values = SERIES[name]
+    assert_fields_close(basic_stats(values, None, "annual").model_dump(), reference_basic_stats(values.tolist()))
+
+
+def test_basic_stats_of_empty_series_is_none():
+    assert basic_stats(np.empty(0), None, "annual") is None
+
+
+def test_matrix_rows_match_reference():
+    rng = np.random.default_rng(9)
+    matrix = np.vstack([rng.gamma(0.6, 400.0, size=(3, 40)), np.zeros(40)])
+    stats = basic_stats_matrix(matrix)
+    for row in range(matrix.shape[0]):
+        assert_fields_close(basic_stats_from_row(stats, row).model_dump(), reference_basic_stats(matrix[row].tolist()))
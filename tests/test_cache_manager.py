@@ -0,0 +1,123 @@
+# tests/test_cache_manager.py
+
+import sqlite3
+import threading
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from data import cache_manager
+from data.cache_manager import CACHE_MAX_STALE, CACHE_TTL, _cache_key
+from data.disk_cache import DiskCache
+from data.fire_series import series_from_payload
+
+PAYLOAD = {
+    "local_name": "Acre",
+    "annual": [{"year": 2023, "areaHa": 10.5}, {"year": 2024, "areaHa": 0.0}],
+    "monthly": [{"year": 2024, "month": 8, "areaHa": 7.25}],
+}
+KEY = ("state", "12", "biome")
+
+
+def _store_with_age(cache, age: timedelta):
+    entry = cache.set_raw_data_to_cache(*KEY, PAYLOAD)
+    entry.last_updated = date.today() - age
+    cache._get_disk_cache().save(_cache_key(*KEY), entry)
+    cache._cache_store.clear()
+
+
+def test_fresh_disk_entry_is_promoted(isolated_cache):
+    _store_with_age(isolated_cache, timedelta(days=1))
+
+    assert isolated_cache.get_raw_data_from_cache(*KEY).local_name == "Acre"
+    assert _cache_key(*KEY) in isolated_cache._cache_store
+
+
+def test_expired_disk_entry_is_not_served_as_fresh(isolated_cache):
+    _store_with_age(isolated_cache, CACHE_TTL + timedelta(days=1))
+
+    assert isolated_cache.get_raw_data_from_cache(*KEY) is None
+    assert isolated_cache.get_stale_data_from_cache(*KEY) is not None
+
+
+def test_entry_past_the_stale_window_is_not_promoted(isolated_cache):
+    _store_with_age(isolated_cache, CACHE_TTL + CACHE_MAX_STALE + timedelta(days=1))
+
+    assert isolated_cache.get_raw_data_from_cache(*KEY) is None
+    assert isolated_cache.get_stale_data_from_cache(*KEY) is None
+    assert _cache_key(*KEY) not in isolated_cache._cache_store
+    # Still readable as the last known value
+    assert isolated_cache.show_all_data(*KEY).local_name == "Acre"
+    assert _cache_key(*KEY) not in isolated_cache._cache_store
+
+
+def test_close_reaches_the_connections_of_every_thread(tmp_path):
+    disk_cache = DiskCache(str(tmp_path / "cache.sqlite3"))
+    connections = []
+
+    def open_connection():
+        connections.append(disk_cache._connection())
+
+    threads = [threading.Thread(target=open_connection) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    disk_cache.close()
+
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+    # The cache stays usable: a new connection is opened
+    assert disk_cache.load("missing") is None
+    disk_cache.close()
+
+
+def test_disk_tier_is_trimmed_by_size_not_age(isolated_cache):
+    disk_cache = isolated_cache._get_disk_cache()
+    for days, code in ((400, "1"), (10, "2"), (100, "3")):
+        entry = isolated_cache.set_raw_data_to_cache("state", code, "biome", PAYLOAD)
+        entry.last_updated = date.today() - timedelta(days=days)
+        disk_cache.save(_cache_key("state", code, "biome"), entry)
+
+    assert disk_cache.trim(3) == 0
+    assert disk_cache.trim(2) == 1
+    assert sorted(entry.local_id for entry in disk_cache.entries()) == ["2", "3"]
+
+
+def test_rewriting_identical_data_keeps_last_modified(isolated_cache, monkeypatch):
+    clock = iter([1000.0, 2000.0, 3000.0, 4000.0])
+    monkeypatch.setattr(cache_manager, "time", SimpleNamespace(time=lambda: next(clock)))
+
+    first = isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD)
+    again = isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD)
+    assert (again.modified_at, again.raw_etag) == (1000.0, first.raw_etag)
+
+    changed = isolated_cache.set_raw_data_to_cache(*KEY, {**PAYLOAD, "monthly": []})
+    assert changed.modified_at == 3000.0
+
+    isolated_cache.set_statistics_to_cache(changed, "annual", lambda current: current)
+    assert isolated_cache.show_all_data(*KEY).modified_at == 3000.0
+
+
+def test_restore_keeps_newer_cached_data(isolated_cache):
+    current = isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD)
+    older = series_from_payload(*KEY, {**PAYLOAD, "local_name": "Old Acre"}, current.last_updated - timedelta(days=3))
+
+    assert isolated_cache.restore_entries([older]) == 0
+    assert isolated_cache.show_all_data(*KEY).local_name == "Acre"
+
+    # Only the disk tier holds the newer copy
+    isolated_cache._cache_store.clear()
+    assert isolated_cache.restore_entries([older]) == 0
+    assert isolated_cache.show_all_data(*KEY).local_name == "Acre"
+
+
+def test_sweeper_runs_without_the_disk_tier(isolated_cache):
+    isolated_cache.configure_disk_cache(None)
+    isolated_cache.start_cache_maintenance()
+    try:
+        assert isolated_cache._cache_store._sweeper.is_alive()
+    finally:
+        isolated_cache.stop_cache_maintenance()
@@ -0,0 +1,59 @@
+# tests/test_cache_snapshot.py
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from data import cache_snapshot  # noqa: E402
+from services.statistics import compute_missing_statistics  # noqa: E402
+
+PAYLOAD = {
+    "local_name": "Acre",
+    "annual": [{"year": year, "areaHa": area} for year, area in zip(range(2015, 2025), np.linspace(1.5, 90.0, 10))],
+    "monthly": [{"year": 2024, "month": month, "areaHa": month * 2.5} for month in range(1, 13)],
+}
+KEY = ("state", "12", "biome")
+
+
+@pytest.mark.parametrize("snapshot_format", tuple(cache_snapshot.SNAPSHOT_FORMATS))
+def test_snapshot_round_trip(isolated_cache, tmp_path, snapshot_format):
+    entry = compute_missing_statistics(isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD))
+
+    cache_snapshot.export_snapshot(str(tmp_path), snapshot_format, lambda: [entry])
+    (restored,) = cache_snapshot.read_snapshot(str(tmp_path))
+
+    assert (restored.local_type, restored.local_id, restored.grouping) == KEY
+    assert restored.last_updated == entry.last_updated
+    np.testing.assert_array_equal(restored.monthly_area, entry.monthly_area)
+    assert restored.statistic.model_dump_json() == entry.statistic.model_dump_json()
+
+
+def test_statistics_are_joined_per_series_batch(isolated_cache, tmp_path, monkeypatch):
+    entries = [
+        compute_missing_statistics(isolated_cache.set_raw_data_to_cache("state", local_id, "biome", PAYLOAD))
+        for local_id in ("12", "13", "14")
+    ]
+    monkeypatch.setattr(cache_snapshot, "SNAPSHOT_BATCH_ROWS", 1)
+    cache_snapshot.export_snapshot(str(tmp_path), "arrow", lambda: entries)
+
+    built = []
+    validate = cache_snapshot.Statistics.model_validate
+    monkeypatch.setattr(cache_snapshot.Statistics, "model_validate", lambda value: built.append(value) or validate(value))
+
+    restored = cache_snapshot.read_snapshot(str(tmp_path))
+    first = next(restored)
+    assert first.local_id == "12" and first.statistic is not None
+    assert len(built) == 1
+    assert [entry.local_id for entry in restored] == ["13", "14"]
+    assert len(built) == 3
+
+
+def test_export_reads_the_configured_disk_cache(isolated_cache, tmp_path, capsys):
+    compute_missing_statistics(isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD))
+
+    cache_snapshot.main(["export", str(tmp_path / "snapshot")])
+
+    assert "'series': 1" in capsys.readouterr().out
+    (restored,) = cache_snapshot.read_snapshot(str(tmp_path / "snapshot"))
+    assert restored.local_id == "12"
@@ -0,0 +1,114 @@
+# tests/test_descriptive_stats.py
+
+import bisect
+import statistics
+
+import numpy as np
+import pytest
+
+from statistics_math import descriptive_stats as kernels
+from statistics_math.descriptive_stats import ANOMALY_IQR_FACTOR, EVENT_BIN_EDGES, bin_labels, descriptive_stats
+
+
+def _quantile(ordered, q):
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def reference_descriptive_stats(values):
+    n = len(values)
+    mean = statistics.fmean(values)
+    ordered = sorted(values)
+    first_quartile, third_quartile = _quantile(ordered, 0.25), _quantile(ordered, 0.75)
+    iqr = third_quartile - first_quartile
+    low, high = first_quartile - ANOMALY_IQR_FACTOR * iqr, third_quartile + ANOMALY_IQR_FACTOR * iqr
+    total = sum(values)
+
+    # Gini as the mean absolute difference over twice the mean
+    gini = sum(abs(a - b) for a in values for b in values) / (2 * n * n * mean) if total > 0 else None
+    standard_deviation = statistics.stdev(values) if n > 1 else 0.0
+
+    labels = bin_labels()
+    bins = dict.fromkeys(labels, 0)
+    for value in values:
+        index = bisect.bisect_right(EVENT_BIN_EDGES, value) - 1
+        if index >= 0:
+            bins[labels[index]] += 1
+
+    return {
+        "coefficient_of_variation": standard_deviation / mean if mean else None,
+        "anomalies_count": sum(1 for value in values if value < low or value > high),
+        "concentration_index": gini,
+        "large_event_proportion": sum(1 for v in values if v >= third_quartile) / n,
+        "large_event_area_share": sum(v for v in values if v >= third_quartile) / total if total > 0 else None,
+        "event_counts_by_bin": bins,
+    }
+
+
+def assert_fields_close(actual: dict, expected: dict):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        if value is None or isinstance(value, (int, dict)):
+            assert actual[name] == value, name
+        else:
+            assert actual[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+
+def _with_outliers():
+    values = np.random.default_rng(2).gamma(0.6, 400.0, size=480)
+    values[[10, 200]] = [60000.0, 25000.0]
+    return values
+
+
+SERIES = {
+    "gamma with outliers": _with_outliers(),
+    "one period": np.array([250.0]),
+    "equal periods": np.full(8, 3.0),
+    "all zeros": np.zeros(12),
+}
+
+
+@pytest.mark.parametrize("name", SERIES, ids=str)
+def test_descriptive_stats_matches_reference(name):
+    values = SERIES[name]
+    assert_fields_close(descriptive_stats(values, None, "monthly"), reference_descriptive_stats(values.tolist()))
+
+
+def test_descriptive_stats_of_empty_series_is_none():
+    assert descriptive_stats(np.empty(0), None, "monthly") is None
+
+
+def test_matrix_rows_match_reference():
+    matrix = np.vstack([_with_outliers()[:120], np.zeros(120), np.arange(120, dtype=np.float64)])
+    results = descriptive_stats(matrix, None, "monthly")
+    assert len(results) == matrix.shape[0]
+    for row, fields in enumerate(results):
+        assert_fields_close(fields, reference_descriptive_stats(matrix[row].tolist()))
+
+
+def test_large_event_proportion_counts_periods():
+    # Q3 of [1, 1, 1, 97] is 25: one period of four, holding 97% of the area
+    fields = descriptive_stats(np.array([1.0, 1.0, 1.0, 97.0]), None, "annual")
+    assert fields["large_event_proportion"] == 0.25
+    assert fields["large_event_area_share"] == pytest.approx(0.97)
+
+
+WRAPPERS = {
+    "calculate_coefficient_of_variation": "coefficient_of_variation",
+    "detect_anomalies": "anomalies_count",
+    "calculate_concentration_index": "concentration_index",
+    "calculate_large_event_proportion": "large_event_proportion",
+    "count_events_by_size_bin": "event_counts_by_bin",
+}
+
+
+@pytest.mark.parametrize("function", WRAPPERS)
+def test_single_field_functions_match_the_kernel(function):
+    calculate = getattr(kernels, function)
+    matrix = np.vstack([_with_outliers()[:120], np.zeros(120)])
+
+    assert calculate(matrix[0], None, "monthly") == descriptive_stats(matrix[0], None, "monthly")[WRAPPERS[function]]
+    assert calculate(matrix, None, "monthly") == [fields[WRAPPERS[function]] for fields in descriptive_stats(matrix, None, "monthly")]
+    assert calculate(np.empty(0), None, "monthly") is None
@@ -0,0 +1,98 @@
+# tests/test_export.py
+
+import asyncio
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from data.fire_series import FireSeries
+from data.pydantic_models import Territory
+from services import export, territory_search
+from services.territory_index import TerritoryIndex
+
+IBGE_MUNICIPALITIES = [
+    {"id": 1200401, "nome": "Rio Branco", "microrregiao": {"mesorregiao": {"UF": {"sigla": "AC"}}}},
+    {"id": 1200013, "nome": "Acrelândia", "microrregiao": None,
+     "regiao-imediata": {"regiao-intermediaria": {"UF": {"sigla": "AC"}}}},
+]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = TerritoryIndex()
+    monkeypatch.setattr(export, "territory_index", index)
+    monkeypatch.setattr(territory_search, "territory_index", index)
+    return index
+
+
+@pytest.fixture
+def ibge(monkeypatch):
+    calls = []
+
+    async def fetch(url, endpoint="other"):
+        calls.append(url)
+        return IBGE_MUNICIPALITIES
+
+    monkeypatch.setattr(territory_search, "fetch_external_api_data", fetch)
+    return calls
+
+
+def test_children_come_from_upstream_without_a_snapshot(index, ibge):
+    children = asyncio.run(export.export_children("state", "12"))
+
+    assert children == [("municipality", "1200013"), ("municipality", "1200401")]
+    assert ibge == [f"{territory_search.IBGE_API_URL}/localidades/estados/12/municipios"]
+    assert index.lookup("municipality", "1200013").uf == "AC"
+
+
+def test_children_come_from_a_complete_index(index, ibge):
+    index.load([Territory(name="Rio Branco", code=1200401, type="municipality", uf="AC")], complete=True)
+
+    assert asyncio.run(export.export_children("state", "12")) == [("municipality", "1200401")]
+    assert ibge == []
+
+
+@pytest.mark.parametrize("local_type, local_code", [("biome", "1"), ("municipality", "1200401"), ("state", "AC")])
+def test_only_states_can_be_exported(index, ibge, local_type, local_code):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(export.export_children(local_type, local_code))
+    assert error.value.status_code == 422
+    assert ibge == []
+
+
+def _series(local_code: str) -> FireSeries:
+    return FireSeries(
+        local_name=local_code, local_id=local_code, local_type="municipality", grouping="biome",
+        annual_year=np.array([2024], dtype=np.int16), annual_area=np.array([1.5]),
+        monthly_year=np.array([2024], dtype=np.int16), monthly_month=np.array([8], dtype=np.int8),
+        monthly_area=np.array([1.5]), last_updated=date.today(),
+    )
+
+
+def test_stream_keeps_at_most_concurrency_loads_in_flight(monkeypatch):
+    in_flight, peak = 0, 0
+
+    async def load(local_type, local_code, grouping):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (int(local_code) % 3))
+        in_flight -= 1
+        if local_code == "4":
+            raise HTTPException(status_code=502, detail="upstream down")
+        return _series(local_code)
+
+    monkeypatch.setattr(export, "load_fire_series", load)
+    children = [("municipality", str(code)) for code in range(10)]
+
+    async def collect():
+        return [chunk async for chunk in export.stream_export(children, "biome", "annual", "csv", concurrency=3)]
+
+    chunks = asyncio.run(collect())
+
+    assert peak == 3
+    assert chunks[0] == b"local_type,local_code,grouping,year,month,areaHa\n"
+    # In order, with the failed child skipped
+    assert [chunk.split(b",")[1] for chunk in chunks[1:]] == [str(code).encode() for code in range(10) if code != 4]
@@ -0,0 +1,149 @@
+# tests/test_fire_data.py
+
+import asyncio
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from fastapi import HTTPException
+
+from data import cache_manager
+from data.pydantic_models import TerritoryKey
+from services import fire_data
+
+KEY = ("state", "12", "biome")
+
+
+def test_cache_write_runs_off_the_event_loop(upstream, monkeypatch):
+    threads = []
+    store = fire_data.set_raw_data_to_cache
+
+    def recording_store(*args):
+        threads.append(threading.current_thread())
+        return store(*args)
+
+    monkeypatch.setattr(fire_data, "set_raw_data_to_cache", recording_store)
+
+    entry = asyncio.run(fire_data.load_fire_series(*KEY))
+
+    assert entry.local_name == "Acre"
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_disk_reads_run_off_the_event_loop(upstream, monkeypatch):
+    asyncio.run(fire_data.load_fire_series(*KEY))
+    cache_manager._cache_store.clear()
+    threads = []
+    load = cache_manager._load_from_disk
+
+    def recording_load(*args):
+        threads.append(threading.current_thread())
+        return load(*args)
+
+    monkeypatch.setattr(cache_manager, "_load_from_disk", recording_load)
+
+    entry = asyncio.run(fire_data.load_fire_series(*KEY))
+
+    assert entry.local_name == "Acre" and len(upstream.calls) == 1
+    assert threads and threading.main_thread() not in threads
+
+
+def test_concurrent_misses_share_one_fetch(upstream):
+    async def load_many():
+        return await asyncio.gather(*(fire_data.load_fire_series(*KEY) for _ in range(5)))
+
+    entries = asyncio.run(load_many())
+
+    assert len(upstream.calls) == 1
+    assert all(entry is entries[0] for entry in entries)
+
+
+def _age(entry, days: int):
+    # Backdates a cached entry on disk and drops its memory copy (reloaded from disk)
+    cache_key = cache_manager._cache_key(entry.local_type, entry.local_id, entry.grouping)
+    entry.last_updated = date.today() - timedelta(days=days)
+    cache_manager._get_disk_cache().save(cache_key, entry)
+    cache_manager._cache_store.delete(cache_key)
+
+
+def test_last_good_value_outlives_the_stale_window(upstream):
+    entry = asyncio.run(fire_data.load_fire_series(*KEY))
+    _age(entry, (cache_manager.CACHE_TTL + cache_manager.CACHE_MAX_STALE).days + 30)
+
+    # Background maintenance keeps the disk copy
+    cache_manager._cache_store.sweep()
+    cache_manager._trim_disk_cache()
+    assert cache_manager.get_stale_data_from_cache(*KEY) is None
+
+    upstream.error = HTTPException(status_code=503, detail="circuit open")
+    served = asyncio.run(fire_data.load_fire_series(*KEY))
+
+    assert served.local_name == "Acre"
+    assert served.annual_area.tolist() == [10.5, 4.0]
+
+
+def test_stale_value_is_served_while_refreshing(upstream):
+    entry = asyncio.run(fire_data.load_fire_series(*KEY))
+    _age(entry, cache_manager.CACHE_TTL.days + 1)
+
+    async def read_then_settle():
+        served = await fire_data.load_fire_series(*KEY)
+        await asyncio.gather(*fire_data._background_refreshes)
+        return served
+
+    served = asyncio.run(read_then_settle())
+
+    assert served.last_updated == entry.last_updated
+    assert len(upstream.calls) == 2
+    assert cache_manager.is_entry_fresh(cache_manager.show_all_data(*KEY))
+
+
+def test_any_background_refresh_failure_is_recorded(upstream):
+    entry = asyncio.run(fire_data.load_fire_series(*KEY))
+    _age(entry, cache_manager.CACHE_TTL.days + 1)
+    upstream.error = sqlite3.OperationalError("database is locked")
+
+    async def read_then_settle():
+        served = await fire_data.load_fire_series(*KEY)
+        await asyncio.gather(*fire_data._background_refreshes)
+        return served
+
+    assert asyncio.run(read_then_settle()).last_updated == entry.last_updated
+    assert KEY in fire_data._failed_refreshes
+
+
+def _territory(local_code: str) -> TerritoryKey:
+    return TerritoryKey(local_type="state", local_code=local_code, grouping="biome")
+
+
+def test_region_sums_are_rounded(upstream):
+    region = asyncio.run(fire_data.aggregate_territories([_territory("12"), _territory("13")], [0.1, 0.2]))
+
+    # 10.5 * 0.1 + 10.5 * 0.2 is 3.1500000000000004 in floating point
+    assert region.annual_area.tolist() == [3.15, 1.2]
+    assert region.monthly_area.tolist() == [1.2]
+
+
+def test_stale_region_is_never_fetched_upstream(upstream):
+    region = asyncio.run(fire_data.aggregate_territories([_territory("12"), _territory("13")]))
+    _age(region, (cache_manager.CACHE_TTL + cache_manager.CACHE_MAX_STALE).days + 30)
+    upstream.calls.clear()
+
+    served = asyncio.run(fire_data.load_fire_series(fire_data.REGION_TYPE, region.local_id, fire_data.REGION_GROUPING))
+
+    assert served.annual_area.tolist() == [21.0, 8.0]
+    assert upstream.calls == []
+    assert not fire_data._background_refreshes
+
+
+def test_expired_region_is_rebuilt_from_its_members(upstream):
+    members = [_territory("12"), _territory("13")]
+    region = asyncio.run(fire_data.aggregate_territories(members))
+    _age(region, cache_manager.CACHE_TTL.days + 1)
+    upstream.calls.clear()
+
+    rebuilt = asyncio.run(fire_data.aggregate_territories(members))
+
+    # The members are still fresh: nothing is fetched, and the region is cached again
+    assert upstream.calls == []
+    assert rebuilt.last_updated == date.today()
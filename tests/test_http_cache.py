@@ -0,0 +1,57 @@
+# tests/test_http_cache.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+URL = "/data/raw/state/12/biome"
+
+
+@pytest.fixture
+def client(upstream):
+    # No lifespan: the background services are not needed
+    return TestClient(main.app)
+
+
+def test_matching_etag_gets_a_304(client):
+    first = client.get(URL, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert first.json()["local_name"] == "Acre"
+
+    again = client.get(URL, headers={"Accept-Encoding": "identity", "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert again.content == b""
+
+    other = client.get(URL, headers={"Accept-Encoding": "identity", "If-None-Match": '"something-else"'})
+    assert other.status_code == 200
+
+
+def test_if_modified_since_uses_the_last_change(client):
+    first = client.get(URL)
+    last_modified = first.headers["Last-Modified"]
+
+    assert client.get(URL, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(URL, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+
+
+def test_etag_differs_per_content_coding(client):
+    identity = client.get(URL, headers={"Accept-Encoding": "identity"})
+    gzip = client.get(URL, headers={"Accept-Encoding": "gzip"})
+
+    assert identity.headers["Vary"] == "Accept-Encoding"
+    if gzip.headers.get("Content-Encoding") == "gzip":
+        assert gzip.headers["ETag"] != identity.headers["ETag"]
+
+
+def test_statistics_are_revalidated_instead_of_cached_for_the_ttl(client):
+    raw = client.get(URL)
+    statistics = client.get("/data/all/statistics/state/12/biome")
+
+    assert raw.headers["Cache-Control"].startswith("public, max-age=")
+    assert statistics.status_code == 200
+    assert statistics.headers["Cache-Control"] == "public, no-cache"
+
+    again = client.get("/data/all/statistics/state/12/biome", headers={"If-None-Match": statistics.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,143 @@
+# tests/test_incremental.py
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from data.fire_series import AREA_DTYPE, MONTH_DTYPE, YEAR_DTYPE, FireSeries
+from data.pydantic_models import AnnualStatistics, MonthlyStatistics, Statistics, TimeSeriesStats
+from statistics_math.basic_data import basic_stats
+from statistics_math.incremental import aggregates_from_values, carry_over_statistics
+from statistics_math.time_series_analysis import (
+    calculate_linear_trend,
+    calculate_rolling_mean,
+    calculate_seasonal_index,
+    calculate_yearly_growth_rate,
+    compare_to_historical_average,
+)
+
+
+def _series(years: int, seed: int = 4) -> FireSeries:
+    rng = np.random.default_rng(seed)
+    monthly = rng.gamma(0.6, 400.0, size=years * 12)
+    monthly[rng.random(monthly.size) < 0.2] = 0.0
+    return FireSeries(
+        local_name="Test",
+        local_id="1",
+        local_type="state",
+        grouping="biome",
+        annual_year=np.arange(1985, 1985 + years, dtype=YEAR_DTYPE),
+        annual_area=monthly.reshape(years, 12).sum(axis=1).astype(AREA_DTYPE),
+        monthly_year=np.repeat(np.arange(1985, 1985 + years), 12).astype(YEAR_DTYPE),
+        monthly_month=np.tile(np.arange(1, 13), years).astype(MONTH_DTYPE),
+        monthly_area=monthly.astype(AREA_DTYPE),
+        last_updated=date.today(),
+    )
+
+
+def _truncated(series: FireSeries, years: int) -> FireSeries:
+    return FireSeries(
+        local_name=series.local_name,
+        local_id=series.local_id,
+        local_type=series.local_type,
+        grouping=series.grouping,
+        annual_year=series.annual_year[:years],
+        annual_area=series.annual_area[:years],
+        monthly_year=series.monthly_year[:years * 12],
+        monthly_month=series.monthly_month[:years * 12],
+        monthly_area=series.monthly_area[:years * 12],
+        last_updated=series.last_updated,
+    )
+
+
+def full_statistics(series: FireSeries) -> Statistics:
+    intervals = {}
+    for interval, model in (("annual", AnnualStatistics), ("monthly", MonthlyStatistics)):
+        args = (series.area(interval), series.months(interval), interval)
+        intervals[interval] = model(
+            basic=basic_stats(*args),
+            time_series=TimeSeriesStats(
+                yearly_growth_rate=calculate_yearly_growth_rate(*args),
+                linear_trend_slope=calculate_linear_trend(*args),
+                seasonal_index=calculate_seasonal_index(*args),
+                rolling_mean=calculate_rolling_mean(*args),
+                historical_comparison=compare_to_historical_average(*args),
+            ),
+        )
+    return Statistics(**intervals)
+
+
+def assert_same(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            assert_same(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for item, expected_item in zip(actual, expected):
+            assert_same(item, expected_item)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-6)
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize("old_years", [1, 2, 39])
+def test_appended_periods_match_full_recompute(old_years):
+    refreshed = _series(40)
+    previous = _truncated(refreshed, old_years)
+    previous.statistic = full_statistics(previous)
+
+    statistic, aggregates = carry_over_statistics(previous, refreshed)
+
+    expected = full_statistics(refreshed).model_dump()
+    for interval in ("annual", "monthly"):
+        carried = getattr(statistic, interval).model_dump()
+        # Descriptive statistics need the whole series: they are dropped for the next calculation
+        assert carried["descriptive"] is None
+        assert_same(carried["basic"], expected[interval]["basic"])
+        assert_same(carried["time_series"], expected[interval]["time_series"])
+        assert aggregates[interval].count == refreshed.area(interval).size
+
+
+def test_unchanged_series_keeps_its_statistics():
+    previous = _series(5)
+    previous.statistic = full_statistics(previous)
+
+    statistic, _aggregates = carry_over_statistics(previous, _series(5))
+
+    assert statistic == previous.statistic
+
+
+def test_changed_history_drops_the_statistics():
+    refreshed = _series(6)
+    previous = _truncated(refreshed, 5)
+    previous.statistic = full_statistics(previous)
+    # A revised historical month; the annual series only gains a year
+    refreshed.monthly_area = refreshed.monthly_area.copy()
+    refreshed.monthly_area[0] += 1.0
+
+    statistic, _aggregates = carry_over_statistics(previous, refreshed)
+
+    assert statistic.monthly is None
+    assert statistic.annual is not None
+
+
+def test_previous_aggregates_are_left_untouched():
+    refreshed = _series(6)
+    previous = _truncated(refreshed, 5)
+    previous.statistic = full_statistics(previous)
+    previous.aggregates = {
+        interval: aggregates_from_values(previous.area(interval), previous.months(interval), interval)
+        for interval in ("annual", "monthly")
+    }
+    counts = {interval: aggregates.count for interval, aggregates in previous.aggregates.items()}
+    sorted_values = previous.aggregates["monthly"].sorted_values
+
+    _statistic, aggregates = carry_over_statistics(previous, refreshed)
+
+    # The entry still being served keeps its own state if the refresh is discarded
+    assert {interval: state.count for interval, state in previous.aggregates.items()} == counts
+    assert previous.aggregates["monthly"].sorted_values is sorted_values
+    assert aggregates["monthly"].count == refreshed.monthly_area.size
@@ -0,0 +1,40 @@
+# tests/test_profiling.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import profiling
+
+URL = "/data/raw/state/12/biome"
+
+
+@pytest.fixture
+def client(upstream):
+    # No lifespan: the background services are not needed
+    return TestClient(main.app)
+
+
+def test_profiling_is_off_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+
+    response = client.get(URL, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/admin/profiles", headers={"X-Profile-Token": ""}).status_code == 404
+    assert client.get("/admin/profiles/1").status_code == 404
+
+
+def test_profiling_needs_the_token(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+
+    assert "X-Profile-Id" not in client.get(URL, headers={"X-Profile": "1"}).headers
+    profiled = client.get(URL, headers={"X-Profile": "secret"})
+    profile_id = profiled.headers["X-Profile-Id"]
+
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    listed = client.get("/admin/profiles", headers={"X-Profile-Token": "secret"})
+    assert listed.status_code == 200
+    assert str(listed.json()[0]["id"]) == profile_id
+    assert client.get(f"/admin/profiles/{profile_id}", headers={"X-Profile-Token": "secret"}).status_code == 200
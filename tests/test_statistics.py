@@ -0,0 +1,53 @@
+# tests/test_statistics.py
+
+from dataclasses import replace
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+import main
+from data import cache_manager
+from services.statistics import compute_interval_statistics
+
+PAYLOAD = {
+    "local_name": "Acre",
+    "annual": [{"year": year, "areaHa": float(year % 7)} for year in range(2015, 2025)],
+    "monthly": [{"year": 2024, "month": month, "areaHa": month * 1.5} for month in range(1, 13)],
+}
+KEY = ("state", "12", "biome")
+
+
+def test_intervals_computed_at_once_keep_each_other(isolated_cache):
+    entry = isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD)
+    # A reader that loaded the entry before the annual statistics were stored
+    outdated = replace(entry, statistic=None)
+
+    compute_interval_statistics(entry, "annual")
+    compute_interval_statistics(outdated, "monthly")
+
+    statistic = isolated_cache.show_all_data(*KEY).statistic
+    assert statistic.annual is not None and statistic.monthly is not None
+
+
+def test_statistics_of_a_replaced_series_are_dropped(isolated_cache):
+    old = isolated_cache.set_raw_data_to_cache(*KEY, PAYLOAD)
+    isolated_cache.set_raw_data_to_cache(*KEY, {**PAYLOAD, "annual": PAYLOAD["annual"][:5]})
+
+    result = compute_interval_statistics(old, "annual")
+
+    # The caller gets the results of the series it computed from, the cache keeps the new series clean
+    assert result.statistic.annual.basic.total_area_burned == sum(old.annual_area.tolist())
+    assert isolated_cache.show_all_data(*KEY).statistic is None
+
+
+def test_calculation_serves_stale_series(upstream):
+    entry = cache_manager.set_raw_data_to_cache(*KEY, PAYLOAD)
+    cache_key = cache_manager._cache_key(*KEY)
+    entry.last_updated = date.today() - cache_manager.CACHE_TTL - timedelta(days=1)
+    cache_manager._get_disk_cache().save(cache_key, entry)
+    cache_manager._cache_store.delete(cache_key)
+
+    response = TestClient(main.app).get("/data/all/statistics/calculation/year/state/12/biome")
+
+    assert response.status_code == 200
+    assert response.json()["statistic"]["annual"]["basic"] is not None
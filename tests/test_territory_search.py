@@ -0,0 +1,106 @@
+# tests/test_territory_search.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from data.pydantic_models import Territory
+from services import territory_index, territory_search
+from services.territory_index import TerritoryIndex
+
+RIO_DE_JANEIRO = Territory(name="Rio de Janeiro", code=33, type="state", uf="RJ")
+RIO_GRANDE_DO_SUL = Territory(name="Rio Grande do Sul", code=43, type="state", uf="RS")
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = TerritoryIndex()
+    monkeypatch.setattr(territory_search, "territory_index", index)
+    return index
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    async def search(search_term):
+        calls.append(search_term)
+        return [RIO_GRANDE_DO_SUL, RIO_DE_JANEIRO]
+
+    monkeypatch.setattr(territory_search, "search_territories_from_mapbiomas", search)
+    return calls
+
+
+def test_partial_index_still_asks_upstream_and_merges(index, upstream):
+    index.add([RIO_DE_JANEIRO, Territory(name="Rio Branco", code=1200401, type="municipality", uf="AC")])
+
+    found = asyncio.run(territory_search.find_territories("Rio"))
+
+    assert upstream == ["Rio"]
+    assert [territory.name for territory in found] == ["Rio Grande do Sul", "Rio de Janeiro", "Rio Branco"]
+    # Upstream results are learned, but the index is still not complete
+    assert index.lookup("state", "43") == RIO_GRANDE_DO_SUL
+    assert not index.complete
+
+
+def test_complete_index_answers_alone(index, upstream):
+    index.load([RIO_DE_JANEIRO, RIO_GRANDE_DO_SUL], complete=True)
+    index.add([Territory(name="Rio Branco", code=1200401, type="municipality", uf="AC")])
+
+    found = asyncio.run(territory_search.find_territories("rio g"))
+
+    assert upstream == []
+    assert found == [RIO_GRANDE_DO_SUL]
+    assert index.complete
+
+
+def test_known_matches_are_served_when_upstream_fails(index, monkeypatch):
+    index.add([RIO_DE_JANEIRO])
+
+    async def failing_search(search_term):
+        raise HTTPException(status_code=504, detail="timeout")
+
+    monkeypatch.setattr(territory_search, "search_territories_from_mapbiomas", failing_search)
+
+    assert asyncio.run(territory_search.find_territories("rio")) == [RIO_DE_JANEIRO]
+    with pytest.raises(HTTPException):
+        asyncio.run(territory_search.find_territories("belem"))
+
+
+def test_added_names_are_searchable_in_order(index):
+    index.load([RIO_GRANDE_DO_SUL], complete=True)
+    index.add([RIO_DE_JANEIRO, Territory(name="São João de Meriti", code=3305109, type="municipality", uf="RJ")])
+
+    assert index._names == sorted(index._names)
+    assert index.search("janeiro") == [RIO_DE_JANEIRO]
+    assert [territory.code for territory in index.search("rio")] == [33, 43]
+    assert index.search("sao joao")[0].code == 3305109
+    assert index.complete
+
+
+def test_missing_snapshot_is_built_from_ibge(tmp_path, monkeypatch):
+    index = TerritoryIndex()
+    monkeypatch.setattr(territory_index, "territory_index", index)
+    lists = {
+        "/localidades/estados": [{"id": 33, "sigla": "RJ", "nome": "Rio de Janeiro"}],
+        "/localidades/municipios": [
+            {"id": 3304557, "nome": "Rio de Janeiro", "microrregiao": {"mesorregiao": {"UF": {"sigla": "RJ"}}}},
+        ],
+    }
+
+    async def fetch(url, endpoint="other"):
+        return lists[url.removeprefix(territory_index.IBGE_API_URL)]
+
+    monkeypatch.setattr(territory_index, "fetch_external_api_data", fetch)
+    path = str(tmp_path / "territories.json")
+
+    count = asyncio.run(territory_index.refresh_territory_index(path))
+
+    assert count == 2 + len(territory_index.BIOMES)
+    assert index.complete
+    assert index.lookup("municipality", "3304557").uf == "RJ"
+    assert index.search("cerrado")[0].type == "biome"
+    # Written for the next start, then read back without calling upstream
+    monkeypatch.setattr(territory_index, "fetch_external_api_data", None)
+    assert asyncio.run(territory_index.refresh_territory_index(path)) == count
@@ -0,0 +1,148 @@
+# tests/test_time_series_analysis.py
+
+import numpy as np
+import pytest
+
+from statistics_math.time_series_analysis import (
+    ROLLING_WINDOW,
+    calculate_linear_trend,
+    calculate_rolling_mean,
+    calculate_seasonal_index,
+    calculate_yearly_growth_rate,
+    compare_to_historical_average,
+)
+
+FUNCTIONS = (
+    calculate_yearly_growth_rate,
+    calculate_linear_trend,
+    calculate_seasonal_index,
+    calculate_rolling_mean,
+    compare_to_historical_average,
+)
+
+
+# --- Plain Python references --- #
+
+def reference_growth_rate(values, months, mode):
+    if mode != "annual":
+        return None
+    return [
+        None if values[i - 1] == 0 else (values[i] - values[i - 1]) / values[i - 1] * 100
+        for i in range(1, len(values))
+    ]
+
+
+def reference_linear_trend(values, months, mode):
+    n = len(values)
+    if n < 2:
+        return None
+    x_mean = (n - 1) / 2
+    y_mean = sum(values) / n
+    covariance = sum((x - x_mean) * (y - y_mean) for x, y in enumerate(values))
+    return covariance / sum((x - x_mean) ** 2 for x in range(n))
+
+
+def reference_seasonal_index(values, months, mode):
+    if mode != "monthly":
+        return None
+    by_month = {}
+    for month, value in zip(months, values):
+        by_month.setdefault(int(month), []).append(value)
+    means = {month: sum(items) / len(items) for month, items in by_month.items()}
+    if not means:
+        return {}
+    overall = sum(means.values()) / len(means)
+    return {str(month): (mean / overall if overall else 0.0) for month, mean in sorted(means.items())}
+
+
+def reference_rolling_mean(values, months, mode):
+    window = ROLLING_WINDOW[mode]
+    return [sum(values[i:i + window]) / window for i in range(len(values) - window + 1)]
+
+
+def reference_historical_comparison(values, months, mode):
+    if not values:
+        return []
+    mean = sum(values) / len(values)
+    return [(value - mean) / mean * 100 if mean else 0.0 for value in values]
+
+
+REFERENCES = {
+    calculate_yearly_growth_rate: reference_growth_rate,
+    calculate_linear_trend: reference_linear_trend,
+    calculate_seasonal_index: reference_seasonal_index,
+    calculate_rolling_mean: reference_rolling_mean,
+    compare_to_historical_average: reference_historical_comparison,
+}
+
+
+def assert_close(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        actual, expected = list(actual.values()), list(expected.values())
+    if isinstance(expected, list):
+        assert len(actual) == len(expected)
+        assert [value is None for value in actual] == [value is None for value in expected]
+        actual = [value for value in actual if value is not None]
+        expected = [value for value in expected if value is not None]
+    if expected is None:
+        assert actual is None
+        return
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+
+# --- Series --- #
+
+def _monthly(years: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    values = rng.gamma(0.6, 400.0, size=years * 12)
+    values[rng.random(values.size) < 0.2] = 0.0
+    return values, np.tile(np.arange(1, 13, dtype=np.int8), years)
+
+
+def _cases():
+    monthly, months = _monthly(40)
+    annual = monthly.reshape(40, 12).sum(axis=1)
+    annual[5] = 0.0  # a year without fire: undefined growth for the next one
+    return {
+        "annual": (annual, None, "annual"),
+        "monthly": (monthly, months, "monthly"),
+        "empty annual": (np.empty(0), None, "annual"),
+        "empty monthly": (np.empty(0), np.empty(0, dtype=np.int8), "monthly"),
+        "one year": (np.array([120.5]), None, "annual"),
+        "one month": (np.array([33.0]), np.array([8], dtype=np.int8), "monthly"),
+        "all zeros annual": (np.zeros(10), None, "annual"),
+        "all zeros monthly": (np.zeros(24), np.tile(np.arange(1, 13, dtype=np.int8), 2), "monthly"),
+        "partial year": (np.array([5.0, 0.0, 7.5]), np.array([7, 8, 9], dtype=np.int8), "monthly"),
+    }
+
+
+CASES = _cases()
+
+
+@pytest.mark.parametrize("func", FUNCTIONS, ids=lambda func: func.__name__)
+@pytest.mark.parametrize("case", CASES, ids=str)
+def test_kernel_matches_reference(func, case):
+    values, months, mode = CASES[case]
+    expected = REFERENCES[func](values.tolist(), [] if months is None else months.tolist(), mode)
+    assert_close(func(values, months, mode), expected)
+
+
+@pytest.mark.parametrize("func", FUNCTIONS, ids=lambda func: func.__name__)
+@pytest.mark.parametrize("mode", ["annual", "monthly"])
+def test_matrix_rows_match_single_series(func, mode):
+    monthly, months = _monthly(10, seed=7)
+    matrix = np.stack([monthly, monthly * 2, np.zeros_like(monthly), monthly[::-1].copy()])
+    if mode == "annual":
+        matrix, months = matrix.reshape(4, 10, 12).sum(axis=2), None
+
+    batched = func(matrix, months, mode)
+    for row in range(matrix.shape[0]):
+        expected = REFERENCES[func](matrix[row].tolist(), [] if months is None else months.tolist(), mode)
+        assert_close(None if batched is None else batched[row], expected)
+
+
+def test_growth_rate_and_seasonal_index_only_for_their_interval():
+    values, months = _monthly(2)
+    assert calculate_yearly_growth_rate(values, months, "monthly") is None
+    assert calculate_seasonal_index(values[:2], None, "annual") is None
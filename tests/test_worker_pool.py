@@ -0,0 +1,31 @@
+# tests/test_worker_pool.py
+
+import numpy as np
+import pytest
+
+from services import worker_pool
+from services.statistics import _RESULT_FIELDS, _SECTION_FUNCTIONS
+
+FUNCTIONS = [*_RESULT_FIELDS, *_SECTION_FUNCTIONS]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    worker_pool.start_worker_pool(max_workers=2)
+    yield
+    worker_pool.shutdown_worker_pool()
+
+
+@pytest.mark.parametrize("rows", [1, 3])
+def test_pool_results_match_inline(pool, monkeypatch, rows):
+    matrix = np.random.default_rng(rows).gamma(0.6, 400.0, size=(rows, 48))
+    values = matrix[0] if rows == 1 else matrix
+    months = np.tile(np.arange(1, 13, dtype=np.int8), 4)
+
+    monkeypatch.setattr(worker_pool, "INLINE_THRESHOLD", values.size + 1)
+    inline = worker_pool.run_functions(FUNCTIONS, values, months, "monthly")
+    monkeypatch.setattr(worker_pool, "INLINE_THRESHOLD", 0)
+    pooled = worker_pool.run_functions(FUNCTIONS, values, months, "monthly")
+
+    # Workers read the same float64 values: results are identical
+    assert pooled == inline